@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Content-addressed backup store
+Each file version is stored once under its SHA-256; a snapshot is a small JSON
+manifest mapping paths to hashes, so a backup only copies what changed
+"""
+
+import os
+import json
+import stat
+import shutil
+from pathlib import Path
+from datetime import datetime
+
+from filesync import FileSync, file_digest
+
+SNAPSHOT_PREFIX = 'backup_'
+
+
+class BackupStore:
+    """Snapshots of project paths backed by a deduplicated object store
+
+    Layout under the store directory:
+        objects/ab/cdef...   file contents, named by SHA-256
+        snapshots/backup_<timestamp>.json
+    Older versions kept whole copies in backup_<timestamp>/ directories;
+    import_legacy() moves those into the store.
+    """
+
+    def __init__(self, location, root):
+        self.location = Path(location)
+        self.root = Path(root)
+        self.objects_dir = self.location / 'objects'
+        self.snapshots_dir = self.location / 'snapshots'
+        self.sync = FileSync('auto')
+        self.stats = {'files': 0, 'stored': 0, 'reused': 0, 'hashed': 0, 'bytes_stored': 0}
+
+    def object_path(self, digest):
+        """Where the contents with a given hash live"""
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def snapshots(self):
+        """Snapshot names, oldest first"""
+        if not self.snapshots_dir.exists():
+            return []
+        return sorted(p.stem for p in self.snapshots_dir.glob(f'{SNAPSHOT_PREFIX}*.json'))
+
+    def load(self, name):
+        """File table of a snapshot: path -> {hash, size, mtime, mode}"""
+        path = self.snapshots_dir / f'{name}.json'
+        if not path.exists():
+            raise FileNotFoundError(f"No backup named {name}")
+        return json.loads(path.read_text(encoding='utf-8'))['files']
+
+    def scan(self, items, previous=None, root=None):
+        """File table for the current tree (or root), reusing hashes whose size and mtime match previous"""
+        root = Path(root) if root else self.root
+        previous = previous or {}
+        files = {}
+        for item in items:
+            src = root / item
+            if src.is_file():
+                paths = [src]
+            elif src.is_dir():
+                paths = sorted(p for p in src.rglob('*') if p.is_file())
+            else:
+                continue
+
+            for path in paths:
+                rel = path.relative_to(root).as_posix()
+                st = path.stat()
+                known = previous.get(rel)
+                if known and known['size'] == st.st_size and known['mtime'] == st.st_mtime_ns:
+                    digest = known['hash']
+                else:
+                    digest = file_digest(path)
+                    self.stats['hashed'] += 1
+                files[rel] = {'hash': digest, 'size': st.st_size, 'mtime': st.st_mtime_ns,
+                              'mode': stat.S_IMODE(st.st_mode)}
+        return files
+
+    def create(self, items):
+        """Snapshot the given files/directories, storing only contents not seen before
+
+        Returns the snapshot name.
+        """
+        latest = self.snapshots()
+        previous = self.load(latest[-1]) if latest else {}
+        files = self.scan(items, previous)
+
+        for rel, entry in files.items():
+            self.stats['files'] += 1
+            if self.store(self.root / rel, entry['hash']):
+                self.stats['stored'] += 1
+                self.stats['bytes_stored'] += entry['size']
+            else:
+                self.stats['reused'] += 1
+
+        name = SNAPSHOT_PREFIX + datetime.now().strftime('%Y%m%d_%H%M%S')
+        suffix = 1
+        while (self.snapshots_dir / f'{name}.json').exists():
+            suffix += 1
+            name = SNAPSHOT_PREFIX + datetime.now().strftime('%Y%m%d_%H%M%S') + f'_{suffix}'
+        self.write_snapshot(name, datetime.now(), items, files)
+        return name
+
+    def store(self, path, digest):
+        """Copy a file into the object store unless its contents are there already; True if copied"""
+        obj = self.object_path(digest)
+        if obj.exists():
+            return False
+        self.sync.sync(path, obj)
+        obj.chmod(0o444)  # Objects are shared between snapshots; never edit in place
+        return True
+
+    def write_snapshot(self, name, created, items, files):
+        """Atomically write a snapshot manifest"""
+        snapshot = {'created': created.isoformat(), 'items': list(items), 'files': files}
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshots_dir / f'.{name}.json.tmp'
+        tmp.write_text(json.dumps(snapshot, sort_keys=True), encoding='utf-8')
+        os.replace(tmp, self.snapshots_dir / f'{name}.json')
+
+    def import_legacy(self):
+        """Turn backup_<timestamp>/ copies from older versions into snapshots of the same name
+
+        Each directory is deleted once its snapshot is written, so old backups
+        are listed, restored and pruned like new ones. Returns the imported names.
+        """
+        if not self.location.exists():
+            return []
+        imported = []
+        for legacy in sorted(p for p in self.location.glob(f'{SNAPSHOT_PREFIX}*') if p.is_dir()):
+            items = sorted(p.name for p in legacy.iterdir())
+            files = self.scan(items, root=legacy)
+            for rel, entry in files.items():
+                self.store(legacy / rel, entry['hash'])
+            name = legacy.name
+            if (self.snapshots_dir / f'{name}.json').exists():
+                name += '_legacy'
+            self.write_snapshot(name, datetime.fromtimestamp(legacy.stat().st_mtime), items, files)
+            shutil.rmtree(legacy)
+            imported.append(name)
+        return imported
+
+    def diff(self, old, new=None):
+        """Added, removed and changed paths between two snapshots (new=None means the working tree)"""
+        old_files = self.load(old)
+        if new is None:
+            items = json.loads((self.snapshots_dir / f'{old}.json').read_text(encoding='utf-8'))['items']
+            new_files = self.scan(items, old_files)
+        else:
+            new_files = self.load(new)
+
+        added = sorted(new_files.keys() - old_files.keys())
+        removed = sorted(old_files.keys() - new_files.keys())
+        changed = sorted(p for p in old_files.keys() & new_files.keys()
+                         if old_files[p]['hash'] != new_files[p]['hash'])
+        return added, removed, changed
+
+    def restore(self, name, target=None, paths=None):
+        """Write a snapshot's files into target (default: the project root)
+
+        Only files whose contents differ are rewritten. paths limits the restore
+        to files under those prefixes. Returns the restored paths.
+        """
+        target = Path(target) if target else self.root
+        restored = []
+        for rel, entry in sorted(self.load(name).items()):
+            if paths and not any(rel == p or rel.startswith(p.rstrip('/') + '/') for p in paths):
+                continue
+            dest = target / rel
+            if dest.exists() and dest.stat().st_size == entry['size'] and file_digest(dest) == entry['hash']:
+                continue
+            # The digest already differs, so skip FileSync's size/mtime shortcut
+            self.sync.sync(self.object_path(entry['hash']), dest, force=True)
+            dest.chmod(entry['mode'])
+            os.utime(dest, ns=(entry['mtime'], entry['mtime']))
+            restored.append(rel)
+        return restored
+
+    def prune(self, keep_last):
+        """Drop all but the newest keep_last snapshots and delete unreferenced objects
+
+        Returns (snapshots removed, objects removed).
+        """
+        names = self.snapshots()
+        expired = names[:-keep_last] if keep_last > 0 else names
+        for name in expired:
+            (self.snapshots_dir / f'{name}.json').unlink()
+
+        referenced = set()
+        for name in self.snapshots():
+            referenced.update(entry['hash'] for entry in self.load(name).values())
+
+        removed = 0
+        if self.objects_dir.exists():
+            for obj in self.objects_dir.glob('*/*'):
+                if obj.parent.name + obj.name not in referenced:
+                    obj.unlink()
+                    removed += 1
+        return len(expired), removed
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Build benchmarks
+Generates synthetic sites (many Markdown pages, a large data YAML, deep
+template include chains, images and static files), builds them repeatedly and
+reports per-stage timings as JSON, compared against a saved baseline
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import platform
+import statistics
+from pathlib import Path
+from contextlib import redirect_stdout
+
+import yaml
+
+from profiler import REGRESSION_RATIO, REGRESSION_MIN_SECONDS
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ROOT = Path(__file__).parent
+
+# Bump when generated fixtures change, so cached ones are regenerated
+FIXTURE_VERSION = 1
+
+SCENARIOS = ('cold', 'noop', 'touch', 'warm')
+
+# Stages reported on their own: label -> metric
+HEADLINE = {
+    'data load': 'stage.load data',
+    'markdown': 'totals.markdown',
+    'render': 'totals.render',
+    'static sync': 'stage.copy static',
+    'images': 'totals.images',
+    'total': 'total',
+}
+
+WORDS = ('skin care routine serum barrier hydration texture tone analysis gentle daily cleanser '
+         'moisturizer sunscreen ingredient science formula balance glow calm repair night morning '
+         'dermatologist sensitive oily dry combination niacinamide ceramide peptide retinol').split()
+
+
+class SyntheticSite:
+    """A generated project tree with the same layout as the real site"""
+
+    def __init__(self, root, pages=10, data_items=1000, include_depth=10, images=4,
+                 static_files=100, seed=1):
+        self.root = Path(root)
+        self.params = {
+            'pages': pages,
+            'data_items': data_items,
+            'include_depth': include_depth,
+            'images': images if Image is not None else 0,
+            'static_files': static_files,
+            'seed': seed,
+            'version': FIXTURE_VERSION,
+        }
+        self.random = random.Random(seed)
+
+    @property
+    def name(self):
+        return f"{self.params['pages']}-pages"
+
+    def stamp(self):
+        return hashlib.sha256(json.dumps(self.params, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def generate(self):
+        """Write the fixture, reusing an identical one from an earlier run"""
+        stamp_path = self.root / '.fixture'
+        if stamp_path.exists() and stamp_path.read_text() == self.stamp():
+            return False
+        if self.root.exists():
+            shutil.rmtree(self.root)
+
+        self.write_config()
+        self.write_templates()
+        self.write_data()
+        self.write_pages()
+        self.write_static()
+        stamp_path.write_text(self.stamp())
+        return True
+
+    def write(self, rel, text):
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+
+    def sentence(self, words=12):
+        return ' '.join(self.random.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+    def write_config(self):
+        """The real pipeline settings, pointed at the fixture and without side logs"""
+        with open(ROOT / 'content' / 'config.yaml', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+        config['build'].update({'output_dir': 'docs', 'static_dir': 'static', 'template_dir': 'templates',
+                                'profile_log': '', 'static_exclude': []})
+        config['collections'] = {}
+        self.write('content/config.yaml', yaml.safe_dump(config, sort_keys=False))
+
+        with open(ROOT / 'site.config.yaml', encoding='utf-8') as f:
+            site_config = yaml.safe_load(f) or {}
+        tools = {'image_optimizer': site_config.get('tools', {}).get('image_optimizer', {})}
+        self.write('site.config.yaml', yaml.safe_dump({'tools': tools}, sort_keys=False))
+
+    def write_templates(self):
+        """A layout whose body goes through include_depth nested partials"""
+        depth = self.params['include_depth']
+        self.write('templates/bench.html', '''<!DOCTYPE html>
+<html lang="{{ site.language }}">
+<head>
+    <meta charset="UTF-8">
+    <title>{{ page.title }} | {{ site.title }}</title>
+    <meta name="description" content="{{ page.description }}">
+    <link rel="stylesheet" href="{{ asset('styles.css') }}">
+</head>
+<body>
+    <header class="header">
+        <nav class="nav flex items-center">
+            {% for item in navigation %}<a class="nav-link" href="{{ item.url }}">{{ item.title }}</a>{% endfor %}
+        </nav>
+    </header>
+    <section class="hero"><div class="container"><h1 class="hero-title">{{ page.title }}</h1></div></section>
+    <main class="container">
+        {{ content }}
+        {% include "partials/level-1.html" %}
+    </main>
+    <script src="{{ asset('main.js') }}" defer></script>
+</body>
+</html>
+''')
+        for level in range(1, depth + 1):
+            if level < depth:
+                inner = f'{{% include "partials/level-{level + 1}.html" %}}'
+            else:
+                inner = '''<div class="services-grid grid">
+{% for item in catalog[page.offset:page.offset + 12] %}
+    <div class="service-card"><h3 class="service-title">{{ item.title }}</h3>
+    <p class="service-price">{{ item.price }}</p><p>{{ item.description | truncate(80) }}</p>
+    {% for tag in item.tags %}<span class="service-badge">{{ tag }}</span>{% endfor %}</div>
+{% endfor %}
+</div>'''
+            self.write(f'templates/partials/level-{level}.html',
+                       f'<div class="level-{level}">\n{inner}\n</div>\n')
+
+    def write_data(self):
+        """A large catalog plus a small navigation file"""
+        catalog = [{
+            'id': f'item-{i}',
+            'title': self.sentence(4).rstrip('.'),
+            'price': f'${self.random.randint(5, 500)}',
+            'tags': self.random.sample(WORDS, 3),
+            'description': ' '.join(self.sentence() for _ in range(3)),
+            'order': i,
+        } for i in range(self.params['data_items'])]
+        self.write('content/data/catalog.yaml', yaml.safe_dump({'catalog': catalog}, sort_keys=False))
+        navigation = [{'title': word.title(), 'url': f'#{word}'} for word in WORDS[:6]]
+        self.write('content/data/navigation.yaml', yaml.safe_dump(navigation))
+
+    def page_source(self, number, revision=0):
+        """Markdown with headings, lists, a table and a code block"""
+        items = max(1, self.params['data_items'] - 12)
+        frontmatter = {
+            'title': f'Page {number}',
+            'description': self.sentence(),
+            'layout': 'bench',
+            'offset': number * 7 % items,
+            'revision': revision,
+        }
+        body = [f'# Page {number}', '']
+        for section in range(4):
+            body += [f'## Section {section + 1}', '']
+            body += [' '.join(self.sentence() for _ in range(5)), '']
+            body += [f'- {self.sentence(5)}' for _ in range(4)] + ['']
+        body += ['| Ingredient | Role |', '|---|---|']
+        body += [f'| {self.random.choice(WORDS)} | {self.sentence(3)} |' for _ in range(4)]
+        body += ['', '```python', 'def routine(skin):', '    return [step for step in skin.steps]', '```', '']
+        return f"---\n{yaml.safe_dump(frontmatter, sort_keys=False)}---\n\n" + '\n'.join(body)
+
+    def page_file(self, number):
+        return 'home.md' if number == 0 else f'page-{number:05d}.md'
+
+    def write_pages(self):
+        for number in range(self.params['pages']):
+            self.write(f'content/pages/{self.page_file(number)}', self.page_source(number))
+
+    def write_static(self):
+        """The real stylesheet and scripts, synthetic images and many small static files"""
+        for subdir in ('css', 'js'):
+            shutil.copytree(ROOT / 'static' / subdir, self.root / 'static' / subdir)
+        for n in range(self.params['static_files']):
+            self.write(f'static/images/icons/icon-{n:04d}.svg',
+                       f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><circle cx="12" cy="12" r="{n % 12}"/></svg>\n')
+        if self.params['images']:
+            photos = self.root / 'static' / 'images' / 'photos'
+            photos.mkdir(parents=True, exist_ok=True)
+            for n in range(self.params['images']):
+                im = Image.radial_gradient('L').resize((1600, 1000)).convert('RGB')
+                im.putpixel((n, n), (255, 0, 0))  # Distinct content per image
+                im.save(photos / f'photo-{n:03d}.jpg', quality=90)
+
+    def touch_page(self, revision):
+        """Change one page's content (an incremental edit)"""
+        number = self.params['pages'] // 2
+        self.write(f'content/pages/{self.page_file(number)}', self.page_source(number, revision))
+
+
+def stage_metrics(summary):
+    """Flat metric -> seconds from a build summary"""
+    metrics = {'total': summary['total']}
+    metrics.update({f'stage.{name}': seconds for name, seconds in summary['stages'].items()})
+    metrics['totals.data'] = sum(summary['data'].values())
+    metrics['totals.markdown'] = sum(summary['markdown'].values())
+    metrics['totals.compile'] = sum(summary['templates']['compile'].values())
+    metrics['totals.render'] = sum(summary['templates']['render'].values())
+    metrics['totals.images'] = sum(summary['stages'].get(name, 0.0) for name in ('plan images', 'process images'))
+    return {name: round(value, 6) for name, value in metrics.items()}
+
+
+def describe(samples):
+    """Summary statistics for repeated measurements"""
+    return {
+        'n': len(samples),
+        'min': round(min(samples), 6),
+        'median': round(statistics.median(samples), 6),
+        'mean': round(statistics.fmean(samples), 6),
+        'stdev': round(statistics.stdev(samples), 6) if len(samples) > 1 else 0.0,
+        'max': round(max(samples), 6),
+    }
+
+
+class BenchmarkRunner:
+    """Build synthetic sites repeatedly and collect per-stage timings"""
+
+    def __init__(self, sites, repeats=3, scenarios=SCENARIOS, jobs=1, log=print):
+        self.sites = sites
+        self.repeats = repeats
+        self.scenarios = [s for s in SCENARIOS if s in scenarios]
+        self.jobs = jobs
+        self.log = log
+
+    def build(self, site, clean=False):
+        """One build of a fixture with the builder's output discarded"""
+        from build import SiteBuilder
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            builder = SiteBuilder(root=site.root, quiet=True)
+            result = builder.build(clean=clean, jobs=self.jobs)
+        return stage_metrics(result.summary), result.counters
+
+    def warm_build(self, site, revision):
+        """Edit a page between two builds of one long-lived builder, as site.py dev does
+
+        Fails if the second build misses the edit.
+        """
+        from build import SiteBuilder
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            builder = SiteBuilder(root=site.root, quiet=True)
+            builder.build(jobs=self.jobs)
+            site.touch_page(revision)
+            result = builder.build(jobs=self.jobs)
+        if not result.pages_built:
+            raise RuntimeError(f"{site.name}: a rebuild with a warm builder missed an edited page")
+        return stage_metrics(result.summary), result.counters
+
+    def run_site(self, site):
+        """{scenario: {metric: stats}} for one fixture"""
+        started = time.perf_counter()
+        if site.generate():
+            self.log(f"   ✓ Generated {site.name} fixture in {time.perf_counter() - started:.1f}s")
+
+        samples = {scenario: {} for scenario in self.scenarios}
+        counters = {}
+        for repeat in range(self.repeats):
+            # Every repeat starts cold: no output and no caches
+            for path in (site.root / 'docs', site.root / '.build-cache'):
+                shutil.rmtree(path, ignore_errors=True)
+            for scenario in SCENARIOS:
+                if scenario == 'touch':
+                    site.touch_page(repeat + 1)
+                elif scenario not in samples and scenario != 'cold':
+                    continue  # The cold build always runs; it sets up the others
+                if scenario == 'warm':
+                    metrics, counters[scenario] = self.warm_build(site, self.repeats + repeat + 1)
+                else:
+                    metrics, counters[scenario] = self.build(site, clean=scenario == 'cold')
+                if scenario not in samples:
+                    continue
+                for name, seconds in metrics.items():
+                    samples[scenario].setdefault(name, []).append(seconds)
+                self.log(f"   {site.name} {scenario:<6} run {repeat + 1}/{self.repeats}: {metrics['total']:.3f}s")
+        site.touch_page(0)  # Leave the fixture as generated
+
+        return {
+            'params': site.params,
+            'scenarios': {scenario: {
+                'metrics': {name: describe(values) for name, values in sorted(metrics.items())},
+                'counters': counters.get(scenario, {}),
+            } for scenario, metrics in samples.items()},
+        }
+
+    def run(self):
+        """Results document for every fixture"""
+        results = {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'repeats': self.repeats,
+                'jobs': self.jobs,
+            },
+            'sites': {},
+        }
+        for site in self.sites:
+            self.log(f"\n🏋️  Benchmarking {site.name}...")
+            results['sites'][site.name] = self.run_site(site)
+        return results
+
+
+def compare(results, baseline, ratio=REGRESSION_RATIO, min_seconds=REGRESSION_MIN_SECONDS):
+    """(site, scenario, metric, current, baseline, regressed) for medians present in both runs"""
+    rows = []
+    for site_name, site in results['sites'].items():
+        base_site = baseline.get('sites', {}).get(site_name)
+        if not base_site or base_site.get('params') != site['params']:
+            continue  # Different fixture; timings are not comparable
+        for scenario, data in site['scenarios'].items():
+            base_metrics = base_site['scenarios'].get(scenario, {}).get('metrics', {})
+            for metric, stats in data['metrics'].items():
+                if metric not in base_metrics:
+                    continue
+                current, base = stats['median'], base_metrics[metric]['median']
+                regressed = current > base * ratio and current - base > min_seconds
+                rows.append((site_name, scenario, metric, current, base, regressed))
+    return rows
+
+
+def format_report(results, comparison=None):
+    """Headline stage medians per fixture and scenario, with baseline changes"""
+    baseline = {(site, scenario, metric): (base, regressed)
+                for site, scenario, metric, _, base, regressed in comparison or []}
+    lines = []
+    for site_name, site in results['sites'].items():
+        lines += ["", f"📊 {site_name} ({site['params']['data_items']} data items, "
+                      f"include depth {site['params']['include_depth']}, {site['params']['images']} images)"]
+        lines.append(f"   {'Scenario':<10}{'Stage':<14}{'Median':>10}{'Stdev':>10}{'Baseline':>10}{'Change':>9}")
+        for scenario, data in site['scenarios'].items():
+            for label, metric in HEADLINE.items():
+                stats = data['metrics'].get(metric)
+                if stats is None:
+                    continue
+                base, regressed = baseline.get((site_name, scenario, metric), (None, False))
+                change = f"{(stats['median'] - base) / base * 100:+.0f}%" if base else '-'
+                base_text = f"{base * 1000:.1f}ms" if base is not None else '-'
+                marker = '⚠️ ' if regressed else '  '
+                lines.append(f"{marker} {scenario:<10}{label:<14}{stats['median'] * 1000:>8.1f}ms"
+                             f"{stats['stdev'] * 1000:>8.1f}ms{base_text:>10}{change:>9}")
+
+    regressed = [row for row in comparison or [] if row[5]]
+    lines.append("")
+    if comparison is None:
+        lines.append("ℹ️  No baseline to compare against (save one with --save-baseline)")
+    elif not comparison:
+        lines.append("ℹ️  The baseline has no fixtures with these parameters")
+    elif regressed:
+        lines.append(f"⚠️  {len(regressed)} metric(s) regressed against the baseline:")
+        lines += [f"     {site} {scenario} {metric}: {base * 1000:.1f}ms → {current * 1000:.1f}ms"
+                  for site, scenario, metric, current, base, _ in regressed]
+    else:
+        lines.append("✅ No regressions against the baseline")
+    return '\n'.join(lines)
+
+
+def run_benchmarks(pages=(10, 1000), repeats=3, data_items=1000, include_depth=10, images=4,
+                   static_files=100, jobs=1, scenarios=SCENARIOS, workdir=None, output=None,
+                   baseline=None, save_baseline=False):
+    """Generate fixtures, benchmark them, write the results and compare with the baseline
+
+    Returns True when nothing regressed.
+    """
+    workdir = Path(workdir) if workdir else ROOT / '.build-cache' / 'bench'
+    sites = [SyntheticSite(workdir / f'site-{count}', count, data_items, include_depth, images, static_files)
+             for count in pages]
+    results = BenchmarkRunner(sites, repeats, scenarios, jobs).run()
+
+    output = Path(output) if output else ROOT / 'bench-results.json'
+    output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+    baseline = Path(baseline) if baseline else ROOT / 'bench-baseline.json'
+    comparison = None
+    if baseline.exists() and not save_baseline:
+        comparison = compare(results, json.loads(baseline.read_text(encoding='utf-8')))
+    print(format_report(results, comparison))
+    print(f"\n💾 Results written to {output}")
+
+    if save_baseline:
+        shutil.copyfile(output, baseline)
+        print(f"📌 Saved as baseline: {baseline}")
+    return not any(row[5] for row in comparison or [])
+
+
+def add_arguments(parser):
+    """Benchmark options (shared by bench.py and site.py bench)"""
+    parser.add_argument('--pages', default='10,1000',
+                        help='Comma-separated site sizes in Markdown pages (e.g. 10,1000,50000)')
+    parser.add_argument('--repeats', type=int, default=3, help='Builds per scenario')
+    parser.add_argument('--data-items', type=int, default=1000, help='Entries in the synthetic data YAML')
+    parser.add_argument('--include-depth', type=int, default=10, help='Depth of the template include chain')
+    parser.add_argument('--images', type=int, default=4, help='Synthetic photos (needs Pillow)')
+    parser.add_argument('--static-files', type=int, default=100, help='Small static files to sync')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Render worker processes')
+    parser.add_argument('--scenario', action='append', dest='scenarios', choices=SCENARIOS,
+                        help='Scenarios to report (repeatable; default: all)')
+    parser.add_argument('--workdir', help='Where fixtures are generated (default: .build-cache/bench)')
+    parser.add_argument('--output', help='Results file (default: bench-results.json)')
+    parser.add_argument('--baseline', help='Baseline file (default: bench-baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+
+
+def run_from_args(args):
+    """run_benchmarks with parsed command-line arguments"""
+    return run_benchmarks(
+        pages=[int(n) for n in args.pages.split(',') if n.strip()],
+        repeats=max(1, args.repeats),
+        data_items=args.data_items,
+        include_depth=max(1, args.include_depth),
+        images=args.images,
+        static_files=args.static_files,
+        jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+        scenarios=args.scenarios or SCENARIOS,
+        workdir=args.workdir,
+        output=args.output,
+        baseline=args.baseline,
+        save_baseline=args.save_baseline,
+    )
+
+
+def main():
+    """Run the benchmarks standalone"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark build.py on synthetic sites')
+    add_arguments(parser)
+    sys.exit(0 if run_from_args(parser.parse_args()) else 1)
+
+
+if __name__ == '__main__':
+    main()
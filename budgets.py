@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Page-weight budgets
+Works out what each rendered page loads (stylesheets, scripts, images, fonts
+and what its stylesheets pull in), totals requests and compressed transfer
+bytes per page, checks them against the budgets in site.config.yaml and keeps
+a JSON lines history for trend reports
+"""
+
+import re
+import gzip
+import json
+import fnmatch
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit, unquote
+
+KINDS = ('html', 'css', 'js', 'image', 'font', 'other')
+
+EXTENSION_KINDS = {
+    'html': 'html', 'css': 'css', 'js': 'js', 'mjs': 'js',
+    'png': 'image', 'jpg': 'image', 'jpeg': 'image', 'webp': 'image', 'avif': 'image',
+    'gif': 'image', 'svg': 'image', 'ico': 'image',
+    'woff2': 'font', 'woff': 'font', 'ttf': 'font', 'otf': 'font',
+}
+
+# Served compressed when no precompressed sidecar exists
+TEXT_EXTENSIONS = {'html', 'css', 'js', 'mjs', 'svg', 'json', 'xml', 'txt', 'ico'}
+
+# Budget keys: limits in requests or compressed KB (kinds as in KINDS)
+BUDGET_KEYS = ('requests', 'third_party_requests', 'total_kb', 'file_kb',
+               'html_kb', 'css_kb', 'js_kb', 'image_kb', 'font_kb')
+
+DEFAULTS = {
+    'enabled': True,
+    'fail_build': True,
+    'history': 'budget-history.jsonl',
+    'default': {},  # Budgets for every page
+    'pages': {},    # Output path pattern -> budgets overriding the default
+    'max_asset_kb': None,  # Limit for any published file, referenced or not
+}
+
+CSS_URL = re.compile(r'''@import\s+(?:url\(\s*)?["']?([^"')\s;]+)|url\(\s*["']?([^"')]+?)["']?\s*\)''', re.I)
+
+PRELOAD_KINDS = {'style': 'css', 'script': 'js', 'image': 'image', 'font': 'font'}
+
+
+class ResourceCollector(HTMLParser):
+    """Collect the (kind, url) of everything a page requests while loading"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.resources = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        rel = (attrs.get('rel') or '').lower().split()
+        if tag == 'link' and attrs.get('href'):
+            if 'stylesheet' in rel:
+                self.resources.append(('css', attrs['href']))
+            elif 'preload' in rel and attrs.get('as') in PRELOAD_KINDS:
+                self.resources.append((PRELOAD_KINDS[attrs['as']], attrs['href']))
+            elif 'icon' in rel:
+                self.resources.append(('image', attrs['href']))
+        elif tag == 'script' and attrs.get('src'):
+            self.resources.append(('js', attrs['src']))
+        elif tag == 'img' and attrs.get('src'):
+            self.resources.append(('image', attrs['src']))
+        elif tag == 'video' and attrs.get('poster'):
+            self.resources.append(('image', attrs['poster']))
+
+    handle_startendtag = handle_starttag
+
+
+class PageWeight:
+    """Requests and compressed bytes of one page and everything it loads"""
+
+    def __init__(self, page):
+        self.page = page
+        self.resources = []  # (kind, url, bytes or None for third-party)
+
+    @property
+    def requests(self):
+        return len(self.resources)
+
+    @property
+    def third_party_requests(self):
+        return sum(1 for _, _, size in self.resources if size is None)
+
+    @property
+    def bytes(self):
+        return sum(size or 0 for _, _, size in self.resources)
+
+    @property
+    def largest(self):
+        return max((size or 0 for _, _, size in self.resources), default=0)
+
+    def kind_bytes(self, kind):
+        return sum(size or 0 for k, _, size in self.resources if k == kind)
+
+    def heaviest(self, count=3):
+        """The largest first-party resources"""
+        return sorted((r for r in self.resources if r[2]), key=lambda r: -r[2])[:count]
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'third_party_requests': self.third_party_requests,
+            'bytes': self.bytes,
+            'kinds': {kind: self.kind_bytes(kind) for kind in KINDS if self.kind_bytes(kind)},
+        }
+
+
+class BudgetChecker:
+    """Weigh the rendered pages in an output directory and check them against budgets"""
+
+    def __init__(self, output_dir, settings=None):
+        self.output_dir = Path(output_dir)
+        self.settings = {**DEFAULTS, **(settings or {})}
+        self._sizes = {}
+        self._imports = {}
+
+    def transfer_size(self, path):
+        """Bytes sent for an output file: its .br or .gz sidecar, else gzip or raw size"""
+        if path not in self._sizes:
+            for suffix in ('.br', '.gz'):
+                sidecar = path.with_name(path.name + suffix)
+                if sidecar.is_file():
+                    self._sizes[path] = sidecar.stat().st_size
+                    break
+            else:
+                if path.suffix.lstrip('.').lower() in TEXT_EXTENSIONS:
+                    self._sizes[path] = len(gzip.compress(path.read_bytes(), 6))
+                else:
+                    self._sizes[path] = path.stat().st_size
+        return self._sizes[path]
+
+    def resolve(self, base, url):
+        """Output file a URL refers to from the file base, or None if it is not local"""
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or url.startswith('data:'):
+            return None
+        path = unquote(parts.path)
+        target = self.output_dir / path.lstrip('/') if path.startswith('/') else base.parent / path
+        try:
+            target = target.resolve()
+            target.relative_to(self.output_dir.resolve())
+        except (OSError, ValueError):
+            return None
+        return target if target.is_file() else None
+
+    def stylesheet_imports(self, css_path):
+        """(kind, path) of the fonts, images and stylesheets a stylesheet pulls in, transitively"""
+        if css_path not in self._imports:
+            self._imports[css_path] = []  # Guards against @import cycles
+            found = []
+            text = css_path.read_text(encoding='utf-8', errors='replace')
+            for imported, url in CSS_URL.findall(text):
+                url = imported or url
+                if url.startswith('data:'):
+                    continue
+                target = self.resolve(css_path, url)
+                if target is None:
+                    if urlsplit(url).netloc:
+                        found.append(('css' if imported else 'other', url, None))
+                    continue
+                kind = 'css' if imported else EXTENSION_KINDS.get(target.suffix.lstrip('.').lower(), 'other')
+                found.append((kind, target, self.transfer_size(target)))
+                if kind == 'css':
+                    found.extend(self.stylesheet_imports(target))
+            self._imports[css_path] = found
+        return self._imports[css_path]
+
+    def weigh(self, page_path):
+        """PageWeight of a rendered page"""
+        page_path = Path(page_path)
+        weight = PageWeight(page_path.relative_to(self.output_dir).as_posix())
+        weight.resources.append(('html', weight.page, self.transfer_size(page_path)))
+
+        collector = ResourceCollector()
+        collector.feed(page_path.read_text(encoding='utf-8'))
+        collector.close()
+
+        seen = set()
+        for kind, url in collector.resources:
+            target = self.resolve(page_path, url)
+            key = target or url
+            if key in seen or url.startswith('data:'):
+                continue  # Inlined, or requested once however often it is referenced
+            seen.add(key)
+            if target is None:
+                weight.resources.append((kind, url, None))
+                continue
+            weight.resources.append((kind, self.name(target), self.transfer_size(target)))
+            if kind == 'css':
+                for sub_kind, sub, size in self.stylesheet_imports(target):
+                    if sub not in seen:
+                        seen.add(sub)
+                        weight.resources.append((sub_kind, self.name(sub) if size is not None else sub, size))
+        return weight
+
+    def name(self, path):
+        return Path(path).resolve().relative_to(self.output_dir.resolve()).as_posix()
+
+    def budgets_for(self, page):
+        """Budgets that apply to a page: the default, overridden by matching page patterns"""
+        budgets = dict(self.settings['default'] or {})
+        for pattern, overrides in (self.settings['pages'] or {}).items():
+            if fnmatch.fnmatch(page, pattern):
+                budgets.update(overrides or {})
+        return budgets
+
+    def violations(self, weight):
+        """Messages for every budget a page exceeds"""
+        found = []
+        for key, limit in self.budgets_for(weight.page).items():
+            if key not in BUDGET_KEYS or limit is None:
+                continue
+            if key == 'file_kb':
+                if weight.largest / 1024 > limit:
+                    name = weight.heaviest(1)[0][1]
+                    found.append(f"largest file {name} {weight.largest / 1024:.1f} KB > {limit} KB budget")
+            elif key.endswith('_kb'):
+                kind = key[:-len('_kb')]
+                actual = (weight.bytes if kind == 'total' else weight.kind_bytes(kind)) / 1024
+                if actual > limit:
+                    found.append(f"{kind} {actual:.1f} KB > {limit} KB budget")
+            else:
+                actual = getattr(weight, key)
+                if actual > limit:
+                    found.append(f"{key.replace('_', ' ')} {actual} > {limit} budget")
+        return found
+
+    def pages(self):
+        """Rendered pages in the output directory"""
+        return sorted(p for p in self.output_dir.rglob('*.html') if p.is_file())
+
+    def check(self):
+        """(PageWeight, violations) for every rendered page"""
+        return [(weight, self.violations(weight)) for weight in map(self.weigh, self.pages())]
+
+    def oversized_assets(self):
+        """(output path, KB) of published files over max_asset_kb, largest first"""
+        limit = self.settings['max_asset_kb']
+        if not limit:
+            return []
+        sidecars = ('.br', '.gz')
+        found = []
+        for path in self.output_dir.rglob('*'):
+            if path.is_file() and path.suffix not in sidecars:
+                size = self.transfer_size(path) / 1024
+                if size > limit:
+                    found.append((path.relative_to(self.output_dir).as_posix(), size))
+        return sorted(found, key=lambda item: -item[1])
+
+
+def record(path, results):
+    """Append one run's page weights to the history log"""
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'pages': {weight.page: weight.to_dict() for weight, _ in results},
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, sort_keys=True) + '\n')
+
+
+def load_history(path):
+    """Recorded runs, oldest first (corrupt lines skipped)"""
+    history = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    history.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return history
+
+
+def format_report(results, history=(), window=10, oversized=(), limit=None):
+    """Per-page weights, their change over recorded runs and any budget violations"""
+    if not results:
+        return "No rendered pages found. Run: python build.py"
+
+    previous = history[-1]['pages'] if history else {}
+    oldest = history[-window]['pages'] if len(history) >= window else (history[0]['pages'] if history else {})
+
+    def change(page, size, runs):
+        if page not in runs:
+            return '-'
+        return f"{(size - runs[page]['bytes']) / 1024:+.1f}"
+
+    lines = [f"   {'Page':<32}{'Requests':>9}{'KB':>9}{'Δ last':>9}{f'Δ {window} runs':>11}"]
+    for weight, violations in results:
+        marker = '❌' if violations else '  '
+        lines.append(f"{marker} {weight.page:<32}{weight.requests:>9}{weight.bytes / 1024:>9.1f}"
+                     f"{change(weight.page, weight.bytes, previous):>9}{change(weight.page, weight.bytes, oldest):>11}")
+
+    failed = [(weight, violations) for weight, violations in results if violations]
+    for weight, violations in failed:
+        lines += ["", f"   {weight.page}:"]
+        lines += [f"     - {violation}" for violation in violations]
+        lines += [f"       {name}: {size / 1024:.1f} KB" for _, name, size in weight.heaviest()]
+
+    if oversized:
+        lines += ["", f"   Files over the {limit} KB asset budget:"]
+        lines += [f"     - {name}: {size:.1f} KB" for name, size in oversized]
+
+    lines.append("")
+    if failed or oversized:
+        lines.append(f"❌ {len(failed)} page(s) over budget, {len(oversized)} oversized file(s)")
+    else:
+        lines.append(f"✅ {len(results)} page(s) within budget")
+    return '\n'.join(lines)
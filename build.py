@@ -6,46 +6,520 @@ A simple, elegant build system for content-driven sites
 
 import os
 import sys
+import json
 import shutil
+import pickle
+import hashlib
+import fnmatch
+import tempfile
 import yaml
 import markdown
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape, meta
+from markupsafe import Markup, escape
 from datetime import datetime
 import argparse
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from filesync import FileSync
+from profiler import BuildProfiler
+from sitemap import SitemapWriter, MAX_URLS, today
+from collection_pages import Collection, content_key
+from fragment_cache import FragmentCacheExtension
+from tools.image_optimizer import ImageOptimizer
+from tools.icon_optimizer import IconOptimizer
+from tools.compressor import Compressor, SUFFIXES
+from tools import css_optimizer
+from tools import html_minifier
+from tools import resource_hints
+from tools import js_optimizer
+
+# Bump when the build logic changes in a way that invalidates earlier outputs
+BUILDER_VERSION = 3
+
+# Bump when the shape of cached parse results changes
+CONTENT_CACHE_VERSION = 1
+
+# Bump when the CSS optimizer's output changes
+CSS_PIPELINE_VERSION = 1
+
+# Bump when the way cached fragments are keyed or stored changes
+FRAGMENT_CACHE_VERSION = 1
+
+# Bump when the JS optimizer's output changes
+JS_PIPELINE_VERSION = 1
+
+# Bump when the HTML minifier's output changes
+HTML_MINIFIER_VERSION = 1
+
+# Markdown extensions used for every page (part of the parse cache key)
+MARKDOWN_EXTENSIONS = ['meta', 'extra', 'codehilite', 'toc']
+
+# Write buffer for rendered pages streamed to disk
+STREAM_BUFFER = 64 * 1024
+
+
+class BuildError(Exception):
+    """Raised when a source file cannot be loaded or rendered"""
+
+
+class BuildResult:
+    """Structured outcome of SiteBuilder.build"""
+    
+    def __init__(self, output_dir, summary):
+        counters = summary['counters']
+        self.output_dir = output_dir
+        self.elapsed = summary['total']
+        self.pages_built = counters.get('pages.built', 0)
+        self.pages_unchanged = counters.get('pages.unchanged', 0)
+        self.bytes_read = counters.get('bytes_read', 0)
+        self.bytes_written = counters.get('bytes_written', 0)
+        self.stages = summary['stages']
+        self.counters = counters
+        self.summary = summary
+    
+    def __repr__(self):
+        return (f'BuildResult(pages_built={self.pages_built}, pages_unchanged={self.pages_unchanged}, '
+                f'bytes_written={self.bytes_written}, elapsed={self.elapsed:.3f})')
+
+
+class BuildManifest:
+    """Persistent record of input hashes and the outputs built from them"""
+    
+    def __init__(self, path, root):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.data = self.load()
+        self._hashes = {}
+        self._relpaths = {}
+    
+    def load(self):
+        """Load the manifest, starting fresh if it is missing or outdated"""
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            if data.get('version') == BUILDER_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {'version': BUILDER_VERSION, 'files': {}, 'outputs': {}, 'templates': {}}
+    
+    def save(self):
+        """Write the manifest back to disk"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.data, indent=1, sort_keys=True), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+    
+    def reset_outputs(self):
+        """Forget every recorded output (used after cleaning the output directory)"""
+        self.data['outputs'] = {}
+    
+    def begin_build(self):
+        """Drop the per-build hash memos, so a reused manifest sees files edited since"""
+        self._hashes = {}
+        self._relpaths = {}
+    
+    def relpath(self, path):
+        """Path relative to the project root, used as a stable manifest key
+        
+        Resolved once per path per build; every page digest looks up the same files.
+        """
+        key = str(path)
+        if key not in self._relpaths:
+            try:
+                self._relpaths[key] = Path(path).resolve().relative_to(self.root.resolve()).as_posix()
+            except ValueError:
+                self._relpaths[key] = Path(path).as_posix()
+        return self._relpaths[key]
+    
+    def file_hash(self, path):
+        """Content hash of a file, reusing the stored hash while size and mtime match"""
+        key = self.relpath(path)
+        if key in self._hashes:
+            return self._hashes[key]
+        
+        stat = Path(path).stat()
+        entry = self.data['files'].get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            digest = entry['hash']
+        else:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            self.data['files'][key] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime_ns,
+                'hash': digest,
+            }
+        
+        self._hashes[key] = digest
+        return digest
+    
+    def digest(self, paths, extra=''):
+        """Combined hash of a set of input files (and any extra key material)"""
+        sha = hashlib.sha256(extra.encode('utf-8'))
+        for path in sorted(paths, key=self.relpath):
+            sha.update(self.relpath(path).encode('utf-8'))
+            sha.update(self.file_hash(path).encode('ascii'))
+        return sha.hexdigest()
+    
+    def is_fresh(self, output, key, output_path):
+        """True if the output exists unmodified and was built from the same inputs"""
+        entry = self.data['outputs'].get(output)
+        if entry is None or entry['key'] != key:
+            return False
+        try:
+            stat = os.stat(output_path)
+        except FileNotFoundError:
+            return False
+        # Outputs edited or replaced outside the builder (e.g. a checkout) are rebuilt
+        return 'stat' not in entry or entry['stat'] == [stat.st_size, stat.st_mtime_ns]
+    
+    def record(self, output, key, deps, output_path=None, **extra):
+        """Remember which inputs produced an output (and the output's stat, if given)"""
+        self.data['outputs'][output] = {
+            'key': key,
+            'deps': sorted(self.relpath(p) for p in deps),
+            **extra
+        }
+        if output_path is not None:
+            stat = os.stat(output_path)
+            self.data['outputs'][output]['stat'] = [stat.st_size, stat.st_mtime_ns]
+    
+    def entry(self, output):
+        """Recorded details for an output, or an empty dict"""
+        return self.data['outputs'].get(output, {})
+    
+    def forget(self, output):
+        """Drop an output from the manifest"""
+        self.data['outputs'].pop(output, None)
+    
+    def outputs(self):
+        """All outputs recorded by previous builds"""
+        return list(self.data['outputs'])
+
+
+class ContentCache:
+    """On-disk LRU cache of parsed pages and data files
+    
+    Each entry is a pickle stamped with CONTENT_CACHE_VERSION and named by a
+    key derived from the source file hash, so separate worker processes can
+    share the cache without coordination. Entry mtimes track recent use.
+    """
+    
+    MISSING = object()
+    
+    def __init__(self, cache_dir, max_bytes, profiler=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.profiler = profiler or BuildProfiler()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(*parts):
+        """Cache key for a combination of inputs"""
+        return hashlib.sha256('\0'.join(map(str, parts)).encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """Cached value for key, or ContentCache.MISSING"""
+        path = self.cache_dir / f'{key}.pickle'
+        try:
+            with open(path, 'rb') as f:
+                version, value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            self.profiler.count('content_cache.misses')
+            return self.MISSING
+        
+        if version != CONTENT_CACHE_VERSION:
+            self.misses += 1
+            self.profiler.count('content_cache.misses')
+            return self.MISSING
+        
+        os.utime(path)  # Mark as recently used
+        self.hits += 1
+        self.profiler.count('content_cache.hits')
+        return value
+    
+    def put(self, key, value):
+        """Store a value under key"""
+        path = self.cache_dir / f'{key}.pickle'
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((CONTENT_CACHE_VERSION, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    
+    def text_path(self, key):
+        """Where a text entry for key is stored"""
+        return self.cache_dir / f'{key}.v{CONTENT_CACHE_VERSION}.txt'
+    
+    def open_text(self, key):
+        """Cached text for key opened for reading, or None
+        
+        Text entries (written by put_text) are streamed rather than unpickled,
+        for values as large as a whole page.
+        """
+        path = self.text_path(key)
+        try:
+            f = open(path, encoding='utf-8', newline='')
+        except OSError:
+            self.misses += 1
+            self.profiler.count('content_cache.misses')
+            return None
+        os.utime(path)  # Mark as recently used
+        self.hits += 1
+        self.profiler.count('content_cache.hits')
+        return f
+    
+    def put_text(self, key, chunks):
+        """Pass text chunks through, storing them under key once they all went by"""
+        path = self.text_path(key)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        done = False
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='', buffering=STREAM_BUFFER) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            os.replace(tmp_path, path)
+            done = True
+        finally:
+            if not done:
+                tmp_path.unlink(missing_ok=True)
+    
+    def prune(self):
+        """Evict least recently used entries until the cache fits max_bytes"""
+        entries = []
+        for pattern in ('*.pickle', '*.txt'):
+            for path in self.cache_dir.glob(pattern):
+                stat = path.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink()
+            total -= size
+
+
+class AssetManifest:
+    """Maps logical asset paths (styles.css) to fingerprinted names (styles.3f9a1c2b.css)"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            self.mapping = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self.mapping = {}
+    
+    @property
+    def mapping(self):
+        return self._mapping
+    
+    @mapping.setter
+    def mapping(self, mapping):
+        self._mapping = mapping
+        self._names = None
+    
+    def resolve(self, logical):
+        """Fingerprinted name for an asset, or the logical path if it has none"""
+        return self.mapping.get(logical.lstrip('/'), logical)
+    
+    def logical(self, name):
+        """Logical path for a fingerprinted name, or the name itself if it is not one"""
+        if self._names is None:
+            self._names = {hashed: logical for logical, hashed in self.mapping.items()}
+        return self._names.get(name, name)
+    
+    def outputs(self):
+        """Every fingerprinted filename"""
+        return list(self.mapping.values())
+    
+    def to_json(self):
+        """Serialized manifest as published in the output directory"""
+        return json.dumps(self.mapping, indent=2, sort_keys=True) + '\n'
+
+
+class TemplateGraph:
+    """Statically extracted extends/include/import graph of the Jinja templates"""
+    
+    def __init__(self, env, template_dir, manifest):
+        self.template_dir = Path(template_dir)
+        self.refs = {}
+        self.dynamic = set()
+        
+        # Parse each template once per content hash; the edges live in the manifest
+        cache = manifest.data['templates']
+        for path in sorted(self.template_dir.rglob('*.html')):
+            name = path.relative_to(self.template_dir).as_posix()
+            digest = manifest.file_hash(path)
+            cached = cache.get(name)
+            if not cached or cached['hash'] != digest:
+                refs = set(meta.find_referenced_templates(env.parse(path.read_text(encoding='utf-8'))))
+                cached = cache[name] = {
+                    'hash': digest,
+                    'refs': sorted(r for r in refs if r is not None),
+                    'dynamic': None in refs,
+                }
+            self.refs[name] = set(cached['refs'])
+            if cached['dynamic']:
+                self.dynamic.add(name)
+        
+        for name in set(cache) - set(self.refs):
+            del cache[name]
+    
+    def dependencies(self, name):
+        """Every template that rendering name may load, including name itself"""
+        seen = set()
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            if current in self.dynamic:
+                # A computed template name could load anything
+                return set(self.refs)
+            pending.extend(self.refs.get(current, ()))
+        return seen
+    
+    def dependents(self, name):
+        """Templates whose output changes when name changes"""
+        return {other for other in self.refs if name in self.dependencies(other)}
+    
+    def paths(self, names):
+        """Filesystem paths for template names that exist on disk"""
+        return [self.template_dir / n for n in sorted(names) if n in self.refs]
+    
+    def to_dict(self):
+        """JSON-friendly view of the graph for tooling"""
+        return {
+            'templates': {name: sorted(refs) for name, refs in sorted(self.refs.items())},
+            'dynamic': sorted(self.dynamic),
+            'dependents': {name: sorted(self.dependents(name) - {name}) for name in sorted(self.refs)},
+        }
+
 
 class SiteBuilder:
     """Main site builder class"""
     
-    def __init__(self, config_path='content/config.yaml'):
-        """Initialize the builder"""
-        self.project_root = Path(__file__).parent
-        self.config = self.load_yaml(config_path)
+    def __init__(self, config_path='content/config.yaml', quiet=False, progress=None, root=None):
+        """Initialize the builder
+        
+        progress is an optional callback, called as progress(event, **details) with
+        'stage_start' (stage), 'stage_done' (stage, seconds) and 'page' (page, output).
+        root is the project directory to build (default: the one containing build.py).
+        """
+        self.progress = progress
+        self.project_root = Path(root) if root else Path(__file__).parent
+        self.config_path = self.project_root / config_path
+        
+        # Per-stage timings and counters, written out at the end of each build
+        self.profiler = BuildProfiler()
+        with self.profiler.span('config'):
+            self.config = self.load_yaml(config_path)
         
         # Directories
         self.content_dir = self.project_root / 'content'
         self.template_dir = self.project_root / self.config['build']['template_dir']
         self.static_dir = self.project_root / self.config['build']['static_dir']
         self.output_dir = self.project_root / self.config['build']['output_dir']
+        self.cache_dir = self.project_root / self.config['build'].get('cache_dir', '.build-cache')
         
-        # Setup Jinja2
+        # Incremental build state
+        self.manifest = BuildManifest(self.cache_dir / 'manifest.json', self.project_root)
+        self._template_graph = None
+        
+        # Setup Jinja2 (compiled templates are cached on disk, keyed by source checksum)
+        bytecode_dir = self.cache_dir / 'jinja'
+        bytecode_dir.mkdir(parents=True, exist_ok=True)
         self.jinja_env = Environment(
             loader=FileSystemLoader(str(self.template_dir)),
+            bytecode_cache=FileSystemBytecodeCache(str(bytecode_dir)),
             autoescape=select_autoescape(['html', 'xml']),
             trim_blocks=True,
-            lstrip_blocks=True
+            lstrip_blocks=True,
+            extensions=[FragmentCacheExtension]
+        )
+        
+        # Rendered {% cache %} fragments, reused across pages and (via the content cache) builds
+        self.jinja_env.fragment_cache = self.render_fragment
+        self._fragments = {}
+        self._fragment_salt = None
+        
+        # Fingerprinted asset names from the last build, resolved by asset() in templates
+        self.fingerprint_settings = self.config.get('fingerprint', {})
+        self.assets = AssetManifest(self.output_dir / self.fingerprint_settings.get('manifest', 'asset-manifest.json'))
+        self._asset_usage = {}
+        
+        # Responsive images (settings live under tools.image_optimizer in site.config.yaml)
+        self.images = ImageOptimizer.from_config(
+            self.project_root / 'site.config.yaml',
+            self.static_dir,
+            self.cache_dir / 'images',
+            hasher=self.manifest.file_hash
+        )
+        self.images.resolve = self.asset
+        
+        # Downscaled icons (settings live under tools.icon_optimizer in site.config.yaml)
+        self.icons = IconOptimizer.from_config(
+            self.project_root / 'site.config.yaml',
+            self.static_dir,
+            self.cache_dir / 'icons',
+            hasher=self.manifest.file_hash
+        )
+        self.icons.resolve = self.asset
+        self.jinja_env.globals.update(
+            asset=self.asset,
+            responsive_image=self.images.responsive_image,
+            srcset=self.images.srcset,
+            icon=self.icons.icon,
+            script=self.script
         )
         
+        # CSS post-processing (minify, purge unused rules, inline critical CSS)
+        self.css_settings = self.config.get('css', {})
+        self.css_enabled = any(self.css_settings.get(k, False) for k in ('minify', 'purge', 'critical'))
+        self._css_optimizers = {}
+        
+        # JS minification; script() tags are emitted per page, once each
+        self.js_settings = self.config.get('js', {})
+        self.js_enabled = bool(self.js_settings.get('minify'))
+        self._scripts = set()
+        
+        # Post-render passes: resource hints, then HTML minification
+        self.hints_settings = self.config.get('hints', {})
+        self.html_settings = self.config.get('html', {})
+        
         # Setup Markdown
-        self.md = markdown.Markdown(extensions=[
-            'meta',
-            'extra',
-            'codehilite',
-            'toc'
-        ])
-        
-        print("Building Aura - AI-Powered Skincare Site")
-        print("=" * 50)
+        self.md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        
+        # Parsed pages and data files, reused while their sources are unchanged
+        cache_mb = self.config['build'].get('content_cache_mb', 64)
+        self.content_cache = ContentCache(self.cache_dir / 'content', cache_mb * 1024 * 1024, self.profiler)
+        
+        self.quiet = quiet
+        if not quiet:
+            print("Building Aura - AI-Powered Skincare Site")
+            print("=" * 50)
+    
+    def report(self, event, **details):
+        """Forward a progress event to the callback, if any"""
+        if self.progress:
+            self.progress(event, **details)
+    
+    @contextmanager
+    def stage(self, name, **args):
+        """Time a build stage and report its start and end"""
+        self.report('stage_start', stage=name)
+        with self.profiler.span(name, **args) as info:
+            yield info
+        self.report('stage_done', stage=name, seconds=self.profiler.spans[-1]['dur'])
     
     def load_yaml(self, path):
         """Load and parse YAML file"""
@@ -53,8 +527,35 @@ class SiteBuilder:
             with open(self.project_root / path, 'r', encoding='utf-8') as f:
                 return yaml.safe_load(f)
         except Exception as e:
-            print(f"❌ Error loading {path}: {e}")
-            sys.exit(1)
+            raise BuildError(f"Error loading {path}: {e}") from e
+    
+    def load_data_file(self, yaml_file):
+        """Load one data file, unwrapping a top-level key named after the file"""
+        key = yaml_file.stem
+        key_normalized = key.replace('-', '_')  # Normalize hyphens to underscores
+        
+        with self.profiler.span(f'data {yaml_file.name}', cat='data', file=yaml_file.name):
+            return key_normalized, self._load_data_content(yaml_file, key, key_normalized)
+    
+    def _load_data_content(self, yaml_file, key, key_normalized):
+        """Parsed (and unwrapped) contents of a data file, from the cache when unchanged"""
+        cache_key = self.content_cache.key('data', key, self.manifest.file_hash(yaml_file))
+        cached = self.content_cache.get(cache_key)
+        if cached is not ContentCache.MISSING:
+            return cached
+        
+        self.profiler.count('bytes_read', yaml_file.stat().st_size)
+        content = self.load_yaml(f'content/data/{yaml_file.name}')
+        
+        # If the YAML file has a top-level key matching the filename (with either - or _), unwrap it
+        if isinstance(content, dict):
+            if key in content:
+                content = content[key]
+            elif key_normalized in content:
+                content = content[key_normalized]
+        
+        self.content_cache.put(cache_key, content)
+        return content
     
     def load_all_data(self):
         """Load all data files"""
@@ -63,36 +564,61 @@ class SiteBuilder:
         
         print("\n📦 Loading content data...")
         
-        for yaml_file in data_dir.glob('*.yaml'):
-            key = yaml_file.stem
-            key_normalized = key.replace('-', '_')  # Normalize hyphens to underscores
-            content = self.load_yaml(f'content/data/{yaml_file.name}')
-            
-            # If the YAML file has a top-level key matching the filename (with either - or _), unwrap it
-            if isinstance(content, dict):
-                if key in content:
-                    data[key_normalized] = content[key]
-                elif key_normalized in content:
-                    data[key_normalized] = content[key_normalized]
-                else:
-                    data[key_normalized] = content
-            else:
-                data[key_normalized] = content
+        for yaml_file in sorted(data_dir.glob('*.yaml')):
+            hits = self.content_cache.hits
+            key_normalized, content = self.load_data_file(yaml_file)
+            data[key_normalized] = content
             
-            print(f"   ✓ Loaded {key_normalized}")
+            cached = ' (cached)' if self.content_cache.hits > hits else ''
+            print(f"   ✓ Loaded {key_normalized}{cached}")
         
         return data
     
+    def use_data(self, data):
+        """Expose site settings and loaded data files to every template
+        
+        They are set once per build as Jinja globals, so each render only
+        passes the page itself.
+        """
+        self._data = data
+        self._fragments = {}
+        self._fragment_salt = None
+        now = datetime.now()
+        self.jinja_env.globals.update(
+            site=self.config['site'],
+            features=self.config.get('features', {}),
+            build_time=now.isoformat(),
+            current_year=now.year,
+            **data  # Data files (services, testimonials, etc.)
+        )
+    
     def parse_page(self, page_path):
         """Parse a markdown page with frontmatter"""
+        with self.profiler.span(f'markdown {page_path.name}', cat='markdown', page=page_path.name):
+            return self._parse_page_source(page_path)
+    
+    def _parse_page_source(self, page_path):
+        """Frontmatter and HTML for a page, from the cache when unchanged"""
+        cache_key = self.content_cache.key(
+            'page', self.manifest.file_hash(page_path),
+            markdown.__version__, *MARKDOWN_EXTENSIONS
+        )
+        cached = self.content_cache.get(cache_key)
+        if cached is not ContentCache.MISSING:
+            return cached
+        
         with open(page_path, 'r', encoding='utf-8') as f:
             content = f.read()
+        self.profiler.count('bytes_read', len(content.encode('utf-8')))
         
         # Split frontmatter and content
         if content.startswith('---'):
             parts = content.split('---', 2)
             if len(parts) >= 3:
-                frontmatter = yaml.safe_load(parts[1])
+                try:
+                    frontmatter = yaml.safe_load(parts[1]) or {}
+                except yaml.YAMLError as e:
+                    raise BuildError(f"Invalid frontmatter in {page_path.name}: {e}") from e
                 markdown_content = parts[2].strip()
             else:
                 frontmatter = {}
@@ -101,95 +627,747 @@ class SiteBuilder:
             frontmatter = {}
             markdown_content = content
         
-        # Convert markdown to HTML
+        # Convert markdown to HTML (reset so toc/meta state doesn't leak between pages)
+        self.md.reset()
         html_content = self.md.convert(markdown_content)
         
+        self.content_cache.put(cache_key, (frontmatter, html_content))
         return frontmatter, html_content
     
-    def build_page(self, page_file, data):
+    def render_fragment(self, name, key, caller):
+        """HTML of a {% cache %} block, rendered once per unique input
+        
+        The key covers the block's own arguments, the config, data files and
+        templates, the image and icon plans and the scripts already on the
+        page. Asset names and scripts the block used are replayed on reuse,
+        and a stored fragment whose asset names changed is re-rendered.
+        """
+        if self._fragment_salt is None:
+            self._fragment_salt = self.content_cache.key(
+                'fragment', FRAGMENT_CACHE_VERSION,
+                self.manifest.digest(self.template_dependencies()),
+                self.images.fingerprint(), self.icons.fingerprint(), datetime.now().year
+            )
+        cache_key = self.content_cache.key(self._fragment_salt, content_key(name, key, sorted(self._scripts)))
+        
+        fragment = self._fragments.get(cache_key)
+        if fragment is None:
+            fragment = self.content_cache.get(cache_key)
+            if fragment is ContentCache.MISSING:
+                fragment = None
+        if fragment is not None and all(self.assets.resolve(path) == resolved
+                                        for path, resolved in fragment['assets'].items()):
+            self.profiler.count('fragments.hits')
+        else:
+            self.profiler.count('fragments.rendered')
+            assets, scripts = self._asset_usage, self._scripts
+            self._asset_usage, self._scripts = {}, set(scripts)
+            try:
+                html = str(caller())
+                fragment = {'html': html, 'assets': self._asset_usage, 'scripts': self._scripts - scripts}
+            finally:
+                self._asset_usage, self._scripts = assets, scripts
+            self.content_cache.put(cache_key, fragment)
+        
+        self._fragments[cache_key] = fragment
+        self._asset_usage.update(fragment['assets'])
+        self._scripts |= fragment['scripts']
+        return Markup(fragment['html'])
+    
+    def asset(self, path):
+        """Resolve a static asset to its fingerprinted name (Jinja global)"""
+        resolved = self.assets.resolve(path)
+        self._asset_usage[path] = resolved
+        return resolved
+    
+    def script(self, path, module=False):
+        """Deferred <script> tag for a static script, once per page (Jinja global)
+        
+        Sections that need a script ask for it where they use it, so pages
+        without them never load it. module=True emits type="module" instead.
+        """
+        if path in self._scripts:
+            return Markup('')
+        self._scripts.add(path)
+        loading = 'type="module"' if module else 'defer'
+        return Markup(f'<script src="{escape(self.asset(path))}" {loading}></script>')
+    
+    def output_name(self, page_file):
+        """Output filename for a page in content/pages"""
+        if page_file == 'home.md':
+            return 'index.html'
+        return Path(page_file).stem + '.html'
+    
+    @property
+    def template_graph(self):
+        """Include/extends graph of the templates, built on first use"""
+        if self._template_graph is None:
+            self._template_graph = TemplateGraph(self.jinja_env, self.template_dir, self.manifest)
+        return self._template_graph
+    
+    def page_dependencies(self, page_path, template=None):
+        """Input files that a rendered page depends on
+        
+        Without a known layout template every template counts as a dependency.
+        """
+        return [page_path, *self.template_dependencies(template)]
+    
+    def template_dependencies(self, template=None):
+        """Config, data, template and stylesheet files that every page rendered with template reads"""
+        data_files = (self.content_dir / 'data').glob('*.yaml')
+        graph = self.template_graph
+        if template in graph.refs:
+            templates = graph.paths(graph.dependencies(template))
+        else:
+            templates = graph.paths(graph.refs)
+        
+        # Inlined critical CSS makes the page depend on its stylesheet
+        stylesheets = []
+        if self.css_settings.get('critical'):
+            stylesheet = self.static_dir / 'css' / self.css_settings.get('stylesheet', 'styles.css')
+            if stylesheet.exists():
+                stylesheets.append(stylesheet)
+        
+        return [self.config_path, *data_files, *templates, *stylesheets]
+    
+    def pages_affected_by(self, template):
+        """Output pages that were rendered with a given template"""
+        dependents = self.template_graph.dependents(template)
+        return sorted(output for output, entry in self.manifest.data['outputs'].items()
+                      if entry.get('template') in dependents)
+    
+    def build_page(self, page_file):
         """Build a single page"""
         page_path = self.content_dir / 'pages' / page_file
         
         if not page_path.exists():
-            print(f"   ⚠️  Page not found: {page_file}")
-            return
+            if not self.quiet:
+                print(f"   ⚠️  Page not found: {page_file}")
+            return None
         
-        print(f"   📄 Building {page_file}...")
+        if not self.quiet:
+            print(f"   📄 Building {page_file}...")
         
         # Parse the page
         frontmatter, content = self.parse_page(page_path)
         
-        # Determine output filename
-        if page_file == 'home.md':
-            output_file = 'index.html'
-        else:
-            output_file = page_path.stem + '.html'
-        
-        # Get layout template
+        # Determine output filename and layout template
+        output_file = self.output_name(page_file)
         layout = frontmatter.get('layout', 'default')
-        template = self.jinja_env.get_template(f'{layout}.html')
-        
-        # Build context
-        context = {
-            'site': self.config['site'],
-            'features': self.config.get('features', {}),
-            'page': frontmatter,
-            'content': content,
-            'build_time': datetime.now().isoformat(),
-            'current_year': datetime.now().year,
-            'section': frontmatter,  # For section data in frontmatter
-            **data  # Add all data files (services, testimonials, etc.)
-        }
+        result = self.render_page(f'{layout}.html', frontmatter, content, output_file, page_file)
+        
+        if not self.quiet:
+            print(f"      ✓ Generated {output_file}")
+        return result
+    
+    def render_page(self, template_name, page, content, output_file, label):
+        """Render a template for one page, streaming it into output_file
+        
+        page is the frontmatter (or generated page context); site settings and
+        data come from the Jinja globals set by use_data. Returns the output,
+        template and asset names used, for the build manifest.
+        """
+        self._asset_usage = {}
+        self._scripts = set()
+        with self.profiler.span(f'compile {template_name}', cat='jinja.compile', template=template_name):
+            template = self.jinja_env.get_template(template_name)
         
-        # Render template
-        html = template.render(**context)
+        # Only the per-page part of the context; section is kept for section data in frontmatter.
+        # Chunks may be Markup, which would escape any plain text concatenated onto it
+        chunks = map(str, template.generate(page=page, content=content, section=page))
         
-        # Write output
+        with self.profiler.span(f'render {template_name}', cat='jinja.render', template=template_name, page=label):
+            if self.css_settings.get('critical') or self.hints_settings.get('enabled'):
+                self.write_stream_with_head_passes(output_file, chunks, label)
+            else:
+                self.write_page(output_file, chunks, label)
+        return {'output': output_file, 'template': template_name, 'assets': dict(self._asset_usage)}
+    
+    def write_stream(self, output_file, chunks):
+        """Atomically write text chunks to an output file as they are produced"""
         output_path = self.output_dir / output_file
-        output_path.write_text(html, encoding='utf-8')
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(f'.{output_path.name}.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', buffering=STREAM_BUFFER) as f:
+                f.writelines(chunks)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)  # A failed render leaves the previous output in place
+            raise
+        self.profiler.count('bytes_written', tmp_path.stat().st_size)
+        os.replace(tmp_path, output_path)
+    
+    def write_stream_with_head_passes(self, output_file, chunks, label):
+        """Stream a page to disk, rewriting its <head> once the body is known
         
-        print(f"      ✓ Generated {output_file}")
+        Inlined critical CSS and resource hints depend on elements after the
+        head, so only the head is held in memory. The body goes to a scratch
+        file while its selector tokens are collected, is read back once to
+        find the images and origins the hints need, and is then copied out
+        with those edits applied (and minified, when enabled).
+        """
+        collector = None
+        if self.css_settings.get('critical'):
+            collector = css_optimizer.TokenCollector(self.css_settings.get('critical_roots', ['header', '.hero']))
+        head = ''
+        with tempfile.TemporaryFile('w+', encoding='utf-8', newline='', dir=self.output_dir,
+                                    buffering=STREAM_BUFFER) as body:
+            in_head = True
+            for chunk in chunks:
+                if collector:
+                    collector.feed(chunk)
+                if in_head:
+                    # Search only the new text (plus enough to catch a tag split across chunks)
+                    start = max(0, len(head) - len('</head>'))
+                    head += chunk
+                    end = head.find('</head>', start)
+                    if end < 0:
+                        continue
+                    end += len('</head>')
+                    head, chunk, in_head = head[:end], head[end:], False
+                body.write(chunk)
+            
+            if collector:
+                collector.close()
+                with self.profiler.span(f'critical css {label}', cat='css', page=label):
+                    head = self.inline_critical_css(head, collector.tokens)
+            
+            def page():
+                body.seek(0)
+                yield head
+                yield from iter(lambda: body.read(STREAM_BUFFER), '')
+            
+            output = page()
+            if self.hints_settings.get('enabled'):
+                settings = {**resource_hints.DEFAULTS, **{k: v for k, v in self.hints_settings.items()
+                                                         if k in resource_hints.DEFAULTS}}
+                with self.profiler.span(f'resource hints {label}', cat='html', page=label):
+                    lcp, edits = resource_hints.scan(page(), settings, self.image_dimensions)
+                output = resource_hints.rewrite(page(), settings, lcp, edits, self.image_dimensions)
+            self.write_page(output_file, output, label)
     
-    def copy_static_files(self):
-        """Copy static assets to output"""
-        print("\n📁 Copying static assets...")
+    def image_dimensions(self, src):
+        """(width, height) of a published local image, or None if unknown"""
+        path = src.split('?', 1)[0].split('#', 1)[0]
+        while path.startswith(('../', './', '/')):
+            path = path.split('/', 1)[1]
+        path = self.assets.logical(path)
         
-        if not self.static_dir.exists():
-            print(f"   ⚠️  Static directory not found: {self.static_dir}")
+        for optimizer in (self.icons, self.images):
+            if optimizer.plan is None:
+                optimizer.build_plan()
+            if path in optimizer.plan:
+                return optimizer.plan[path]['width'], optimizer.plan[path]['height']
+        source = self.static_dir / path
+        if path.startswith('images/') and source.is_file() and self.images.enabled:
+            try:
+                return self.images.dimensions(source, self.manifest.file_hash(source))
+            except OSError:
+                return None
+        return None
+    
+    def write_page(self, output_file, chunks, label):
+        """Write a rendered page, minified when html.minify is set
+        
+        Minified pages are cached by the hash of the rendered HTML and the
+        minifier settings. The page is hashed while it is spooled to a scratch
+        file; a cached result is then copied out, otherwise the scratch file is
+        minified as it streams to the output and into the cache.
+        """
+        if not self.html_settings.get('minify'):
+            self.write_stream(output_file, chunks)
             return
+        settings = {k: self.html_settings[k] for k in html_minifier.DEFAULTS if k in self.html_settings}
+        
+        sha = hashlib.sha256()
+        size = 0
+        with tempfile.TemporaryFile('w+', encoding='utf-8', newline='', dir=self.output_dir,
+                                    buffering=STREAM_BUFFER) as raw:
+            for chunk in chunks:
+                data = chunk.encode('utf-8')
+                sha.update(data)
+                size += len(data)
+                raw.write(chunk)
+            key = self.content_cache.key('html-min', HTML_MINIFIER_VERSION,
+                                         json.dumps(settings, sort_keys=True), sha.hexdigest())
+            
+            with self.profiler.span(f'minify html {label}', cat='html', page=label):
+                cached = self.content_cache.open_text(key)
+                if cached is not None:
+                    with cached:
+                        self.write_stream(output_file, iter(lambda: cached.read(STREAM_BUFFER), ''))
+                    self.profiler.count('html.bytes_saved', size - (self.output_dir / output_file).stat().st_size)
+                    return
+                raw.seek(0)
+                minified = self.minified_chunks(iter(lambda: raw.read(STREAM_BUFFER), ''), settings)
+                self.write_stream(output_file, self.content_cache.put_text(key, minified))
+    
+    def minified_chunks(self, chunks, settings):
+        """Yield minified chunks, counting the bytes saved once the page is done"""
+        size_in = size_out = 0
+        
+        def measured():
+            nonlocal size_in
+            for chunk in chunks:
+                size_in += len(chunk.encode('utf-8'))
+                yield chunk
+        
+        for chunk in html_minifier.minify_stream(measured(), **settings):
+            size_out += len(chunk.encode('utf-8'))
+            yield chunk
+        self.profiler.count('html.bytes_saved', size_in - size_out)
+    
+    def css_optimizer(self, css_path):
+        """Parsed stylesheet, reused from the content cache while the file is unchanged"""
+        digest = self.manifest.file_hash(css_path)
+        if digest not in self._css_optimizers:
+            key = self.content_cache.key('css-parse', CSS_PIPELINE_VERSION, digest)
+            optimizer = self.content_cache.get(key)
+            if optimizer is ContentCache.MISSING:
+                optimizer = css_optimizer.CSSOptimizer(css_path.read_text(encoding='utf-8'))
+                self.content_cache.put(key, optimizer)
+            optimizer.keep = list(self.css_settings.get('keep_selectors', []))
+            self._css_optimizers[digest] = optimizer
+        return self._css_optimizers[digest]
+    
+    def inline_critical_css(self, html, tokens=None):
+        """Inline the rules the above-the-fold elements need and defer the stylesheet
         
-        # Copy CSS
-        css_src = self.static_dir / 'css'
-        css_dest = self.output_dir
-        if css_src.exists():
-            for css_file in css_src.glob('*.css'):
-                shutil.copy2(css_file, css_dest / css_file.name)
-                print(f"   ✓ Copied {css_file.name}")
-        
-        # Copy JS
-        js_src = self.static_dir / 'js'
-        js_dest = self.output_dir
-        if js_src.exists():
-            for js_file in js_src.glob('*.js'):
-                shutil.copy2(js_file, js_dest / js_file.name)
-                print(f"   ✓ Copied {js_file.name}")
-        
-        # Copy images
+        tokens are the selector tokens of the above-the-fold elements, when
+        they were collected while the page was written; otherwise html is scanned.
+        """
+        stylesheet = self.css_settings.get('stylesheet', 'styles.css')
+        css_path = self.static_dir / 'css' / stylesheet
+        if not css_path.exists():
+            return html
+        href = self.asset(stylesheet)
+        
+        if tokens is None:
+            tokens = css_optimizer.html_tokens(html, self.css_settings.get('critical_roots', ['header', '.hero']))
+        key = self.content_cache.key(
+            'css-critical', CSS_PIPELINE_VERSION, self.manifest.file_hash(css_path),
+            *sorted(self.css_settings.get('keep_selectors', [])), '|', *sorted(tokens)
+        )
+        critical = self.content_cache.get(key)
+        if critical is ContentCache.MISSING:
+            critical = self.css_optimizer(css_path).critical(tokens)
+            self.content_cache.put(key, critical)
+        
+        return css_optimizer.inline_critical(html, href, critical)
+    
+    def render_pages(self, page_files, jobs=1):
+        """Build several pages, spreading them over worker processes when jobs > 1
+        
+        Returns a dict mapping each page file to its build_page result (None if skipped).
+        """
+        workers = min(jobs, len(page_files))
+        if workers <= 1:
+            results = {}
+            for page_file in page_files:
+                results[page_file] = self.build_page(page_file)
+                if results[page_file]:
+                    self.report('page', page=page_file, output=results[page_file]['output'])
+            return results
+        
+        # Each worker builds its own SiteBuilder (Jinja env + Markdown) and
+        # receives the loaded data once through the pool initializer
+        chunksize = max(1, len(page_files) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_render_worker,
+            initargs=(str(self.config_path), self._data, str(self.project_root))
+        ) as pool:
+            results = {}
+            for page_file, (result, profile) in zip(
+                    page_files, pool.map(_render_page_in_worker, page_files, chunksize=chunksize)):
+                results[page_file] = result
+                self.profiler.merge(*profile)
+        
+        for page_file, result in results.items():
+            if result:
+                print(f"   📄 {page_file} → {result['output']}")
+                self.report('page', page=page_file, output=result['output'])
+            else:
+                print(f"   ⚠️  Page not found: {page_file}")
+        return results
+    
+    def static_files(self):
+        """Yield (source, output name) pairs for every static asset"""
+        exclude = self.config['build'].get('static_exclude', [])
+        
+        def included(output_file):
+            return not any(fnmatch.fnmatch(output_file, pattern) for pattern in exclude)
+        
+        # CSS and JS go to the output root (written by optimize_css/optimize_js when enabled)
+        asset_types = [('css', '*.css')] if not self.css_enabled else []
+        if not self.js_enabled:
+            asset_types.append(('js', '*.js'))
+        for subdir, pattern in asset_types:
+            src_dir = self.static_dir / subdir
+            if src_dir.exists():
+                for src in sorted(src_dir.glob(pattern)):
+                    if included(src.name):
+                        yield src, src.name
+        
+        # Images keep their directory structure (icons are published downscaled by process_icons)
         img_src = self.static_dir / 'images'
-        img_dest = self.output_dir / 'images'
         if img_src.exists():
-            if img_dest.exists():
-                shutil.rmtree(img_dest)
-            shutil.copytree(img_src, img_dest)
-            print(f"   ✓ Copied images/ directory")
+            for src in sorted(img_src.rglob('*')):
+                output_file = 'images/' + src.relative_to(img_src).as_posix()
+                if src.is_file() and included(output_file) and not self.icons.is_icon(output_file):
+                    yield src, output_file
         
-        # Copy SEO and deployment files
-        seo_files = ['robots.txt', 'sitemap.xml', 'CNAME']
+        # SEO and deployment files (sitemap.xml is generated unless disabled)
+        seo_files = ['robots.txt', 'CNAME']
+        if not self.config.get('sitemap', {}).get('enabled'):
+            seo_files.append('sitemap.xml')
         for seo_file in seo_files:
             src = self.static_dir / seo_file
             if src.exists():
-                shutil.copy2(src, self.output_dir / seo_file)
-                print(f"   ✓ Copied {seo_file}")
+                yield src, seo_file
+    
+    def copy_static_files(self, keep=()):
+        """Sync static assets to output, writing only files that changed
+        
+        keep lists generated outputs under images/ that must not be treated as orphans.
+        """
+        print("\n📁 Syncing static assets...")
+        
+        if not self.static_dir.exists():
+            print(f"   ⚠️  Static directory not found: {self.static_dir}")
+            return []
+        
+        sync = FileSync(self.config['build'].get('asset_sync', 'auto'), hasher=self.manifest.file_hash)
+        
+        produced = []
+        for src, output_file in self.static_files():
+            produced.append(output_file)
+            if sync.sync(src, self.output_dir / output_file):
+                print(f"   ✓ Updated {output_file}")
+            self.manifest.record(output_file, self.manifest.file_hash(src), [src])
+        
+        # images/ is owned entirely by the sync, so anything else in it is stale
+        keep = [*produced, *keep, *self.assets.outputs()]
+        images = {f[len('images/'):] for f in keep if f.startswith('images/')}
+        images |= {name + suffix for name in images for suffix in SUFFIXES.values()}  # Compressed sidecars
+        for orphan in sync.remove_orphans(self.output_dir / 'images', images):
+            print(f"   🗑️  Removed orphaned images/{orphan}")
+        
+        stats = sync.stats
+        self.profiler.count('bytes_written', stats['bytes_written'])
+        self.profiler.count('static.copied', stats['copied'] + stats['linked'])
+        self.profiler.count('static.unchanged', stats['skipped'])
+        print(f"   ✓ {stats['copied']} copied, {stats['linked']} linked, "
+              f"{stats['skipped']} unchanged, {stats['removed']} removed "
+              f"({stats['bytes_written'] / 1024:.1f} KB written)")
+        return produced
+    
+    def process_images(self):
+        """Wait for background image encodes and publish the generated variants"""
+        print("\n🖼️  Processing images...")
+        
+        if not self.images.enabled:
+            print("   ⚠️  Image pipeline disabled (enable tools.image_optimizer and install Pillow)")
+            return []
+        
+        sync = FileSync(self.config['build'].get('asset_sync', 'auto'))
+        for output_file in self.images.finish(self.output_dir, sync):
+            print(f"   ✓ Updated {output_file}")
+        
+        produced = self.images.generated_outputs()
+        for output_file in produced:
+            variant = self.images.plan[output_file]
+            self.manifest.record(output_file, Path(variant['cache']).name,
+                                 [self.static_dir / variant['source']])
+        
+        stats = self.images.stats
+        self.profiler.count('images.encoded', stats['encoded'])
+        self.profiler.count('images.cache_hits', stats['cached'])
+        print(f"   ✓ {stats['sources']} sources, {len(produced)} generated variants "
+              f"({stats['encoded']} encoded, {stats['cached']} from cache)")
+        return produced
+    
+    def process_icons(self):
+        """Publish the downscaled icons in place of their full-size sources"""
+        print("\n🧩 Processing icons...")
+        
+        if not self.icons.enabled:
+            print("   ⚠️  Icon pipeline disabled (enable tools.icon_optimizer and install Pillow)")
+            return []
+        
+        sync = FileSync(self.config['build'].get('asset_sync', 'auto'))
+        for output_file in self.icons.finish(self.output_dir, sync):
+            print(f"   ✓ Updated {output_file}")
+        
+        produced = self.icons.outputs()
+        for output_file in produced:
+            variant = self.icons.plan[output_file]
+            self.manifest.record(output_file, Path(variant['cache']).name,
+                                 [self.static_dir / variant['source']])
+        
+        stats = self.icons.stats
+        self.profiler.count('icons.encoded', stats['encoded'])
+        self.profiler.count('icons.cache_hits', stats['cached'])
+        print(f"   ✓ {stats['sources']} icons, {stats['bytes_in'] / 1024:.1f} KB → "
+              f"{stats['bytes_out'] / 1024:.1f} KB ({stats['encoded']} encoded, {stats['cached']} from cache)")
+        return produced
+    
+    def write_output(self, output_file, text):
+        """Atomically replace an output file (never writing through a hard link)"""
+        output_path = self.output_dir / output_file
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(f'.{output_path.name}.tmp')
+        tmp_path.write_text(text, encoding='utf-8')
+        os.replace(tmp_path, output_path)
+        self.profiler.count('bytes_written', len(text.encode('utf-8')))
+    
+    def cached_tokens(self, kind, path):
+        """Selector tokens used by an HTML or JS file, cached by file hash"""
+        key = self.content_cache.key('css-tokens', kind, self.manifest.file_hash(path))
+        tokens = self.content_cache.get(key)
+        if tokens is ContentCache.MISSING:
+            text = path.read_text(encoding='utf-8')
+            tokens = css_optimizer.html_tokens(text) if kind == 'html' else css_optimizer.js_tokens(text)
+            self.content_cache.put(key, tokens)
+        return tokens
+    
+    def optimize_css(self, pages, extra_tokens=()):
+        """Write minified stylesheets without rules that no page or script uses
+        
+        extra_tokens are selector tokens of pages not (yet) written.
+        """
+        print("\n🎨 Optimizing CSS...")
+        
+        css_dir = self.static_dir / 'css'
+        if not self.css_enabled or not css_dir.exists():
+            return []
+        
+        # Classes, ids and tags used anywhere on the site (JS may add classes at runtime)
+        tokens = set(extra_tokens)
+        if self.css_settings.get('purge'):
+            for page in pages:
+                if (self.output_dir / page).exists():
+                    tokens |= self.cached_tokens('html', self.output_dir / page)
+            for script in sorted((self.static_dir / 'js').glob('*.js')):
+                tokens |= self.cached_tokens('js', script)
+        
+        settings_key = json.dumps(self.css_settings, sort_keys=True)
+        tokens_key = hashlib.sha256('\0'.join(sorted(tokens)).encode('utf-8')).hexdigest()
+        
+        produced = []
+        for css_path in sorted(css_dir.glob('*.css')):
+            output_file = css_path.name
+            produced.append(output_file)
+            key = self.content_cache.key('css-out', CSS_PIPELINE_VERSION, settings_key,
+                                         self.manifest.file_hash(css_path), tokens_key)
+            if self.manifest.is_fresh(output_file, key, self.output_dir / output_file):
+                continue
+            
+            css = self.content_cache.get(key)
+            if css is ContentCache.MISSING:
+                optimizer = self.css_optimizer(css_path)
+                if self.css_settings.get('purge'):
+                    css = optimizer.purged(tokens)
+                elif self.css_settings.get('minify'):
+                    css = optimizer.minified()
+                else:
+                    css = css_path.read_text(encoding='utf-8')
+                self.content_cache.put(key, css)
+            
+            self.write_output(output_file, css)
+            self.manifest.record(output_file, key, [css_path], self.output_dir / output_file)
+            print(f"   ✓ {output_file}: {css_path.stat().st_size / 1024:.1f} KB → {len(css.encode('utf-8')) / 1024:.1f} KB")
+        
+        return produced
+    
+    def optimize_js(self):
+        """Write minified copies of static/js/*.js, cached by source hash"""
+        print("\n📜 Optimizing JS...")
+        
+        js_dir = self.static_dir / 'js'
+        if not self.js_enabled or not js_dir.exists():
+            return []
+        
+        settings_key = json.dumps(self.js_settings, sort_keys=True)
+        produced = []
+        for js_path in sorted(js_dir.glob('*.js')):
+            output_file = js_path.name
+            produced.append(output_file)
+            key = self.content_cache.key('js-out', JS_PIPELINE_VERSION, settings_key,
+                                         self.manifest.file_hash(js_path))
+            if self.manifest.is_fresh(output_file, key, self.output_dir / output_file):
+                continue
+            
+            js = self.content_cache.get(key)
+            if js is ContentCache.MISSING:
+                js = js_optimizer.minify(js_path.read_text(encoding='utf-8'),
+                                         keep_bang_comments=self.js_settings.get('keep_bang_comments', True))
+                self.content_cache.put(key, js)
+            
+            self.write_output(output_file, js)
+            self.manifest.record(output_file, key, [js_path], self.output_dir / output_file)
+            print(f"   ✓ {output_file}: {js_path.stat().st_size / 1024:.1f} KB → {len(js.encode('utf-8')) / 1024:.1f} KB")
+        return produced
+    
+    def fingerprintable(self, output_file):
+        """True if an output should get a content-hashed copy"""
+        extensions = self.fingerprint_settings.get(
+            'extensions', ['css', 'js', 'png', 'jpg', 'jpeg', 'webp', 'avif', 'gif', 'svg', 'ico', 'woff2'])
+        exclude = self.fingerprint_settings.get('exclude', [])
+        return (output_file.rsplit('.', 1)[-1].lower() in extensions
+                and not any(fnmatch.fnmatch(output_file, pattern) for pattern in exclude))
+    
+    def fingerprint_assets(self, outputs):
+        """Write content-hashed copies of assets plus the asset manifest
+        
+        Returns the outputs written by this stage.
+        """
+        print("\n🔖 Fingerprinting assets...")
+        
+        if not self.fingerprint_settings.get('enabled'):
+            self.assets.mapping = {}
+            print("   ⚠️  Fingerprinting disabled")
+            return []
+        
+        length = self.fingerprint_settings.get('hash_length', 8)
+        sync = FileSync(self.config['build'].get('asset_sync', 'auto'))
+        
+        mapping = {}
+        for output_file in sorted(outputs):
+            output_path = self.output_dir / output_file
+            if not self.fingerprintable(output_file) or not output_path.is_file():
+                continue
+            digest = self.manifest.file_hash(output_path)
+            stem, ext = output_file.rsplit('.', 1)
+            hashed = f'{stem}.{digest[:length]}.{ext}'
+            sync.sync(output_path, self.output_dir / hashed)
+            self.manifest.record(hashed, digest, [output_path])
+            mapping[output_file] = hashed
+        
+        changed = sum(1 for k, v in mapping.items() if self.assets.mapping.get(k) != v)
+        self.assets.mapping = mapping
+        produced = list(mapping.values())
+        
+        manifest_file = self.assets.path.name
+        self.write_output(manifest_file, self.assets.to_json())
+        produced.append(manifest_file)
+        
+        # Long-lived cache headers for hosts that read a _headers file (Netlify, Cloudflare Pages)
+        headers_file = self.fingerprint_settings.get('headers_file')
+        if headers_file:
+            rules = [f"/{hashed}\n  Cache-Control: public, max-age=31536000, immutable\n"
+                     for hashed in sorted(mapping.values())]
+            self.write_output(headers_file, '\n'.join(rules))
+            produced.append(headers_file)
+        
+        print(f"   ✓ {len(mapping)} assets fingerprinted ({changed} changed, "
+              f"{sync.stats['copied'] + sync.stats['linked']} written)")
+        return produced
+    
+    def generate_sitemap(self, page_paths, generated=None):
+        """Stream sitemap.xml (or an index plus parts) for the rendered pages
+        
+        lastmod is the date a page's source last changed hash, remembered in
+        the build manifest. generated maps collection pages to their keys.
+        Returns the outputs written.
+        """
+        print("\n🗺️  Generating sitemap...")
+        
+        settings = self.config.get('sitemap', {})
+        if not settings.get('enabled'):
+            print("   ⚠️  Sitemap generation disabled (static/sitemap.xml is published as-is)")
+            return []
+        
+        known = self.manifest.data.get('sitemap', {})
+        lastmods = {}
+        base_url = settings.get('base_url') or self.config['site']['url']
+        writer = SitemapWriter(self.output_dir, base_url, max_urls=settings.get('max_urls', MAX_URLS))
+        try:
+            for page_path in page_paths:
+                frontmatter, _ = self.parse_page(page_path)
+                options = frontmatter.get('sitemap', {})
+                if options is False or frontmatter.get('noindex'):
+                    continue
+                
+                output_file = self.output_name(page_path.name)
+                digest = self.manifest.file_hash(page_path)
+                previous = known.get(output_file)
+                lastmod = previous[1] if previous and previous[0] == digest else today()
+                lastmods[output_file] = [digest, lastmod]
+                
+                is_home = output_file == 'index.html'
+                priority = options.get('priority', frontmatter.get('priority',
+                                       1.0 if is_home else settings.get('default_priority', 0.5)))
+                writer.add('' if is_home else output_file,
+                           str(options.get('lastmod', lastmod)),
+                           options.get('changefreq', settings.get('changefreq')),
+                           priority)
+            
+            for output_file, digest in (generated or {}).items():
+                previous = known.get(output_file)
+                lastmod = previous[1] if previous and previous[0] == digest else today()
+                lastmods[output_file] = [digest, lastmod]
+                writer.add(output_file, lastmod, settings.get('changefreq'), settings.get('default_priority', 0.5))
+            produced = writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+        
+        self.manifest.data['sitemap'] = lastmods
+        for output_file in produced:
+            self.manifest.record(output_file, 'sitemap', page_paths)
+        print(f"   ✓ {writer.total} URLs in {', '.join(produced)}")
+        return produced
+    
+    def compress_outputs(self, outputs):
+        """Publish .gz/.br sidecars for text outputs, compressing only changed content
+        
+        Returns the sidecar outputs.
+        """
+        print("\n🗜️  Compressing outputs...")
+        
+        settings = self.config.get('compress', {})
+        if not settings.get('enabled'):
+            print("   ⚠️  Precompression disabled")
+            return []
+        
+        compressor = Compressor(self.cache_dir / 'compressed', settings, hasher=self.manifest.file_hash)
+        if 'br' in settings.get('formats', ['br']) and 'br' not in compressor.formats:
+            print("   ⚠️  brotli not installed, writing .gz only (pip install brotli)")
+        
+        sync = FileSync(self.config['build'].get('asset_sync', 'auto'))
+        produced = []
+        plan = compressor.compress(self.output_dir, outputs)
+        for output_file, fmt, cached, size in plan:
+            sidecar = output_file + SUFFIXES[fmt]
+            if cached.stat().st_size >= size:
+                continue  # Not worth sending compressed
+            sync.sync(cached, self.output_dir / sidecar)
+            self.manifest.record(sidecar, cached.name, [self.output_dir / output_file])
+            produced.append(sidecar)
+        compressor.prune(plan)
+        
+        stats = compressor.stats
+        self.profiler.count('compress.bytes_in', stats['bytes_in'])
+        for fmt in compressor.formats:
+            self.profiler.count(f'compress.bytes_{fmt}', stats[f'bytes_{fmt}'])
+        
+        sizes = ', '.join(f"{fmt} {stats[f'bytes_{fmt}'] / 1024:.1f} KB" for fmt in compressor.formats)
+        print(f"   ✓ {stats['files']} files, {stats['bytes_in'] / 1024:.1f} KB → {sizes} "
+              f"({stats['compressed']} compressed, {stats['cached']} from cache)")
+        return produced
+    
+    def remove_stale_outputs(self, produced):
+        """Delete outputs from earlier builds whose sources no longer exist"""
+        produced = set(produced)
+        for output_file in self.manifest.outputs():
+            if output_file in produced:
+                continue
+            stale = self.output_dir / output_file
+            if stale.is_file():
+                stale.unlink()
+                print(f"   🗑️  Removed stale {output_file}")
+            self.manifest.forget(output_file)
     
     def clean_output(self):
         """Clean the output directory"""
@@ -197,35 +1375,280 @@ class SiteBuilder:
             print(f"\n🧹 Cleaning {self.output_dir}...")
             shutil.rmtree(self.output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest.reset_outputs()
+    
+    def stale_pages(self, page_paths, extra_key=''):
+        """Pages whose inputs or referenced asset names changed since they were built"""
+        stale = []
+        for page_path in page_paths:
+            output_file = self.output_name(page_path.name)
+            # The layout recorded last time holds while the page itself is unchanged
+            entry = self.manifest.entry(output_file)
+            key = self.manifest.digest(self.page_dependencies(page_path, entry.get('template')), extra_key)
+            if not self.is_current(output_file, key):
+                stale.append(page_path)
+        return stale
+    
+    def is_current(self, output_file, key):
+        """True if a page was built from key and every asset name it used still resolves the same"""
+        entry = self.manifest.entry(output_file)
+        assets_current = all(self.assets.resolve(logical) == resolved
+                             for logical, resolved in entry.get('assets', {}).items())
+        return assets_current and self.manifest.is_fresh(output_file, key, self.output_dir / output_file)
+    
+    def build_stale_pages(self, page_paths, extra_key='', jobs=1):
+        """Render pages and record what they were built from"""
+        if not page_paths:
+            return
+        
+        # Load all data (once per build)
+        if self._data is None:
+            with self.stage('load data'):
+                self.use_data(self.load_all_data())
+        
+        with self.stage('render pages', pages=len(page_paths), jobs=jobs):
+            built = self.render_pages([page_path.name for page_path in page_paths], jobs)
+        for page_path in page_paths:
+            result = built[page_path.name]
+            if result:
+                deps = self.page_dependencies(page_path, result['template'])
+                self.manifest.record(result['output'], self.manifest.digest(deps, extra_key), deps,
+                                     self.output_dir / result['output'],
+                                     template=result['template'], assets=result['assets'])
+    
+    def collection_items(self, name, settings):
+        """Yield (item, source file) for a collection
+        
+        Items come from a list in content/data/<data>.yaml, or one YAML file per
+        item matching the source glob; those are read one at a time.
+        """
+        source = settings.get('source')
+        if source:
+            for path in sorted(self.project_root.glob(source)):
+                key = self.content_cache.key('item', self.manifest.file_hash(path))
+                item = self.content_cache.get(key)
+                if item is ContentCache.MISSING:
+                    self.profiler.count('bytes_read', path.stat().st_size)
+                    item = self.load_yaml(path.relative_to(self.project_root))
+                    self.content_cache.put(key, item)
+                yield item, path
+            return
+        
+        data_file = self.content_dir / 'data' / f"{settings.get('data', name)}.yaml"
+        if not data_file.exists():
+            raise BuildError(f"Collection {name}: data file not found: {data_file.name}")
+        _, content = self.load_data_file(data_file)
+        for item in (content.values() if isinstance(content, dict) else content or []):
+            yield item, None
+    
+    def generated_pages(self):
+        """Yield a GeneratedPage for every route of every enabled collection"""
+        for name, settings in (self.config.get('collections') or {}).items():
+            if not settings.get('enabled', True):
+                continue
+            collection = Collection(name, settings, lambda name=name, settings=settings:
+                                    self.collection_items(name, settings))
+            try:
+                yield from collection.pages()
+            except (KeyError, ValueError, IndexError) as e:
+                raise BuildError(f"Collection {name}: bad route or item ({e})") from e
     
-    def build(self, clean=True):
-        """Build the entire site"""
+    def build_collections(self, extra_key='', reserved=(), tokens=None):
+        """Render collection pages whose context, templates or assets changed
+        
+        Pages are planned, rendered and written one at a time. reserved lists
+        outputs owned by content pages. Given a tokens set, out-of-date pages
+        are only rendered into it (their selector tokens, for the CSS purge)
+        and nothing is written. Returns ({output: key}, out-of-date outputs).
+        """
+        bases = {}
+        outputs = {}
+        stale = []
+        for generated in self.generated_pages():
+            output_file = generated.output
+            if output_file in outputs or output_file in reserved:
+                raise BuildError(f"Collection page {output_file} is generated more than once")
+            
+            # Shared inputs of the template, plus everything in the page's context
+            if generated.template not in bases:
+                bases[generated.template] = self.manifest.digest(
+                    self.template_dependencies(generated.template), extra_key)
+            key = content_key(bases[generated.template], generated.key)
+            outputs[output_file] = key
+            if self.is_current(output_file, key):
+                continue
+            stale.append(output_file)
+            
+            if self._data is None:
+                with self.stage('load data'):
+                    self.use_data(self.load_all_data())
+            if tokens is not None:
+                tokens |= self.page_tokens(generated.template, generated.page, output_file)
+                continue
+            result = self.render_page(generated.template, generated.page, '', output_file, output_file)
+            deps = self.template_dependencies(generated.template)
+            if generated.source is not None:
+                deps.append(generated.source)
+            self.manifest.record(output_file, key, deps, self.output_dir / output_file,
+                                 template=result['template'], assets=result['assets'])
+            self.report('page', page=output_file, output=output_file)
+        
+        if tokens is not None:
+            print(f"   ✓ Selectors of {len(stale)} collection pages collected")
+        elif outputs:
+            print(f"   ✓ {len(stale)} collection pages built, {len(outputs) - len(stale)} unchanged")
+        return outputs, stale
+    
+    def page_tokens(self, template_name, page, label):
+        """Selector tokens of a page rendered without writing it"""
+        self._asset_usage = {}
+        self._scripts = set()
+        template = self.jinja_env.get_template(template_name)
+        collector = css_optimizer.TokenCollector()
+        with self.profiler.span(f'tokens {template_name}', cat='css', template=template_name, page=label):
+            for chunk in template.generate(page=page, content='', section=page):
+                collector.feed(str(chunk))
+            collector.close()
+        return collector.tokens
+    
+    def build(self, clean=False, jobs=1, trace=None):
+        """Build the site, re-rendering only outputs whose inputs changed
+        
+        With clean=True the output directory is wiped and everything is rebuilt.
+        jobs > 1 renders pages in that many worker processes. trace names a
+        Chrome trace-event file to write the build's timings to.
+        Returns a BuildResult.
+        """
         start_time = datetime.now()
+        self.begin_build()
         
         # Clean output directory
         if clean:
-            self.clean_output()
+            with self.stage('clean'):
+                self.clean_output()
+        else:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Load all data
-        data = self.load_all_data()
+        # Start image encoding in worker processes; it runs while pages render.
+        # Icons are small enough to downscale up front, so templates can inline them
+        with self.stage('plan images'):
+            self.images.start()
+            images_key = self.images.fingerprint() + self.icons.fingerprint()
+        
+        # Work out which pages are out of date before loading any data
+        pages_dir = self.content_dir / 'pages'
+        page_paths = sorted(pages_dir.glob('*.md'))
+        produced = [self.output_name(page_path.name) for page_path in page_paths]
+        pages = list(produced)
+        self._data = None
         
         # Build pages
         print("\n🔨 Building pages...")
-        pages_dir = self.content_dir / 'pages'
+        with self.stage('plan pages'):
+            stale_pages = self.stale_pages(page_paths, images_key)
+        self.build_stale_pages(stale_pages, images_key, jobs)
+        print(f"   ✓ {len(stale_pages)} built, {len(page_paths) - len(stale_pages)} unchanged")
+        self.profiler.count('pages.built', len(stale_pages))
+        self.profiler.count('pages.unchanged', len(page_paths) - len(stale_pages))
         
-        for page_file in pages_dir.glob('*.md'):
-            self.build_page(page_file.name, data)
+        # Item, listing and taxonomy pages from data collections are written after
+        # fingerprinting, once each; the CSS purge reads the up-to-date ones from
+        # disk and gets the selectors of the rest from renders that write nothing
+        collection_tokens = set()
+        collections = any(settings.get('enabled', True) for settings in (self.config.get('collections') or {}).values())
+        if collections and self.css_enabled and self.css_settings.get('purge'):
+            print("\n🗂️  Collecting selectors from collection pages...")
+            with self.stage('collection selectors'):
+                planned, stale = self.build_collections(images_key, reserved=pages, tokens=collection_tokens)
+            stale = set(stale)
+            pages.extend(output_file for output_file in planned if output_file not in stale)
         
         # Copy static files
-        self.copy_static_files()
+        with self.stage('copy static'):
+            produced.extend(self.copy_static_files(keep=[*self.images.generated_outputs(), *self.icons.outputs()]))
+        
+        # Publish responsive image variants
+        with self.stage('process images'):
+            produced.extend(self.process_images())
+        
+        # Publish downscaled icons
+        with self.stage('process icons'):
+            produced.extend(self.process_icons())
+        
+        # Minify and purge stylesheets against the rendered pages
+        with self.stage('optimize css'):
+            produced.extend(self.optimize_css(pages, collection_tokens))
+        
+        # Minify scripts
+        with self.stage('optimize js'):
+            produced.extend(self.optimize_js())
+        
+        # Content-hashed asset copies; pages whose asset() names changed are re-rendered
+        with self.stage('fingerprint assets'):
+            produced.extend(self.fingerprint_assets(produced))
+            relink = self.stale_pages(page_paths, images_key)
+        if relink:
+            print(f"\n🔗 Updating asset references in {len(relink)} page(s)...")
+            self.build_stale_pages(relink, images_key, jobs)
+        
+        # Collection pages, rendered against the final asset names
+        if collections:
+            print("\n🗂️  Building collection pages...")
+        with self.stage('collections'):
+            generated, written = self.build_collections(images_key, reserved=pages[:len(page_paths)])
+        produced.extend(generated)
+        self.profiler.count('collections.built', len(written))
+        self.profiler.count('collections.unchanged', len(generated) - len(written))
+        
+        # Sitemap of the pages actually rendered
+        with self.stage('sitemap'):
+            produced.extend(self.generate_sitemap(page_paths, generated))
+        
+        # Precompressed sidecars for everything text-based that was published
+        with self.stage('compress'):
+            produced.extend(self.compress_outputs(produced))
+        
+        # Drop outputs whose sources were removed and persist the caches
+        with self.stage('finalize'):
+            self.remove_stale_outputs(produced)
+            self.manifest.save()
+            self.content_cache.prune()
         
         # Build complete
         elapsed = (datetime.now() - start_time).total_seconds()
+        summary = self.write_profile(elapsed, trace, clean=clean, jobs=jobs, pages=len(page_paths),
+                                     generated=len(generated))
         
         print("\n" + "=" * 50)
         print(f"✅ Build complete in {elapsed:.2f}s")
         print(f"📂 Output: {self.output_dir}")
         print("=" * 50)
+        return BuildResult(self.output_dir, summary)
+    
+    def begin_build(self):
+        """Forget what the previous build memoized (file hashes, the template
+        graph, image and icon plans), so a long-lived builder picks up edits"""
+        self.manifest.begin_build()
+        self._template_graph = None
+        self.icons.plan = None
+        self.images.plan = None
+    
+    def write_profile(self, elapsed, trace=None, **meta):
+        """Append the build's timings to the profile log and start a fresh profile
+        
+        Returns the build summary.
+        """
+        meta['builder_version'] = BUILDER_VERSION
+        log = self.config['build'].get('profile_log', 'build-profile.jsonl')
+        if log:
+            summary = self.profiler.write_jsonl(self.project_root / log, elapsed, **meta)
+        else:
+            summary = self.profiler.summary(elapsed, **meta)
+        if trace:
+            self.profiler.write_trace(trace)
+            print(f"\n⏱️  Trace written to {trace} (open in chrome://tracing or ui.perfetto.dev)")
+        self.profiler.drain()
+        return summary
     
     def validate(self):
         """Run basic validation on output"""
@@ -286,16 +1709,54 @@ class SiteBuilder:
             print(f"⚠️  Validation error: {e}")
             return True  # Don't fail build on validation errors
 
+# Per-process state for parallel page rendering
+_worker_builder = None
+
+
+def _init_render_worker(config_path, data, root):
+    """Set up a render worker with its own builder and a single copy of the data"""
+    global _worker_builder
+    _worker_builder = SiteBuilder(config_path, quiet=True, root=root)
+    _worker_builder.use_data(data)
+    _worker_builder.profiler.drain()  # Worker start-up is not part of the page timings
+
+
+def _render_page_in_worker(page_file):
+    """Render one page inside a worker process, returning its result and profile"""
+    result = _worker_builder.build_page(page_file)
+    return result, _worker_builder.profiler.drain()
+
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description='Build the Legs on the Ground website')
-    parser.add_argument('--no-clean', action='store_true', help='Do not clean output directory')
+    parser.add_argument('--full', action='store_true', help='Clean output directory and rebuild everything')
+    parser.add_argument('--no-clean', action='store_true',
+                        help='Deprecated: builds are incremental unless --full is given')
     parser.add_argument('--validate', action='store_true', help='Run validation after build')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Render pages in N worker processes (0 = one per CPU)')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Write per-stage timings as a Chrome trace-event file')
+    parser.add_argument('--template-graph', action='store_true',
+                        help='Print the template dependency graph as JSON and exit')
     args = parser.parse_args()
     
+    if args.no_clean:
+        print("⚠️  --no-clean is deprecated and has no effect: builds are incremental unless --full is given")
+    
+    if args.template_graph:
+        builder = SiteBuilder(quiet=True)
+        graph = builder.template_graph.to_dict()
+        graph['pages'] = {name: builder.pages_affected_by(name) for name in graph['templates']}
+        builder.manifest.save()
+        print(json.dumps(graph, indent=2))
+        return
+    
     try:
         builder = SiteBuilder()
-        builder.build(clean=not args.no_clean)
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        builder.build(clean=args.full, jobs=jobs, trace=args.trace)
         
         if args.validate:
             if not builder.validate():
@@ -306,6 +1767,9 @@ def main():
     except KeyboardInterrupt:
         print("\n\n⚠️  Build cancelled by user")
         sys.exit(1)
+    except BuildError as e:
+        print(f"\n❌ Build failed: {e}")
+        sys.exit(1)
     except Exception as e:
         print(f"\n❌ Build failed: {e}")
         import traceback
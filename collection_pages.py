@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Collection pages
+Turns data collections into per-item pages, paginated listings and taxonomy
+(tag/category) pages from route patterns declared in config. Pages are yielded
+one at a time, so a build renders and writes each before the next is planned.
+"""
+
+import re
+import json
+import math
+import hashlib
+
+DEFAULTS = {
+    'enabled': True,
+    'slug': 'id',
+    'sort': None,
+    'reverse': False,
+    # Item fields listing pages get ('all' for every field); the sort and
+    # taxonomy fields are always added
+    'summary_fields': ['title', 'name', 'price', 'image'],
+}
+
+LIST_DEFAULTS = {'per_page': 12}
+
+
+def slugify(value):
+    """URL-safe slug for a term or title"""
+    slug = re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-')
+    return slug or 'item'
+
+
+def content_key(*parts):
+    """Stable hash of the JSON-serializable material a page is rendered from"""
+    text = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class GeneratedPage:
+    """One page produced by a collection route"""
+
+    __slots__ = ('output', 'template', 'page', 'key', 'source')
+
+    def __init__(self, output, template, page, key, source=None):
+        self.output = output
+        self.template = template
+        self.page = page      # Frontmatter-like context, exposed as `page` in templates
+        self.key = key        # Hash of everything the page is rendered from
+        self.source = source  # Per-item source file, if the item has its own
+
+
+class Collection:
+    """Routes for one data collection
+
+    items is a callable returning an iterable of (item, source path or None);
+    it is called once per pass, so per-file sources are read lazily.
+    """
+
+    def __init__(self, name, settings, items):
+        self.name = name
+        self.settings = {**DEFAULTS, **settings}
+        self.items = items
+        self.settings_key = content_key(name, self.settings)
+
+        fields = self.settings['summary_fields']
+        if fields == 'all':
+            self.summary_fields = None
+        else:
+            taxonomies = self.settings.get('taxonomies') or {}
+            extra = [self.settings['sort'], *(route.get('field', taxonomy) for taxonomy, route in taxonomies.items())]
+            self.summary_fields = list(dict.fromkeys(f for f in [*fields, *extra] if f))
+
+    def slug(self, item, source=None):
+        """Slug of an item: its slug field, else its source file's stem"""
+        value = item.get(self.settings['slug'])
+        if value is None and source is not None:
+            value = source.stem
+        if value is None:
+            raise ValueError(f"Collection {self.name}: item without a '{self.settings['slug']}' field")
+        return slugify(value)
+
+    def summary(self, item, slug):
+        """The part of an item that listing pages show"""
+        fields = self.summary_fields
+        summary = dict(item) if fields is None else {f: item.get(f) for f in fields if f in item}
+        summary['slug'] = slug
+        summary['url'] = self.item_url(item, slug)
+        return summary
+
+    def item_url(self, item, slug):
+        route = self.settings.get('item')
+        return route['route'].format(**{**item, 'slug': slug}) if route else None
+
+    def pages(self):
+        """Yield every GeneratedPage: items first (streamed), then listings and taxonomies"""
+        item_route = self.settings.get('item')
+        summaries = []
+        for item, source in self.items():
+            if not isinstance(item, dict):
+                raise ValueError(f"Collection {self.name}: items must be mappings, got {type(item).__name__}")
+            slug = self.slug(item, source)
+            if item_route:
+                page = {
+                    'title': item.get('title') or item.get('name') or slug,
+                    'description': item.get('description', ''),
+                    'collection': self.name,
+                    'item': {**item, 'slug': slug},
+                }
+                yield self.make_page(item_route['route'].format(**{**item, 'slug': slug}),
+                                     item_route['template'], page, source=source)
+            # Only summaries are kept; full items are dropped after their page is planned
+            summaries.append(self.summary(item, slug))
+
+        sort = self.settings['sort']
+        if sort:
+            summaries.sort(key=lambda s: (s.get(sort) is None, s.get(sort)), reverse=self.settings['reverse'])
+
+        if self.settings.get('list'):
+            yield from self.listing(self.settings['list'], summaries, self.settings.get('title', self.name))
+
+        for taxonomy, route in (self.settings.get('taxonomies') or {}).items():
+            terms = {}
+            for summary in summaries:
+                values = summary.get(route.get('field', taxonomy))
+                for value in values if isinstance(values, list) else [values]:
+                    if value not in (None, ''):
+                        terms.setdefault(slugify(value), [value, []])[1].append(summary)
+            for term, (label, members) in sorted(terms.items()):
+                yield from self.listing(route, members, label, taxonomy=taxonomy, term=term)
+
+    def listing(self, route, summaries, title, taxonomy=None, term=None):
+        """Paginated listing pages for a run of item summaries"""
+        route = {**LIST_DEFAULTS, **route}
+        per_page = route['per_page']
+        total = len(summaries)
+        count = max(1, math.ceil(total / per_page))
+
+        def url(number):
+            if number == 1:
+                return route['route'].format(page=1, term=term)
+            return route.get('paged_route', route['route']).format(page=number, term=term)
+
+        if count > 1 and url(2) == url(1):
+            raise ValueError(f"Collection {self.name}: {route['route']} needs a paged_route with {{page}}")
+
+        for number in range(1, count + 1):
+            entries = summaries[(number - 1) * per_page:number * per_page]
+            pagination = {
+                'page': number,
+                'pages': count,
+                'per_page': per_page,
+                'total': total,
+                'prev': url(number - 1) if number > 1 else None,
+                'next': url(number + 1) if number < count else None,
+            }
+            page = {
+                'title': title if number == 1 else f'{title} (page {number})',
+                'description': route.get('description', ''),
+                'collection': self.name,
+                'entries': entries,
+                'pagination': pagination,
+            }
+            if taxonomy:
+                page['taxonomy'] = taxonomy
+                page['term'] = {'slug': term, 'name': title}
+            yield self.make_page(url(number), route['template'], page)
+
+    def make_page(self, output, template, page, source=None):
+        """A GeneratedPage whose key covers its context and the collection settings"""
+        page['url'] = output
+        page['root'] = '../' * output.count('/')  # Prefix for links from nested routes
+        page['home'] = page['root'] + 'index.html'  # Shared nav anchors live on the home page
+        page.setdefault('seo', {'canonical': '/' + output})
+        return GeneratedPage(output, template, page, content_key(self.settings_key, template, page), source)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Development server with watch mode and live reload
+Keeps a SiteBuilder warm in memory, rebuilds on file changes and tells open
+browser tabs to refresh over Server-Sent Events
+"""
+
+import os
+import sys
+import time
+import threading
+import traceback
+import webbrowser
+from pathlib import Path
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from build import SiteBuilder
+
+LIVERELOAD_PATH = '/__livereload'
+
+LIVERELOAD_SCRIPT = (
+    "<script>(function () {"
+    "var es = new EventSource('" + LIVERELOAD_PATH + "');"
+    "es.onmessage = function () { location.reload(); };"
+    "})();</script>"
+)
+
+# Editor temp files and our own sync temp files should not trigger rebuilds
+IGNORED_SUFFIXES = ('~', '.swp', '.swx', '.tmp', '.sync-tmp')
+
+
+class LiveReloadHub:
+    """Broadcasts reload events to every connected browser"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.generation = 0
+
+    def notify(self):
+        """Tell all listeners that the site changed"""
+        with self._cond:
+            self.generation += 1
+            self._cond.notify_all()
+
+    def wait(self, seen, timeout):
+        """Block until the generation moves past seen or timeout expires"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.generation != seen, timeout)
+            return self.generation
+
+
+class PollingWatcher:
+    """Detect file changes by polling stat() with a short debounce"""
+
+    def __init__(self, paths, interval=0.05, debounce=0.03):
+        self.paths = [Path(p) for p in paths]
+        self.interval = interval
+        self.debounce = debounce
+
+    def snapshot(self):
+        """Map every watched file to its (mtime, size)"""
+        state = {}
+        for root in self.paths:
+            if root.is_file():
+                stat = root.stat()
+                state[str(root)] = (stat.st_mtime_ns, stat.st_size)
+                continue
+            if not root.exists():
+                continue
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+                for name in filenames:
+                    if name.startswith('.') or name.endswith(IGNORED_SUFFIXES):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def changes(self):
+        """Yield sets of changed paths, grouping bursts of edits together"""
+        previous = self.snapshot()
+        while True:
+            time.sleep(self.interval)
+            current = self.snapshot()
+            if current == previous:
+                continue
+
+            # Keep collecting until the tree has been quiet for the debounce window
+            changed = set()
+            while current != previous:
+                changed |= {p for p in current.keys() | previous.keys()
+                            if current.get(p) != previous.get(p)}
+                previous = current
+                time.sleep(self.debounce)
+                current = self.snapshot()
+            yield changed
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """Static handler that injects the live reload client into HTML pages"""
+
+    hub = None
+
+    def log_message(self, format, *args):
+        pass  # Keep the console for build output
+
+    def end_headers(self):
+        self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def do_GET(self):
+        if self.path == LIVERELOAD_PATH:
+            return self.stream_events()
+
+        path = Path(self.translate_path(self.path))
+        if path.is_dir():
+            path = path / 'index.html'
+        if path.suffix == '.html' and path.is_file():
+            return self.send_html(path)
+        return super().do_GET()
+
+    def send_html(self, path):
+        """Serve an HTML page with the reload script appended to the body"""
+        html = path.read_text(encoding='utf-8')
+        if '</body>' in html:
+            html = html.replace('</body>', LIVERELOAD_SCRIPT + '</body>', 1)
+        else:
+            html += LIVERELOAD_SCRIPT
+        body = html.encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_events(self):
+        """Hold an SSE connection open and push a message on every rebuild"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'keep-alive')
+        self.end_headers()
+
+        seen = self.hub.generation
+        try:
+            while True:
+                generation = self.hub.wait(seen, timeout=15)
+                if generation != seen:
+                    seen = generation
+                    self.wfile.write(b'data: reload\n\n')
+                else:
+                    self.wfile.write(b': keepalive\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class DevServer:
+    """Serve the output directory and rebuild in-process when sources change"""
+
+    def __init__(self, host='localhost', port=8000, interval=0.05, open_browser=False,
+                 config_path='content/config.yaml'):
+        self.host = host
+        self.port = port
+        self.open_browser = open_browser
+        self.config_path = config_path
+        self.hub = LiveReloadHub()
+        self.builder = self.new_builder()
+
+        # Settings read once per builder; a change to either starts a new one
+        self.reload_files = {str(self.builder.config_path),
+                             str(self.builder.project_root / 'site.config.yaml')}
+        watch = [self.builder.content_dir, self.builder.template_dir, self.builder.static_dir,
+                 self.builder.project_root / 'site.config.yaml']
+        self.watcher = PollingWatcher(watch, interval=interval)
+
+    def new_builder(self):
+        """Create a builder; done again only when the site or tool config changes"""
+        return SiteBuilder(self.config_path)
+
+    def start_http(self):
+        """Start the HTTP server on a background thread"""
+        class Handler(DevRequestHandler):
+            hub = self.hub
+
+        handler = partial(Handler, directory=str(self.builder.output_dir))
+        httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        return httpd
+
+    def rebuild(self, changed):
+        """Incrementally rebuild after a batch of changes"""
+        start = time.perf_counter()
+        if self.reload_files & changed:
+            self.builder = self.new_builder()
+        try:
+            self.builder.build()
+        except (Exception, SystemExit):
+            traceback.print_exc()
+            print("\n❌ Rebuild failed, waiting for the next change...")
+            return
+
+        self.hub.notify()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n🔄 Rebuilt in {elapsed:.0f} ms ({len(changed)} file(s) changed), reloading browsers")
+
+    def run(self):
+        """Build once, serve, and rebuild on every change until interrupted"""
+        self.builder.build()
+        httpd = self.start_http()
+
+        url = f"http://{self.host}:{self.port}"
+        print(f"\n📡 Serving {self.builder.output_dir} at {url}")
+        print("👀 Watching content/, templates/, static/ and site.config.yaml (Ctrl+C to stop)")
+        if self.open_browser:
+            webbrowser.open(url)
+
+        try:
+            for changed in self.watcher.changes():
+                self.rebuild(changed)
+        finally:
+            httpd.shutdown()
+
+
+def main():
+    """Run the dev server standalone"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Watch, rebuild and live-reload the site')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    try:
+        DevServer(args.host, args.port).run()
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Incremental file sync for build outputs
+Mirrors source files into an output tree, writing only the bytes that changed
+"""
+
+import os
+import shutil
+import hashlib
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# Linux ioctl that clones a file's extents (btrfs, XFS, bcachefs, ...)
+FICLONE = 0x40049409
+
+SYNC_MODES = ('auto', 'copy', 'reflink', 'link')
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class FileSync:
+    """Keep output files in step with their sources
+
+    Modes:
+        auto     reflink when the filesystem supports it, otherwise an in-kernel copy
+        copy     always write a private copy
+        reflink  same as auto (reflinks silently fall back to copying)
+        link     hard-link outputs to their sources; outputs must then never be
+                 edited in place, only replaced
+    """
+
+    def __init__(self, mode='auto', hasher=file_digest):
+        if mode not in SYNC_MODES:
+            raise ValueError(f"Unknown sync mode '{mode}' (expected one of {', '.join(SYNC_MODES)})")
+        self.mode = mode
+        self.hasher = hasher
+        self.stats = {'copied': 0, 'linked': 0, 'skipped': 0, 'removed': 0, 'bytes_written': 0}
+
+    def is_current(self, src, dest):
+        """True if dest already holds the same bytes as src"""
+        try:
+            dest_stat = os.stat(dest)
+        except FileNotFoundError:
+            return False
+        src_stat = os.stat(src)
+
+        if src_stat.st_size != dest_stat.st_size:
+            return False
+        if (src_stat.st_dev, src_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+            # Hard link to the source: current only if links are wanted
+            return self.mode == 'link'
+        if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+            return True
+
+        # Same size but different mtime: compare content, then align mtimes
+        # so the next check is a plain stat
+        if self.hasher(src) == file_digest(dest):
+            os.utime(dest, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+            return True
+        return False
+
+    def sync(self, src, dest, force=False):
+        """Bring dest up to date with src, returning True if it was rewritten
+
+        force rewrites dest without the is_current check, for callers that
+        already know its contents differ.
+        """
+        src, dest = Path(src), Path(dest)
+        if not force and self.is_current(src, dest):
+            self.stats['skipped'] += 1
+            return False
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write next to the destination and swap it in, so a hard-linked
+        # output is replaced rather than modified through the link
+        tmp = dest.with_name(f'.{dest.name}.sync-tmp')
+        if tmp.exists():
+            tmp.unlink()
+
+        try:
+            if self._transfer(src, tmp):
+                self.stats['linked'] += 1
+            else:
+                self.stats['copied'] += 1
+                self.stats['bytes_written'] += src.stat().st_size
+            os.replace(tmp, dest)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return True
+
+    def _transfer(self, src, tmp):
+        """Create tmp from src, returning True if no data had to be copied"""
+        if self.mode == 'link':
+            try:
+                os.link(src, tmp)
+                return True
+            except OSError:
+                pass  # Different filesystem or no link support
+
+        if self.mode in ('auto', 'reflink', 'link') and self._reflink(src, tmp):
+            shutil.copystat(src, tmp)
+            return True
+
+        self._copy(src, tmp)
+        shutil.copystat(src, tmp)
+        return False
+
+    def _reflink(self, src, tmp):
+        """Try a copy-on-write clone of src"""
+        if fcntl is None:
+            return False
+        try:
+            with open(src, 'rb') as fsrc, open(tmp, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return True
+        except OSError:
+            if tmp.exists():
+                tmp.unlink()
+            return False
+
+    def _copy(self, src, tmp):
+        """Copy src to tmp, in the kernel when possible"""
+        if not hasattr(os, 'copy_file_range'):
+            shutil.copyfile(src, tmp)
+            return
+
+        with open(src, 'rb') as fsrc, open(tmp, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            try:
+                while remaining > 0:
+                    sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if sent == 0:
+                        break
+                    remaining -= sent
+                return
+            except OSError:
+                pass  # Unsupported between these filesystems
+        shutil.copyfile(src, tmp)
+
+    def remove_orphans(self, dest_dir, keep):
+        """Delete files under dest_dir that are not in keep, plus emptied directories
+
+        keep is a set of paths relative to dest_dir using forward slashes.
+        Returns the removed relative paths.
+        """
+        dest_dir = Path(dest_dir)
+        if not dest_dir.exists():
+            return []
+
+        removed = []
+        for path in sorted(dest_dir.rglob('*'), reverse=True):
+            rel = path.relative_to(dest_dir).as_posix()
+            if path.is_dir():
+                if not any(path.iterdir()):
+                    path.rmdir()
+            elif rel not in keep:
+                path.unlink()
+                removed.append(rel)
+
+        self.stats['removed'] += len(removed)
+        return removed
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Fragment cache
+A Jinja `{% cache %}` tag for sections that depend only on data and config:
+
+    {% cache "services", page.services %} ... {% endcache %}
+
+The body is rendered once per unique combination of its name, its key
+arguments and the environment's fragment_cache callback (which folds in the
+data, config and templates), and the HTML is reused across pages and builds.
+"""
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+class FragmentCacheExtension(Extension):
+    """Adds {% cache name, *key %}...{% endcache %}
+
+    Rendering is delegated to environment.fragment_cache(name, key, caller);
+    without one set, the body is rendered every time.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        name = parser.parse_expression()
+        key = []
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render', [name, nodes.List(key)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, name, key, caller):
+        if self.environment.fragment_cache is None:
+            return caller()
+        return self.environment.fragment_cache(name, key, caller)
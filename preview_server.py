@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Preview server
+Serves the build output the way a CDN would: keep-alive connections,
+precompressed .br/.gz sidecars, strong ETags with 304s, immutable caching for
+fingerprinted assets, byte ranges and sendfile() responses, on asyncio
+"""
+
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import mimetypes
+from pathlib import Path
+from email.utils import formatdate
+from urllib.parse import urlsplit, unquote
+
+# Sidecar suffix per content coding, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+KEEPALIVE_TIMEOUT = 15
+MAX_HEADER_BYTES = 64 * 1024
+
+REASONS = {200: 'OK', 206: 'Partial Content', 304: 'Not Modified', 400: 'Bad Request',
+           404: 'Not Found', 405: 'Method Not Allowed', 416: 'Range Not Satisfiable'}
+
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('font/woff2', '.woff2')
+
+
+class ETagIndex:
+    """Strong validators for output files
+
+    Fingerprinted assets take their ETag from the asset manifest (the hash is
+    already in the name); other files are hashed once per size/mtime.
+    """
+
+    def __init__(self, root, manifest_name='asset-manifest.json'):
+        self.root = Path(root)
+        self.manifest_path = self.root / manifest_name
+        self.manifest_stat = None
+        self.fingerprinted = {}
+        self.hashes = {}
+
+    def refresh(self):
+        """Reload the asset manifest if a build replaced it"""
+        try:
+            stat = self.manifest_path.stat()
+        except FileNotFoundError:
+            self.fingerprinted, self.manifest_stat = {}, None
+            return
+        if (stat.st_mtime_ns, stat.st_size) == self.manifest_stat:
+            return
+        try:
+            mapping = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+        except ValueError:
+            return  # Mid-write; keep the previous mapping
+        self.fingerprinted = {hashed: hashed.rsplit('.', 2)[-2] for hashed in mapping.values()}
+        self.manifest_stat = (stat.st_mtime_ns, stat.st_size)
+
+    def is_fingerprinted(self, rel):
+        return rel in self.fingerprinted
+
+    def etag(self, rel, path, stat, coding=None):
+        """Quoted strong ETag for a file (and the coding it is served with)"""
+        tag = self.fingerprinted.get(rel)
+        if tag is None:
+            key = (str(path), stat.st_size, stat.st_mtime_ns)
+            tag = self.hashes.get(key)
+            if tag is None:
+                sha = hashlib.sha256()
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b''):
+                        sha.update(chunk)
+                tag = self.hashes[key] = sha.hexdigest()[:16]
+        return f'"{tag}-{coding}"' if coding else f'"{tag}"'
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single bytes range, None to ignore, or 'invalid'"""
+    if not header.startswith('bytes=') or ',' in header:
+        return None  # Multipart ranges are served as full responses
+    start, _, end = header[6:].strip().partition('-')
+    try:
+        if start:
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+        else:
+            length = int(end)
+            if length == 0:
+                return 'invalid'
+            start, end = max(size - length, 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return 'invalid'
+    return start, end
+
+
+class PreviewServer:
+    """Asyncio static file server for the output directory"""
+
+    def __init__(self, root, host='localhost', port=8000, log=True):
+        self.root = Path(root).resolve()
+        self.host = host
+        self.port = port
+        self.log = log
+        self.etags = ETagIndex(self.root)
+
+    def resolve(self, target):
+        """Map a request target to (relative path, file path), or None"""
+        path = unquote(urlsplit(target).path)
+        rel = os.path.normpath(path.lstrip('/')).replace(os.sep, '/')
+        if rel == '.':
+            rel = ''
+        if rel.startswith('..'):
+            return None
+        full = self.root / rel
+        if full.is_dir():
+            rel = f'{rel}/index.html'.lstrip('/')
+            full = full / 'index.html'
+        elif not full.exists() and not full.suffix:
+            # Pretty URLs: /about -> about.html
+            if full.with_suffix('.html').is_file():
+                rel, full = rel + '.html', full.with_suffix('.html')
+        return (rel, full) if full.is_file() else None
+
+    def choose_encoding(self, path, accept_encoding):
+        """(coding, sidecar path) for the best precompressed variant the client accepts"""
+        accepted = {part.split(';')[0].strip() for part in accept_encoding.lower().split(',')}
+        for coding, suffix in ENCODINGS:
+            if coding in accepted:
+                sidecar = path.with_name(path.name + suffix)
+                if sidecar.is_file():
+                    return coding, sidecar
+        return None, path
+
+    async def read_request(self, reader):
+        """(method, target, version, headers) or None when the connection closes"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEPALIVE_TIMEOUT)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            return 'bad'
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            return 'bad'
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return method, target, version, headers
+
+    async def respond(self, writer, status, headers, body=b''):
+        """Write a status line, headers and a small in-memory body"""
+        lines = [f'HTTP/1.1 {status} {REASONS[status]}', f'Date: {formatdate(usegmt=True)}',
+                 'Server: aura-preview']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    def lookup(self, target, accept_encoding):
+        """(rel, path, coding, source, stat, etag) for a request target, or None
+
+        Blocking (stat calls and, for a new file, hashing it), so it runs in a
+        worker thread rather than on the event loop.
+        """
+        self.etags.refresh()
+        resolved = self.resolve(target)
+        if resolved is None:
+            return None
+        rel, path = resolved
+        coding, source = self.choose_encoding(path, accept_encoding)
+        stat = source.stat()
+        return rel, path, coding, source, stat, self.etags.etag(rel, source, stat, coding)
+
+    async def serve_file(self, writer, method, target, headers):
+        """Send a file (or 304/206/416) and return the status code"""
+        found = await asyncio.to_thread(self.lookup, target, headers.get('accept-encoding', ''))
+        if found is None:
+            body = b'404 Not Found\n'
+            await self.respond(writer, 404, {'Content-Type': 'text/plain; charset=utf-8',
+                                             'Content-Length': len(body)}, body if method == 'GET' else b'')
+            return 404
+
+        rel, path, coding, source, stat, etag = found
+
+        content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        response = {
+            'Content-Type': content_type,
+            'ETag': etag,
+            'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+            'Cache-Control': IMMUTABLE if self.etags.is_fingerprinted(rel) else REVALIDATE,
+            'Accept-Ranges': 'bytes',
+            'Vary': 'Accept-Encoding',
+        }
+        if coding:
+            response['Content-Encoding'] = coding
+
+        if_none_match = headers.get('if-none-match')
+        if if_none_match and (if_none_match == '*' or etag in [t.strip() for t in if_none_match.split(',')]):
+            await self.respond(writer, 304, {k: response[k] for k in ('ETag', 'Cache-Control', 'Vary')})
+            return 304
+
+        status, start, length = 200, 0, stat.st_size
+        range_header = headers.get('range')
+        if range_header and headers.get('if-range', etag) == etag:
+            byte_range = parse_range(range_header, stat.st_size)
+            if byte_range == 'invalid':
+                await self.respond(writer, 416, {'Content-Range': f'bytes */{stat.st_size}', 'Content-Length': 0})
+                return 416
+            if byte_range:
+                status, start = 206, byte_range[0]
+                length = byte_range[1] - byte_range[0] + 1
+                response['Content-Range'] = f'bytes {byte_range[0]}-{byte_range[1]}/{stat.st_size}'
+
+        response['Content-Length'] = length
+        await self.respond(writer, status, response)
+        if method == 'GET' and length:
+            with open(source, 'rb') as f:
+                # Zero-copy via os.sendfile where the transport allows it
+                await asyncio.get_running_loop().sendfile(writer.transport, f, start, length)
+        return status
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection until it closes or goes idle"""
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                if request == 'bad':
+                    await self.respond(writer, 400, {'Content-Length': 0, 'Connection': 'close'})
+                    break
+
+                method, target, version, headers = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+
+                if method not in ('GET', 'HEAD'):
+                    # Any request body is left unread, so the connection cannot be reused
+                    await self.respond(writer, 405, {'Allow': 'GET, HEAD', 'Content-Length': 0,
+                                                     'Connection': 'close'})
+                    status, keep_alive = 405, False
+                else:
+                    status = await self.serve_file(writer, method, target, headers)
+
+                if self.log:
+                    print(f"   {status} {method} {target}")
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def run(self):
+        """Serve until cancelled"""
+        server = await asyncio.start_server(self.handle, self.host, self.port, limit=MAX_HEADER_BYTES)
+        async with server:
+            await server.serve_forever()
+
+    def serve_forever(self):
+        """Blocking entry point"""
+        asyncio.run(self.run())
+
+
+def main():
+    """Run the preview server standalone"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve the built site like a CDN would')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--root', default=str(Path(__file__).parent / 'docs'))
+    args = parser.parse_args()
+
+    print(f"📡 Serving {args.root} at http://{args.host}:{args.port}")
+    try:
+        PreviewServer(args.root, args.host, args.port).serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
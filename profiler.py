@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Build profiler
+Records timed spans and counters for each build stage, appends a summary per
+build to a JSON lines log and can export a Chrome trace-event file
+"""
+
+import os
+import json
+import time
+import statistics
+from pathlib import Path
+from collections import Counter
+from contextlib import contextmanager
+
+# Stages slower than the baseline by both margins are reported as regressions
+REGRESSION_RATIO = 1.2
+REGRESSION_MIN_SECONDS = 0.01
+
+
+class BuildProfiler:
+    """Collects spans (name, category, start, duration) and counters for one build"""
+
+    def __init__(self):
+        self.spans = []
+        self.counters = Counter()
+        self.pid = os.getpid()
+
+    @contextmanager
+    def span(self, name, cat='stage', **args):
+        """Time the enclosed block; yields args so callers can attach results"""
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.spans.append({
+                'name': name,
+                'cat': cat,
+                'start': start,
+                'dur': time.perf_counter() - t0,
+                'pid': self.pid,
+                'args': args,
+            })
+
+    def count(self, name, n=1):
+        """Add n to a counter (bytes read/written, cache hits/misses, ...)"""
+        if n:
+            self.counters[name] += n
+
+    def drain(self):
+        """Hand over everything recorded so far (used by worker processes)"""
+        spans, counters = self.spans, dict(self.counters)
+        self.spans, self.counters = [], Counter()
+        return spans, counters
+
+    def merge(self, spans, counters):
+        """Add spans and counters recorded in another process"""
+        self.spans.extend(spans)
+        self.counters.update(counters)
+
+    def totals(self, cat, key=None):
+        """Summed seconds per span name (or per args[key]) within a category"""
+        totals = {}
+        for span in self.spans:
+            if span['cat'] != cat:
+                continue
+            name = span['args'].get(key, span['name']) if key else span['name']
+            totals[name] = round(totals.get(name, 0.0) + span['dur'], 6)
+        return totals
+
+    def summary(self, total, **meta):
+        """One JSON-serializable record describing the build"""
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            **meta,
+            'total': round(total, 6),
+            'stages': self.totals('stage'),
+            'data': self.totals('data', 'file'),
+            'markdown': self.totals('markdown', 'page'),
+            'templates': {
+                'compile': self.totals('jinja.compile', 'template'),
+                'render': self.totals('jinja.render', 'template'),
+            },
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+    def write_jsonl(self, path, total, **meta):
+        """Append this build's summary to a JSON lines log"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = self.summary(total, **meta)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+        return record
+
+    def write_trace(self, path):
+        """Write spans as a Chrome trace-event file (chrome://tracing, Perfetto)"""
+        origin = min((s['start'] for s in self.spans), default=0)
+        events = [{
+            'name': s['name'],
+            'cat': s['cat'],
+            'ph': 'X',
+            'ts': round((s['start'] - origin) * 1e6),
+            'dur': round(s['dur'] * 1e6),
+            'pid': self.pid,
+            'tid': s['pid'],
+            'args': {k: v for k, v in s['args'].items() if isinstance(v, (str, int, float, bool))},
+        } for s in self.spans]
+        events.extend({'name': name, 'ph': 'C', 'ts': 0, 'pid': self.pid, 'args': {name: value}}
+                      for name, value in sorted(self.counters.items()))
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}), encoding='utf-8')
+
+
+def load_history(path):
+    """Build summaries from a JSON lines log, oldest first (corrupt lines skipped)"""
+    history = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    history.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return history
+
+
+def regressions(history, window=10):
+    """Compare the latest build against the median of the previous window builds
+
+    Returns (stage, latest, baseline) for every stage, slowest regression first,
+    plus the list of stages that regressed.
+    """
+    if not history:
+        return [], []
+    latest, previous = history[-1], history[-window - 1:-1]
+
+    rows, regressed = [], []
+    for stage, seconds in latest.get('stages', {}).items():
+        samples = [run['stages'][stage] for run in previous if stage in run.get('stages', {})]
+        baseline = statistics.median(samples) if samples else None
+        rows.append((stage, seconds, baseline))
+        if (baseline is not None and seconds > baseline * REGRESSION_RATIO
+                and seconds - baseline > REGRESSION_MIN_SECONDS):
+            regressed.append(stage)
+    rows.sort(key=lambda row: row[1] - (row[2] or row[1]), reverse=True)
+    return rows, regressed
+
+
+def format_report(history, window=10):
+    """Human-readable summary of the latest build and how it compares"""
+    if not history:
+        return "No profiled builds yet. Run: python build.py"
+
+    latest = history[-1]
+    rows, regressed = regressions(history, window)
+    baseline_runs = len(history[-window - 1:-1])
+
+    lines = [f"⏱️  Build at {latest['timestamp']}: {latest['total']:.3f}s "
+             f"(compared with the median of {baseline_runs} previous run(s))", ""]
+    lines.append(f"   {'Stage':<28}{'Latest':>10}{'Baseline':>10}{'Change':>9}")
+    for stage, seconds, baseline in rows:
+        if baseline is None:
+            change, base = 'new', '-'
+        else:
+            change = f"{(seconds - baseline) / baseline * 100:+.0f}%" if baseline else '-'
+            base = f"{baseline * 1000:.1f}ms"
+        marker = '⚠️ ' if stage in regressed else '  '
+        lines.append(f"{marker} {stage:<28}{seconds * 1000:>8.1f}ms{base:>10}{change:>9}")
+
+    counters = latest.get('counters', {})
+    if counters:
+        lines += ["", "   Counters:"]
+        lines += [f"     {name}: {value:,}" for name, value in counters.items()]
+
+    slowest = sorted(latest.get('templates', {}).get('render', {}).items(), key=lambda kv: -kv[1])[:5]
+    if slowest:
+        lines += ["", "   Slowest templates (render):"]
+        lines += [f"     {name}: {seconds * 1000:.1f}ms" for name, seconds in slowest]
+
+    lines.append("")
+    if regressed:
+        lines.append(f"⚠️  {len(regressed)} stage(s) regressed: {', '.join(regressed)}")
+    else:
+        lines.append("✅ No stage regressions")
+    return '\n'.join(lines)
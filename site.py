@@ -4,6 +4,8 @@ Legs on the Ground - Unified CLI
 Main command interface for all project operations
 """
 
+import io
+import os
 import sys
 import argparse
 import subprocess
@@ -11,6 +13,7 @@ from pathlib import Path
 import yaml
 import logging
 from datetime import datetime
+from contextlib import redirect_stdout
 import shutil
 
 class SiteManager:
@@ -47,22 +50,33 @@ class SiteManager:
         )
         self.logger = logging.getLogger('site')
     
-    def validate(self, fix=False):
-        """Validate project (content, images, links)"""
+    def validate(self, fix=False, budgets=True):
+        """Validate project (content, images, links and, with budgets, page weight)"""
         self.logger.info("🔍 Validating project...")
         
-        errors = []
-        warnings = []
+        from validator import SiteValidator
         
-        # Check YAML files
-        if self.config.get('validation', {}).get('check_yaml', True):
-            yaml_errors = self._validate_yaml_files()
-            errors.extend(yaml_errors)
+        settings = self.config.get('validation', {})
+        output_dir = self.root / self.config.get('build', {}).get('output_dir', 'docs')
+        validator = SiteValidator(
+            output_dir,
+            root=self.root,
+            check_yaml=settings.get('check_yaml', True),
+            check_images=settings.get('check_images', True),
+            check_links=settings.get('check_links', True),
+            workers=settings.get('workers')
+        )
+        results = validator.validate_all()
+        
+        errors = [f"{r.path}: {error}" for r in results for error in r.errors]
+        warnings = [f"{r.path}: {warning}" for r in results for warning in r.warnings]
+        
+        stats = validator.stats
+        self.logger.info(f"   {stats['files']} files ({stats['cached']} unchanged), "
+                         f"{stats['references']} references checked")
         
-        # Check images
-        if self.config.get('validation', {}).get('check_images', True):
-            image_errors = self._validate_images()
-            errors.extend(image_errors)
+        if budgets and not self.check_budgets():
+            errors.append("page-weight budgets exceeded (python site.py budget for details)")
         
         # Report results
         if errors:
@@ -79,64 +93,82 @@ class SiteManager:
         self.logger.info("✅ Validation passed")
         return True
     
-    def _validate_yaml_files(self):
-        """Validate all YAML content files"""
-        errors = []
-        content_dir = self.root / self.config.get('build', {}).get('content_dir', 'content')
-        
-        if not content_dir.exists():
-            return ["Content directory not found"]
-        
-        for yaml_file in content_dir.glob('**/*.yaml'):
-            try:
-                with open(yaml_file) as f:
-                    yaml.safe_load(f)
-            except yaml.YAMLError as e:
-                errors.append(f"Invalid YAML in {yaml_file.name}: {str(e)}")
-        
-        return errors
-    
-    def _validate_images(self):
-        """Check for missing images referenced in content"""
-        errors = []
-        # This would scan content for image references and check they exist
-        # Simplified for now
-        return errors
+    def backup_store(self):
+        """Content-addressed store holding the project backups"""
+        from backup_store import BackupStore
+        backup_loc = self.root / self.config.get('backup', {}).get('location', 'backups')
+        store = BackupStore(backup_loc, self.root)
+        imported = store.import_legacy()
+        if imported:
+            self.logger.info(f"   Moved {len(imported)} old backup folder(s) into the backup store")
+        return store
     
     def backup(self):
-        """Create backup of current state"""
+        """Create backup of current state (only changed files are stored)"""
         if not self.config.get('backup', {}).get('enabled', True):
             self.logger.info("Backup disabled in config")
             return
         
         self.logger.info("💾 Creating backup...")
         
-        backup_loc = self.root / self.config.get('backup', {}).get('location', 'backups')
-        backup_loc.mkdir(exist_ok=True)
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_name = f"backup_{timestamp}"
-        backup_path = backup_loc / backup_name
-        
         # Backup critical files
         important = ['content', 'templates', 'static', 'site.config.yaml']
-        backup_path.mkdir()
-        
-        for item in important:
-            src = self.root / item
-            if src.exists():
-                if src.is_dir():
-                    shutil.copytree(src, backup_path / item)
-                else:
-                    shutil.copy2(src, backup_path / item)
+        store = self.backup_store()
+        backup_name = store.create(important)
         
-        # Keep only last N backups
+        # Keep only last N backups (objects no snapshot uses are deleted)
         keep_last = self.config.get('backup', {}).get('keep_last', 5)
-        backups = sorted(backup_loc.glob('backup_*'))
-        for old_backup in backups[:-keep_last]:
-            shutil.rmtree(old_backup)
+        store.prune(keep_last)
+        
+        stats = store.stats
+        self.logger.info(f"✅ Backup created: {backup_name} ({stats['files']} files, "
+                         f"{stats['stored']} new, {stats['bytes_stored'] / 1024:.1f} KB stored)")
+        return backup_name
+    
+    def list_backups(self):
+        """List backups, newest first"""
+        store = self.backup_store()
+        names = store.snapshots()
+        if not names:
+            self.logger.info("No backups yet")
+            return
+        for name in reversed(names):
+            files = store.load(name)
+            size = sum(entry['size'] for entry in files.values())
+            print(f"  {name}  {len(files)} files, {size / 1024 / 1024:.1f} MB")
+    
+    def diff_backup(self, old=None, new=None):
+        """Show what changed between two backups, or between a backup and the working tree"""
+        store = self.backup_store()
+        names = store.snapshots()
+        if not names:
+            self.logger.error("❌ No backups to compare")
+            return False
+        old = old or names[-1]
+        
+        added, removed, changed = store.diff(old, new)
+        print(f"\n📋 {old} → {new or 'working tree'}")
+        for marker, paths in (('+', added), ('-', removed), ('~', changed)):
+            for path in paths:
+                print(f"  {marker} {path}")
+        print(f"\n  {len(added)} added, {len(removed)} removed, {len(changed)} changed")
+        return True
+    
+    def restore_backup(self, name=None, target=None, paths=None):
+        """Restore files from a backup (the latest by default)"""
+        store = self.backup_store()
+        names = store.snapshots()
+        if not names:
+            self.logger.error("❌ No backups to restore")
+            return False
+        name = name or names[-1]
         
-        self.logger.info(f"✅ Backup created: {backup_name}")
+        self.logger.info(f"♻️  Restoring {name}...")
+        restored = store.restore(name, target, paths)
+        for path in restored:
+            self.logger.info(f"  ✓ {path}")
+        self.logger.info(f"✅ Restored {len(restored)} file(s)")
+        return True
     
     def build(self, validate_first=True):
         """Build the site"""
@@ -146,14 +178,59 @@ class SiteManager:
         if self.config.get('backup', {}).get('auto_backup_before_build', True):
             self.backup()
         
-        # Validate first
-        if validate_first and not self.validate():
+        # Validate first (budgets are checked against the new output afterwards)
+        if validate_first and not self.validate(budgets=False):
             self.logger.error("❌ Build aborted due to validation errors")
             return False
         
-        # Run build
+        # Run build in this interpreter; build.py as a subprocess is the fallback
         start_time = datetime.now()
         
+        try:
+            import build  # The builder and its dependencies (Jinja2, Markdown, ...)
+        except ImportError as e:
+            self.logger.warning(f"⚠️  In-process build unavailable ({e}), running build.py")
+            return self._build_subprocess(start_time)
+        
+        result = self._run_builder()
+        if result is None:
+            return False
+        
+        self.logger.info(f"✅ Build completed in {result.elapsed:.2f}s "
+                         f"({result.pages_built} pages built, {result.pages_unchanged} unchanged, "
+                         f"{result.bytes_written / 1024:.1f} KB written)")
+        
+        # Track metrics
+        if self.config.get('performance', {}).get('track_build_time', True):
+            self._track_build_metrics(result.elapsed, result)
+        
+        if not self.check_budgets(record=True) and self.budget_settings().get('fail_build', True):
+            self.logger.error("❌ Build failed: page-weight budgets exceeded")
+            return False
+        
+        return result
+    
+    def _run_builder(self, trace=None):
+        """Build with an in-process SiteBuilder; returns the BuildResult, or None if it failed"""
+        from build import SiteBuilder, BuildError
+        
+        try:
+            builder = SiteBuilder(progress=self._build_progress)
+            jobs = self.config.get('build', {}).get('jobs', 1) or (os.cpu_count() or 1)
+            return builder.build(jobs=jobs, trace=trace)
+        except BuildError as e:
+            self.logger.error(f"❌ Build failed: {e}")
+            return None
+    
+    def _build_progress(self, event, **details):
+        """Log builder progress events"""
+        if event == 'stage_done':
+            self.logger.debug(f"   {details['stage']}: {details['seconds'] * 1000:.1f} ms")
+        elif event == 'page':
+            self.logger.debug(f"   {details['page']} → {details['output']}")
+    
+    def _build_subprocess(self, start_time):
+        """Build by running build.py in a separate interpreter"""
         try:
             result = subprocess.run(
                 ['python', 'build.py'],
@@ -177,8 +254,11 @@ class SiteManager:
             self.logger.error(f"❌ Build failed: {e.stderr}")
             return False
     
-    def _track_build_metrics(self, build_time):
-        """Track build performance metrics"""
+    def _track_build_metrics(self, build_time, result=None):
+        """Track build performance metrics
+        
+        In-process builds add the compressible bytes and their gzip/brotli sizes.
+        """
         metrics_file = self.root / "build_metrics.log"
         
         output_dir = self.root / self.config.get('build', {}).get('output_dir', 'docs')
@@ -186,13 +266,111 @@ class SiteManager:
         # Calculate sizes
         total_size = sum(f.stat().st_size for f in output_dir.rglob('*') if f.is_file())
         
-        metrics = f"{datetime.now().isoformat()},{build_time:.2f},{total_size}\n"
+        metrics = f"{datetime.now().isoformat()},{build_time:.2f},{total_size}"
+        if result is not None:
+            counters = result.counters
+            metrics += (f",{counters.get('compress.bytes_in', 0)},{counters.get('compress.bytes_gzip', 0)}"
+                        f",{counters.get('compress.bytes_br', 0)}")
+        metrics += "\n"
         
         with open(metrics_file, 'a') as f:
             f.write(metrics)
     
+    def budget_settings(self):
+        """performance.budgets from site.config.yaml"""
+        return self.config.get('performance', {}).get('budgets') or {}
+    
+    def budget_checker(self):
+        from budgets import BudgetChecker
+        output_dir = self.root / self.config.get('build', {}).get('output_dir', 'docs')
+        return BudgetChecker(output_dir, self.budget_settings())
+    
+    def check_budgets(self, record=False):
+        """Check rendered pages against the page-weight budgets, logging what exceeds them
+        
+        With record, the page weights are appended to the budget history.
+        """
+        import budgets
+        
+        checker = self.budget_checker()
+        if not self.budget_settings() or not checker.settings['enabled']:
+            return True
+        
+        results = checker.check()
+        oversized = checker.oversized_assets()
+        if record and checker.settings['history']:
+            budgets.record(self.root / checker.settings['history'], results)
+        
+        passed = True
+        for weight, violations in results:
+            for violation in violations:
+                self.logger.error(f"  - {weight.page}: {violation}")
+                passed = False
+        for name, size in oversized:
+            self.logger.error(f"  - {name}: {size:.1f} KB > {checker.settings['max_asset_kb']} KB asset budget")
+            passed = False
+        if passed:
+            self.logger.info(f"📏 {len(results)} page(s) within page-weight budgets")
+        return passed
+    
+    def budget(self, record=False, window=10):
+        """Report page weights, their trend over recorded builds and budget violations"""
+        import budgets
+        
+        checker = self.budget_checker()
+        history_path = self.root / (checker.settings['history'] or 'budget-history.jsonl')
+        history = budgets.load_history(history_path)
+        results = checker.check()
+        oversized = checker.oversized_assets()
+        if record:
+            budgets.record(history_path, results)
+        print(budgets.format_report(results, history, window, oversized, checker.settings['max_asset_kb']))
+        return not oversized and not any(violations for _, violations in results)
+    
+    def profile(self, run_build=False, trace=None, window=10):
+        """Summarize per-stage build timings and flag regressions against earlier runs"""
+        from profiler import load_history, format_report, regressions
+        
+        if run_build:
+            # The same in-process build as `site.py build`, with the builder's output kept quiet
+            self.logger.info("⏱️  Profiling build...")
+            with redirect_stdout(io.StringIO()) as output:
+                result = self._run_builder(trace)
+            if result is None:
+                self.logger.error(output.getvalue()[-2000:])
+                return False
+            if self.config.get('performance', {}).get('track_build_time', True):
+                self._track_build_metrics(result.elapsed, result)
+            if trace:
+                self.logger.info(f"⏱️  Trace written to {trace}")
+        
+        # The log location is a builder setting (build.profile_log in content/config.yaml)
+        with open(self.root / 'content' / 'config.yaml', encoding='utf-8') as f:
+            build_config = (yaml.safe_load(f) or {}).get('build', {})
+        log = build_config.get('profile_log') or 'build-profile.jsonl'
+        history = load_history(self.root / log)
+        print(format_report(history, window))
+        
+        _, regressed = regressions(history, window)
+        return not regressed
+    
+    def bench(self, argv):
+        """Benchmark build stages on synthetic sites and compare with the saved baseline"""
+        import bench
+        
+        parser = argparse.ArgumentParser(prog='site.py bench',
+                                         description='Benchmark build stages on synthetic sites')
+        bench.add_arguments(parser)
+        args = parser.parse_args(argv)
+        
+        self.logger.info("🏋️  Running build benchmarks...")
+        passed = bench.run_from_args(args)
+        if not passed:
+            self.logger.warning("⚠️  Benchmarks regressed against the baseline")
+        return passed
+    
     def serve(self):
-        """Start development server"""
+        """Start the preview server for the built site"""
         self.logger.info("🚀 Starting development server...")
         
         config = self.config.get('development', {}).get('server', {})
@@ -204,11 +382,11 @@ class SiteManager:
         self.logger.info(f"📡 Server running at http://{host}:{port}")
         self.logger.info("Press Ctrl+C to stop")
         
+        # Serves precompressed sidecars, ETags/304s, ranges and immutable caching like the CDN
+        from preview_server import PreviewServer
+        
         try:
-            subprocess.run([
-                'python', '-m', 'http.server', str(port),
-                '--directory', str(output_dir)
-            ])
+            PreviewServer(output_dir, host, port).serve_forever()
         except KeyboardInterrupt:
             self.logger.info("\n👋 Server stopped")
     
@@ -216,13 +394,35 @@ class SiteManager:
         """Development mode - build and serve with auto-reload"""
         self.logger.info("🔧 Starting development mode...")
         
-        # Initial build
-        self.build(validate_first=True)
+        config = self.config.get('development', {}).get('server', {})
+        
+        if not config.get('auto_reload', True):
+            # Initial build
+            self.build(validate_first=True)
+            
+            self.logger.info("💡 Tip: Edit files and run 'python site.py build' to rebuild")
+            
+            # Start server
+            self.serve()
+            return
         
-        self.logger.info("💡 Tip: Edit files and run 'python site.py build' to rebuild")
+        if not self.validate():
+            self.logger.warning("⚠️  Validation errors found, starting anyway")
+        
+        # Watch mode: one warm in-process builder, incremental rebuilds, live reload
+        from devserver import DevServer
+        
+        server = DevServer(
+            host=config.get('host', 'localhost'),
+            port=config.get('port', 8000),
+            interval=config.get('watch_interval', 0.05),
+            open_browser=config.get('open_browser', False)
+        )
         
-        # Start server
-        self.serve()
+        try:
+            server.run()
+        except KeyboardInterrupt:
+            self.logger.info("\n👋 Server stopped")
     
     def clean(self):
         """Clean build artifacts"""
@@ -312,10 +512,9 @@ class SiteManager:
                 print(f"  Size: {size:,} bytes")
         
         # Backups
-        backup_loc = self.root / self.config.get('backup', {}).get('location', 'backups')
-        if backup_loc.exists():
-            backups = list(backup_loc.glob('backup_*'))
-            print(f"\n💾 Backups: {len(backups)}")
+        backups = self.backup_store().snapshots()
+        if backups:
+            print(f"\n💾 Backups: {len(backups)} (latest {backups[-1]})")
         
         print("\n" + "="*60)
         print("✅ Status check complete")
@@ -386,11 +585,32 @@ def main():
     # Dev command
     subparsers.add_parser('dev', help='Development mode (build + serve)')
     
+    # Profile command
+    profile_parser = subparsers.add_parser('profile', help='Show per-stage build timings and regressions')
+    profile_parser.add_argument('--build', action='store_true', help='Run a build first')
+    profile_parser.add_argument('--trace', metavar='FILE', help='With --build, also write a Chrome trace file')
+    profile_parser.add_argument('--window', type=int, default=10, help='Previous runs to compare against')
+    
+    # Bench command (options are parsed by bench.py, imported only when it runs)
+    subparsers.add_parser('bench', help='Benchmark build stages on synthetic sites', add_help=False)
+    
+    # Budget command
+    budget_parser = subparsers.add_parser('budget', help='Report page weights against the performance budgets')
+    budget_parser.add_argument('--record', action='store_true', help='Append the weights to the budget history')
+    budget_parser.add_argument('--window', type=int, default=10, help='Recorded runs to show the trend over')
+    
     # Clean command
     subparsers.add_parser('clean', help='Clean build artifacts')
     
     # Backup command
-    subparsers.add_parser('backup', help='Create backup')
+    backup_parser = subparsers.add_parser('backup', help='Create, list, diff or restore backups')
+    backup_parser.add_argument('action', nargs='?', default='create',
+                               choices=['create', 'list', 'diff', 'restore'])
+    backup_parser.add_argument('names', nargs='*',
+                               help='Backup name(s): diff OLD [NEW], restore NAME')
+    backup_parser.add_argument('--target', help='Restore into this directory instead of the project')
+    backup_parser.add_argument('--path', action='append', dest='paths',
+                               help='Restore only files under this path (repeatable)')
     
     # Analyze command
     subparsers.add_parser('analyze', help='Run visual analysis')
@@ -408,7 +628,9 @@ def main():
     # Init command
     subparsers.add_parser('init-hooks', help='Initialize git hooks')
     
-    args = parser.parse_args()
+    args, extra = parser.parse_known_args()
+    if extra and args.command != 'bench':
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
     
     if not args.command:
         parser.print_help()
@@ -419,12 +641,21 @@ def main():
     
     # Execute command
     commands = {
-        'build': manager.build,
-        'validate': manager.validate,
+        'build': lambda: manager.build() or sys.exit(1),
+        'validate': lambda: manager.validate() or sys.exit(1),
         'serve': manager.serve,
         'dev': manager.dev,
+        'profile': lambda: manager.profile(args.build, args.trace, args.window) or sys.exit(1),
+        'bench': lambda: manager.bench(extra) or sys.exit(1),
+        'budget': lambda: manager.budget(args.record, args.window) or sys.exit(1),
         'clean': manager.clean,
-        'backup': manager.backup,
+        'backup': lambda: {
+            'create': manager.backup,
+            'list': manager.list_backups,
+            'diff': lambda: manager.diff_backup(*args.names[:2]),
+            'restore': lambda: manager.restore_backup(args.names[0] if args.names else None,
+                                                      args.target, args.paths),
+        }[args.action](),
         'analyze': manager.analyze,
         'optimize': manager.optimize_images,
         'cleanup': lambda: manager.cleanup(args.aggressive if hasattr(args, 'aggressive') else False),
@@ -439,7 +670,7 @@ def main():
         except KeyboardInterrupt:
             print("\n\n👋 Operation cancelled")
         except Exception as e:
-            logging.error(f"❌ Error: {str(e)}")
+            logging.exception(f"❌ Error: {str(e)}")
             sys.exit(1)
 
 
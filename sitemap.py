@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Sitemap writer
+Streams <url> entries into sitemap files, rolling over to a new file at the
+protocol's 50,000 URL limit and writing a sitemap index when there are several
+"""
+
+import os
+from pathlib import Path
+from datetime import date
+from xml.sax.saxutils import escape
+
+# Per-file limit from the sitemaps.org protocol
+MAX_URLS = 50000
+
+URLSET_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = '</urlset>\n'
+
+
+class SitemapWriter:
+    """Write sitemap.xml (or a sitemap index plus numbered parts) without holding URLs in memory
+
+    Call add() once per URL, then close() (or abort() on failure).
+    """
+
+    def __init__(self, output_dir, base_url, name='sitemap.xml', max_urls=MAX_URLS):
+        self.output_dir = Path(output_dir)
+        self.base_url = base_url.rstrip('/') + '/'
+        self.name = name
+        self.max_urls = max_urls
+        self.parts = []  # (part name, newest lastmod)
+        self.file = None
+        self.count = 0
+        self.total = 0
+
+    def part_name(self, number):
+        stem, ext = self.name.rsplit('.', 1)
+        return f'{stem}-{number}.{ext}'
+
+    def tmp_path(self, name):
+        return self.output_dir / f'.{name}.tmp'
+
+    def _open_part(self):
+        name = self.part_name(len(self.parts) + 1)
+        self.parts.append([name, None])
+        self.file = open(self.tmp_path(name), 'w', encoding='utf-8')
+        self.file.write(URLSET_OPEN)
+        self.count = 0
+
+    def _close_part(self):
+        self.file.write(URLSET_CLOSE)
+        self.file.close()
+        self.file = None
+
+    def add(self, path, lastmod=None, changefreq=None, priority=None):
+        """Add a URL (path relative to the site root)"""
+        if self.file is None or self.count >= self.max_urls:
+            if self.file is not None:
+                self._close_part()
+            self._open_part()
+
+        entry = f'  <url><loc>{escape(self.base_url + path.lstrip("/"))}</loc>'
+        if lastmod:
+            entry += f'<lastmod>{lastmod}</lastmod>'
+            part = self.parts[-1]
+            part[1] = max(part[1] or lastmod, lastmod)
+        if changefreq:
+            entry += f'<changefreq>{changefreq}</changefreq>'
+        if priority is not None:
+            entry += f'<priority>{float(priority):.1f}</priority>'
+        self.file.write(entry + '</url>\n')
+        self.count += 1
+        self.total += 1
+
+    def close(self):
+        """Publish the files and return their names; a single part becomes the sitemap itself"""
+        if self.file is None:
+            self._open_part()  # Empty but valid sitemap
+        self._close_part()
+
+        if len(self.parts) == 1:
+            os.replace(self.tmp_path(self.parts[0][0]), self.output_dir / self.name)
+            return [self.name]
+
+        written = []
+        for name, _ in self.parts:
+            os.replace(self.tmp_path(name), self.output_dir / name)
+            written.append(name)
+
+        tmp = self.tmp_path(self.name)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for name, lastmod in self.parts:
+                f.write(f'  <sitemap><loc>{escape(self.base_url + name)}</loc>'
+                        + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') + '</sitemap>\n')
+            f.write('</sitemapindex>\n')
+        os.replace(tmp, self.output_dir / self.name)
+        return [self.name, *written]
+
+    def abort(self):
+        """Discard partially written files"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        for name, _ in self.parts:
+            self.tmp_path(name).unlink(missing_ok=True)
+
+
+def today():
+    """Today's date in sitemap (W3C) format"""
+    return date.today().isoformat()
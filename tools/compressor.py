@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Precompression
+Writes maximum-compression .gz and .br sidecars for text outputs in a process
+pool, caching each result by content hash so unchanged files are compressed once
+"""
+
+import os
+import sys
+import gzip
+import hashlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Sidecar suffix per format
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+DEFAULTS = {
+    'enabled': True,
+    'formats': ['gzip', 'br'],
+    'extensions': ['html', 'css', 'js', 'json', 'xml', 'svg', 'txt', 'webmanifest', 'ico'],
+    'min_bytes': 256,
+    'workers': 0,
+}
+
+
+def available_formats(formats):
+    """Configured formats that can be produced here (brotli is optional)"""
+    return [fmt for fmt in formats if fmt in SUFFIXES and (fmt != 'br' or brotli is not None)]
+
+
+def compress_to(src, dest, fmt):
+    """Compress src into dest at the highest level (runs in a worker process)"""
+    data = Path(src).read_bytes()
+    if fmt == 'br':
+        packed = brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+    else:
+        packed = gzip.compress(data, compresslevel=9, mtime=0)  # mtime=0 keeps output reproducible
+
+    tmp = f'{dest}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(packed)
+    os.replace(tmp, dest)
+    return len(packed)
+
+
+class Compressor:
+    """Plan and produce compressed sidecars for output files"""
+
+    def __init__(self, cache_dir, settings=None, hasher=None):
+        self.cache_dir = Path(cache_dir)
+        self.settings = {**DEFAULTS, **(settings or {})}
+        self.formats = available_formats(self.settings['formats'])
+        self.hasher = hasher or (lambda path: hashlib.sha256(Path(path).read_bytes()).hexdigest())
+        self.stats = {'files': 0, 'compressed': 0, 'cached': 0, 'bytes_in': 0,
+                      **{f'bytes_{fmt}': 0 for fmt in SUFFIXES}}
+
+    def compressible(self, output_file, path):
+        """True if an output should get sidecars"""
+        ext = output_file.rsplit('.', 1)[-1].lower()
+        return (ext in self.settings['extensions'] and path.is_file()
+                and path.stat().st_size >= self.settings['min_bytes'])
+
+    def cache_path(self, digest, fmt):
+        return self.cache_dir / f'{digest[:32]}{SUFFIXES[fmt]}'
+
+    def compress(self, output_dir, outputs):
+        """Make sure every compressible output has up-to-date cached sidecars
+
+        Returns a list of (output, fmt, cached sidecar path, source size).
+        Encodes missing entries in a process pool.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        output_dir = Path(output_dir)
+
+        plan, todo, queued = [], [], set()
+        for output_file in sorted(set(outputs)):
+            path = output_dir / output_file
+            if not self.compressible(output_file, path):
+                continue
+            self.stats['files'] += 1
+            digest = self.hasher(path)
+            for fmt in self.formats:
+                cached = self.cache_path(digest, fmt)
+                plan.append((output_file, fmt, cached, path.stat().st_size))
+                if cached.exists():
+                    self.stats['cached'] += 1
+                elif cached not in queued:  # Identical files share one encode
+                    queued.add(cached)
+                    todo.append((path, cached, fmt))
+
+        workers = min(self.settings['workers'] or os.cpu_count() or 1, len(todo))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(compress_to, *zip(*todo)))
+        else:
+            for src, dest, fmt in todo:
+                compress_to(src, dest, fmt)
+        self.stats['compressed'] += len(todo)
+
+        for output_file, fmt, cached, size in plan:
+            if fmt == self.formats[0]:
+                self.stats['bytes_in'] += size
+            self.stats[f'bytes_{fmt}'] += min(cached.stat().st_size, size)
+        return plan
+
+    def prune(self, plan):
+        """Delete cached sidecars that no current output uses"""
+        live = {cached.name for _, _, cached, _ in plan}
+        for path in self.cache_dir.iterdir():
+            if path.name not in live:
+                path.unlink()
+
+
+def main():
+    """Report how well the current output compresses"""
+    root = Path(__file__).resolve().parent.parent
+    output_dir = root / 'docs'
+    compressor = Compressor(root / '.build-cache' / 'compressed')
+    outputs = [p.relative_to(output_dir).as_posix() for p in output_dir.rglob('*') if p.is_file()]
+    compressor.compress(output_dir, outputs)
+
+    stats = compressor.stats
+    print(f"🗜️  {stats['files']} compressible files, {stats['bytes_in'] / 1024:.1f} KB")
+    for fmt in compressor.formats:
+        print(f"   ✓ {fmt}: {stats[f'bytes_{fmt}'] / 1024:.1f} KB")
+    if brotli is None:
+        print("   ⚠️  brotli not installed, .br sidecars skipped (pip install brotli)")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
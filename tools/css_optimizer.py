@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+CSS optimizer
+Minifies stylesheets, drops rules whose selectors no page uses and extracts
+the above-the-fold rules that get inlined into each page
+"""
+
+import re
+import sys
+import fnmatch
+from pathlib import Path
+from html.parser import HTMLParser
+
+# Class and id references in a selector
+SELECTOR_TOKEN = re.compile(r'([.#])(-?[_a-zA-Z][\w-]*)')
+
+# Words inside JS string literals, used to keep classes toggled at runtime
+JS_STRING = re.compile(r'''(['"`])((?:\\.|(?!\1).)*)\1''', re.S)
+WORD = re.compile(r'-?[_a-zA-Z][\w-]*')
+
+# At-rules whose blocks hold further rules rather than declarations
+NESTED_AT_RULES = ('@media', '@supports', '@layer', '@container', '@document')
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+                 'meta', 'param', 'source', 'track', 'wbr'}
+
+
+def minify(css):
+    """Strip comments and redundant whitespace, leaving strings untouched"""
+    out = []
+    i, n = 0, len(css)
+    pending_space = False
+    while i < n:
+        ch = css[i]
+        if ch in '"\'':
+            end = i + 1
+            while end < n and css[end] != ch:
+                end += 2 if css[end] == '\\' else 1
+            if pending_space and out and out[-1][-1] not in '{};,>:(':
+                out.append(' ')
+            pending_space = False
+            out.append(css[i:end + 1])
+            i = end + 1
+        elif css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif ch.isspace():
+            pending_space = True
+            i += 1
+        else:
+            if pending_space and out and out[-1][-1] not in '{};,>:(' and ch not in '{};,>)':
+                out.append(' ')
+            pending_space = False
+            if ch == '}' and out and out[-1] == ';':
+                out.pop()
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def _skip_string(css, i):
+    """Index just past the string starting at i"""
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+
+def _find_block_end(css, i):
+    """Index of the '}' closing the block whose body starts at i"""
+    depth = 1
+    while i < len(css):
+        ch = css[i]
+        if ch in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(css)
+
+
+def parse(css, i=0):
+    """Parse minified CSS into a list of nodes
+
+    Nodes are ('rule', selector, body), ('block', prelude, children) for
+    nesting at-rules and ('at', prelude, body_or_None) for everything else.
+    Returns (nodes, index after the enclosing '}').
+    """
+    nodes = []
+    n = len(css)
+    while i < n:
+        if css[i] == '}':
+            return nodes, i + 1
+
+        # Read the prelude up to '{' or ';'
+        start = i
+        parens = 0
+        while i < n:
+            ch = css[i]
+            if ch in '"\'':
+                i = _skip_string(css, i)
+                continue
+            if ch == '(':
+                parens += 1
+            elif ch == ')':
+                parens -= 1
+            elif parens == 0 and ch in '{;}':
+                break
+            i += 1
+        prelude = css[start:i].strip()
+
+        if i >= n or css[i] in ';}':
+            if prelude:
+                nodes.append(('at', prelude, None))
+            if i < n and css[i] == ';':
+                i += 1
+            continue
+
+        # css[i] == '{'
+        if prelude.startswith(NESTED_AT_RULES):
+            children, i = parse(css, i + 1)
+            nodes.append(('block', prelude, children))
+        else:
+            end = _find_block_end(css, i + 1)
+            body = css[i + 1:end]
+            kind = 'at' if prelude.startswith('@') else 'rule'
+            nodes.append((kind, prelude, body))
+            i = end + 1
+    return nodes, i
+
+
+def serialize(nodes):
+    """Turn parsed nodes back into minified CSS"""
+    out = []
+    for kind, prelude, body in nodes:
+        if kind == 'block':
+            inner = serialize(body)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif body is None:
+            out.append(f'{prelude};')
+        else:
+            out.append(f'{prelude}{{{body}}}')
+    return ''.join(out)
+
+
+def split_selectors(selector):
+    """Split a selector list on top-level commas"""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(selector):
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(selector[start:i])
+            start = i + 1
+    parts.append(selector[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def selector_matches(selector, tokens, keep=()):
+    """True if every class and id in the selector appears in tokens
+
+    Tag, attribute and pseudo parts are ignored, so the check errs on the
+    side of keeping rules.
+    """
+    if '\\' in selector or any(fnmatch.fnmatch(selector, pattern) for pattern in keep):
+        return True
+    # Arguments of :not(), :is() etc. and attribute selectors don't require presence
+    stripped = re.sub(r'\[[^\]]*\]', '', selector)
+    while True:
+        reduced = re.sub(r'\([^()]*\)', '', stripped)
+        if reduced == stripped:
+            break
+        stripped = reduced
+    return all(kind + name in tokens for kind, name in SELECTOR_TOKEN.findall(stripped))
+
+
+def filter_rules(nodes, tokens, keep=(), keep_at_rules=True):
+    """Nodes with unused selectors removed
+
+    keep_at_rules=False also drops @keyframes/@font-face style blocks, which
+    is what the critical subset wants.
+    """
+    result = []
+    for kind, prelude, body in nodes:
+        if kind == 'block':
+            children = filter_rules(body, tokens, keep, keep_at_rules)
+            if children:
+                result.append((kind, prelude, children))
+        elif kind == 'rule':
+            used = [s for s in split_selectors(prelude) if selector_matches(s, tokens, keep)]
+            if used:
+                result.append((kind, ','.join(used), body))
+        elif keep_at_rules or body is None:
+            result.append((kind, prelude, body))
+    return result
+
+
+class TokenCollector(HTMLParser):
+    """Collect tag names, .classes and #ids from HTML, optionally only inside root elements"""
+
+    def __init__(self, roots=None):
+        super().__init__(convert_charrefs=True)
+        self.roots = roots
+        self.tokens = set()
+        self.depth = 0  # > 0 while inside a root element
+
+    def matches_root(self, tag, classes, element_id):
+        for root in self.roots:
+            if root.startswith('.'):
+                if root[1:] in classes:
+                    return True
+            elif root.startswith('#'):
+                if root[1:] == element_id:
+                    return True
+            elif root == tag:
+                return True
+        return False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        element_id = attrs.get('id')
+
+        inside = self.roots is None or self.depth > 0
+        if not inside and self.matches_root(tag, classes, element_id):
+            inside = True
+            if tag not in VOID_ELEMENTS:
+                self.depth = 1
+        elif self.depth > 0 and tag not in VOID_ELEMENTS:
+            self.depth += 1
+
+        if inside:
+            self.tokens.add(tag)
+            self.tokens.update('.' + c for c in classes)
+            if element_id:
+                self.tokens.add('#' + element_id)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if self.depth > 0 and tag not in VOID_ELEMENTS:
+            self.depth -= 1
+
+    def handle_endtag(self, tag):
+        if self.depth > 0 and tag not in VOID_ELEMENTS:
+            self.depth -= 1
+
+
+def html_tokens(html, roots=None):
+    """Selector tokens used by a page (or by its root elements only)"""
+    collector = TokenCollector(roots)
+    collector.feed(html)
+    collector.close()
+    return collector.tokens
+
+
+def js_tokens(js):
+    """Possible class and id names mentioned in JS string literals"""
+    tokens = set()
+    for _, literal in JS_STRING.findall(js):
+        for word in WORD.findall(literal):
+            tokens.update(('.' + word, '#' + word))
+    return tokens
+
+
+def inline_critical(html, href, critical_css):
+    """Inline critical CSS and load the full stylesheet without blocking render"""
+    href_pattern = re.escape(href)
+    stylesheet = re.compile(
+        r'<link\b(?=[^>]*\brel=["\']stylesheet["\'])(?=[^>]*\bhref=["\']' + href_pattern + r'["\'])[^>]*>'
+    )
+    preload = re.compile(
+        r'[ \t]*<link\b(?=[^>]*\brel=["\']preload["\'])(?=[^>]*\bhref=["\']' + href_pattern + r'["\'])[^>]*>\n?'
+    )
+    if not stylesheet.search(html):
+        return html
+
+    replacement = (
+        f'<style data-critical>{critical_css}</style>\n'
+        f'    <link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        f'    <noscript><link rel="stylesheet" href="{href}"></noscript>'
+    )
+    html = preload.sub('', html)
+    return stylesheet.sub(lambda _: replacement, html, count=1)
+
+
+class CSSOptimizer:
+    """Minify, purge and split a stylesheet"""
+
+    def __init__(self, css, keep_selectors=()):
+        self.nodes, _ = parse(minify(css))
+        self.keep = list(keep_selectors)
+
+    def minified(self):
+        """The whole stylesheet, minified"""
+        return serialize(self.nodes)
+
+    def purged(self, tokens):
+        """Minified stylesheet without rules that no token set uses"""
+        return serialize(filter_rules(self.nodes, tokens, self.keep))
+
+    def critical(self, tokens):
+        """Rules needed to render the elements described by tokens"""
+        return serialize(filter_rules(self.nodes, tokens, self.keep, keep_at_rules=False))
+
+
+def main():
+    """Report what the optimizer would do for static/css/styles.css and docs/*.html"""
+    root = Path(__file__).resolve().parent.parent
+    css_path = root / 'static' / 'css' / 'styles.css'
+    css = css_path.read_text(encoding='utf-8')
+    optimizer = CSSOptimizer(css)
+
+    tokens = set()
+    for page in (root / 'docs').glob('*.html'):
+        tokens |= html_tokens(page.read_text(encoding='utf-8'))
+    for script in (root / 'static' / 'js').glob('*.js'):
+        tokens |= js_tokens(script.read_text(encoding='utf-8'))
+
+    print(f"📄 {css_path.name}: {len(css):,} bytes")
+    print(f"   ✓ Minified: {len(optimizer.minified()):,} bytes")
+    print(f"   ✓ Purged:   {len(optimizer.purged(tokens)):,} bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+HTML minifier
+Collapses whitespace, drops comments and redundant attribute quotes in
+rendered pages, leaving <pre>, <textarea>, <script> (JSON-LD included) and
+<style> contents exactly as rendered
+"""
+
+import re
+import sys
+import fnmatch
+from pathlib import Path
+
+# Comments, verbatim elements, tags and doctypes; everything between them is text
+TOKEN = re.compile(r'''
+    (?P<comment><!--.*?-->)
+  | (?P<raw><(?P<rawtag>pre|textarea|script|style)\b(?:"[^"]*"|'[^']*'|[^'">])*>.*?</(?P=rawtag)\s*>)
+  | (?P<tag></?[a-zA-Z][^\s/>]*(?:"[^"]*"|'[^']*'|[^'">])*>)
+  | (?P<decl><![^>]*>)
+''', re.S | re.I | re.X)
+
+START_TAG = re.compile(r'''<(?:"[^"]*"|'[^']*'|[^'">])*>''')
+TAG = re.compile(r'<(/?)([a-zA-Z][^\s/>]*)(.*?)(/?)>$', re.S)
+ATTRS = re.compile(r'''(?:\s+[^\s"'>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'=<>`]+))?)*\s*''')
+ATTR = re.compile(r'''([^\s"'>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'=<>`]+))?''')
+
+# Attribute values that are valid without quotes
+UNQUOTED = re.compile(r'''[^\s"'=<>`]+''')
+
+# HTML whitespace (not \s, which would also eat non-breaking spaces)
+WHITESPACE = re.compile(r'[ \t\n\r\f]+')
+
+# Elements whose surrounding whitespace never renders
+BLOCK_ELEMENTS = {
+    'address', 'article', 'aside', 'blockquote', 'body', 'br', 'caption', 'col', 'colgroup',
+    'dd', 'details', 'dialog', 'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer',
+    'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'head', 'header', 'hgroup', 'hr', 'html', 'li',
+    'link', 'main', 'meta', 'nav', 'noscript', 'ol', 'optgroup', 'option', 'p', 'pre', 'section',
+    'summary', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'title', 'tr', 'ul', '!doctype',
+}
+
+# Elements whose contents are kept verbatim (a start tag of one waits for its end tag)
+RAW_ELEMENTS = {'pre', 'textarea', 'script', 'style'}
+
+# Text buffered before minify_stream looks for a point to flush at
+STREAM_CHUNK = 64 * 1024
+
+DEFAULTS = {
+    'remove_comments': True,
+    'remove_attribute_quotes': True,
+    'keep_comments': [],  # fnmatch patterns of comment text to keep
+}
+
+
+def minify_tag(tag, remove_quotes=True):
+    """A start or end tag with single spaces between attributes and, optionally, unquoted values"""
+    match = TAG.match(tag)
+    if not match or not ATTRS.fullmatch(match.group(3)):
+        return tag  # Not something we understand; leave it alone
+    closing, name, attrs, self_closing = match.groups()
+
+    parts = ATTR.findall(attrs)
+    out = [f'<{closing}{name}']
+    for i, (attr, value) in enumerate(parts):
+        if value and remove_quotes and value[0] in '"\'':
+            inner = value[1:-1]
+            # A trailing slash would read as part of the last unquoted value
+            if UNQUOTED.fullmatch(inner) and not (self_closing and i == len(parts) - 1):
+                value = inner
+        out.append(f' {attr}={value}' if value else f' {attr}')
+    return ''.join(out) + f'{self_closing}>'
+
+
+def tokens(html, settings):
+    """(kind, element name, text) for each piece of a page, with dropped comments removed"""
+    keep = settings['keep_comments']
+    pieces = []
+    pos = 0
+
+    def add_text(text):
+        if pieces and pieces[-1][0] == 'text':
+            pieces[-1] = ('text', None, pieces[-1][2] + text)
+        elif text:
+            pieces.append(('text', None, text))
+
+    for match in TOKEN.finditer(html):
+        add_text(html[pos:match.start()])
+        pos = match.end()
+        text = match.group()
+        if match.group('comment'):
+            body = text[4:-3]
+            conditional = body.startswith('[if') or body.startswith('<![endif]')
+            if settings['remove_comments'] and not conditional and not any(
+                    fnmatch.fnmatch(body.strip(), pattern) for pattern in keep):
+                continue
+            pieces.append(('comment', None, text))
+        elif match.group('raw'):
+            pieces.append(('raw', match.group('rawtag').lower(), text))
+        elif match.group('tag'):
+            name = TAG.match(text)
+            pieces.append(('tag', name.group(2).lower() if name else None, text))
+        else:
+            pieces.append(('decl', '!doctype', text))
+    add_text(html[pos:])
+    return pieces
+
+
+def is_block(piece):
+    return piece is None or (piece[0] != 'text' and piece[1] in BLOCK_ELEMENTS)
+
+
+def minify_pieces(pieces, settings, before=None):
+    """Minified text of a run of pieces; before is the piece preceding the run"""
+    out = []
+    for i, (kind, name, text) in enumerate(pieces):
+        if kind == 'text':
+            text = WHITESPACE.sub(' ', text)
+            if is_block(pieces[i - 1] if i else before):
+                text = text.lstrip(' ')
+            if is_block(pieces[i + 1] if i + 1 < len(pieces) else None):
+                text = text.rstrip(' ')
+        elif kind == 'tag':
+            text = minify_tag(text, settings['remove_attribute_quotes'])
+        elif kind == 'raw':
+            # Contents are verbatim; only the start tag is compacted
+            start = START_TAG.match(text).group()
+            text = minify_tag(start, settings['remove_attribute_quotes']) + text[len(start):]
+        out.append(text)
+    return ''.join(out)
+
+
+def minify(html, **settings):
+    """Minified HTML"""
+    settings = {**DEFAULTS, **settings}
+    return minify_pieces(tokens(html, settings), settings)
+
+
+def safe_end(html):
+    """End of the last token in html that more input could not change
+
+    Text and a trailing partial tag could still grow, and so could a start
+    tag whose verbatim element or an unterminated comment is not yet closed.
+    Comments are never ended at: text on both sides of a dropped one merges.
+    """
+    end = 0
+    for match in TOKEN.finditer(html):
+        text = match.group()
+        if match.group('comment'):
+            continue
+        if match.group('tag'):
+            name = TAG.match(text)
+            if name and not name.group(1) and name.group(2).lower() in RAW_ELEMENTS:
+                break
+        elif match.group('decl') and text.startswith('<!--'):
+            break
+        end = match.end()
+    return end
+
+
+def minify_stream(chunks, **settings):
+    """Minify HTML arriving in chunks, yielding output as it becomes final
+
+    The output is identical to minify() on the joined chunks; only the text
+    after the last complete token is held back.
+    """
+    settings = {**DEFAULTS, **settings}
+    buffer = ''
+    before = None  # Last piece already written, for whitespace around block elements
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) < STREAM_CHUNK:
+            continue
+        end = safe_end(buffer)
+        if not end:
+            continue
+        pieces = tokens(buffer[:end], settings)
+        if pieces:
+            yield minify_pieces(pieces, settings, before)
+            before = pieces[-1]
+        buffer = buffer[end:]
+    yield minify_pieces(tokens(buffer, settings), settings, before)
+
+
+def main():
+    """Report what minification saves on the built pages"""
+    root = Path(__file__).resolve().parent.parent
+    total_in = total_out = 0
+    for page in sorted((root / 'docs').glob('**/*.html')):
+        html = page.read_text(encoding='utf-8')
+        size_in, size_out = len(html.encode('utf-8')), len(minify(html).encode('utf-8'))
+        total_in, total_out = total_in + size_in, total_out + size_out
+        print(f"   ✓ {page.relative_to(root / 'docs')}: {size_in:,} → {size_out:,} bytes")
+    print(f"📄 {total_in:,} → {total_out:,} bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Icon pipeline
+Downscales icon images to the size they are rendered at, publishes them in
+place of the full-size sources and lets templates inline small ones as data
+URIs. Each downscaled icon is cached by source hash, so it is encoded once
+"""
+
+import sys
+import json
+import base64
+import fnmatch
+import hashlib
+from pathlib import Path
+
+import yaml
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+DEFAULTS = {
+    'enabled': True,
+    'sources': ['images/icons/*.png'],  # Icon images, relative to static/
+    'size': 64,                 # Largest size icons are rendered at, in CSS pixels
+    'density': 2,               # Pixel density encoded for (2 = sharp on HiDPI screens)
+    'colors': 256,              # Palette size (0 keeps full RGBA)
+    'inline_max_bytes': 4096,   # Icons up to this size are inlined as data URIs
+}
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def encode_icon(src, dest, pixels, colors):
+    """Downscale src to fit a pixels-sized square and save it as an optimized PNG"""
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ('RGBA', 'RGB', 'LA', 'L'):
+            im = im.convert('RGBA')
+        if max(im.size) > pixels:
+            im.thumbnail((pixels, pixels), Image.LANCZOS)
+        if colors:
+            im = im.quantize(colors, method=Image.Quantize.FASTOCTREE)
+
+        dest = Path(dest)
+        tmp = dest.with_name(dest.name + '.tmp')
+        im.save(tmp, format='PNG', optimize=True)
+        tmp.replace(dest)
+        return im.size
+
+
+class IconOptimizer:
+    """Plan, encode and publish downscaled icons"""
+
+    def __init__(self, static_dir, cache_dir, settings=None, hasher=file_digest):
+        self.static_dir = Path(static_dir)
+        self.cache_dir = Path(cache_dir)
+        self.settings = {**DEFAULTS, **(settings or {})}
+        self.hasher = hasher
+        self.enabled = bool(self.settings['enabled']) and Image is not None
+
+        self.index_path = self.cache_dir / 'index.json'
+        self.plan = None
+        self.resolve = lambda path: path  # Maps output paths to published (e.g. fingerprinted) URLs
+        self._data_uris = {}
+        self.stats = {'sources': 0, 'encoded': 0, 'cached': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    @classmethod
+    def from_config(cls, config_path, static_dir, cache_dir, hasher=file_digest):
+        """Build an optimizer from tools.icon_optimizer in site.config.yaml"""
+        settings = {}
+        config_path = Path(config_path)
+        if config_path.exists():
+            with open(config_path, encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+            settings = config.get('tools', {}).get('icon_optimizer', {}) or {}
+        return cls(static_dir, cache_dir, settings, hasher)
+
+    def is_icon(self, rel):
+        """True if a path under static/ is an icon"""
+        return self.enabled and any(fnmatch.fnmatch(rel, pattern) for pattern in self.settings['sources'])
+
+    def sources(self):
+        """Static images handled as icons"""
+        images_dir = self.static_dir / 'images'
+        if not images_dir.exists():
+            return
+        for path in sorted(images_dir.rglob('*')):
+            if path.is_file() and self.is_icon(path.relative_to(self.static_dir).as_posix()):
+                yield path
+
+    def build_plan(self):
+        """Encode missing icons into the cache, mapping output path -> icon details"""
+        self.plan = {}
+        self._data_uris = {}
+        self.stats = dict.fromkeys(self.stats, 0)
+        if not self.enabled:
+            return self.plan
+
+        pixels = self.settings['size'] * self.settings['density']
+        colors = self.settings['colors']
+        try:
+            index = json.loads(self.index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            index = {}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.sources():
+            output = path.relative_to(self.static_dir).as_posix()
+            digest = self.hasher(path)
+            cache = self.cache_dir / f'{digest[:20]}_{pixels}px_c{colors}.png'
+            if cache.exists() and cache.name in index:
+                self.stats['cached'] += 1
+            else:
+                index[cache.name] = list(encode_icon(path, cache, pixels, colors))
+                self.stats['encoded'] += 1
+            width, height = index[cache.name]
+            self.plan[output] = {
+                'source': output,
+                'cache': str(cache),
+                # Rendered size in CSS pixels
+                'width': round(width / self.settings['density']),
+                'height': round(height / self.settings['density']),
+                'bytes': cache.stat().st_size,
+            }
+            self.stats['sources'] += 1
+            self.stats['bytes_in'] += path.stat().st_size
+            self.stats['bytes_out'] += self.plan[output]['bytes']
+
+        if self.stats['encoded']:
+            tmp = self.index_path.with_name(self.index_path.name + '.tmp')
+            tmp.write_text(json.dumps(index, sort_keys=True), encoding='utf-8')
+            tmp.replace(self.index_path)
+        return self.plan
+
+    def outputs(self):
+        """Output paths (relative to the output dir) written by this stage"""
+        if self.plan is None:
+            self.build_plan()
+        return list(self.plan)
+
+    def finish(self, output_dir, sync):
+        """Publish the downscaled icons with a FileSync"""
+        return [output for output in self.outputs()
+                if sync.sync(self.plan[output]['cache'], Path(output_dir) / output)]
+
+    def fingerprint(self):
+        """Hash of the icon plan, so pages using icon() rebuild when it changes"""
+        if self.plan is None:
+            self.build_plan()
+        listing = sorted((output, Path(v['cache']).name) for output, v in self.plan.items())
+        return hashlib.sha256(json.dumps(listing).encode('utf-8')).hexdigest()
+
+    def data_uri(self, output):
+        """base64 data URI of a downscaled icon"""
+        if output not in self._data_uris:
+            data = Path(self.plan[output]['cache']).read_bytes()
+            self._data_uris[output] = 'data:image/png;base64,' + base64.b64encode(data).decode('ascii')
+        return self._data_uris[output]
+
+    def icon(self, src, alt='', size=None, class_=None):
+        """<img> for an icon: inlined when small, else the downscaled file
+
+        size is the rendered width in CSS pixels (defaults to the configured size).
+        """
+        if self.plan is None:
+            self.build_plan()
+        src = src.lstrip('/')
+        attrs = f' alt="{escape(alt)}"'
+        if class_:
+            attrs += f' class="{escape(class_)}"'
+
+        variant = self.plan.get(src)
+        if variant is None:
+            if size:
+                attrs += f' width="{size}" height="{size}"'
+            return Markup(f'<img src="{escape(self.resolve(src))}"{attrs} loading="lazy" decoding="async">')
+
+        width, height = variant['width'], variant['height']
+        if size:
+            width, height = size, round(height * size / width)
+        attrs += f' width="{width}" height="{height}"'
+        if variant['bytes'] <= self.settings['inline_max_bytes']:
+            return Markup(f'<img src="{self.data_uri(src)}"{attrs}>')
+        return Markup(f'<img src="{escape(self.resolve(src))}"{attrs} loading="lazy" decoding="async">')
+
+
+def main():
+    """Downscale every icon into the cache and report"""
+    root = Path(__file__).resolve().parent.parent
+
+    if Image is None:
+        print("❌ Pillow is not installed. Install: pip install Pillow")
+        sys.exit(1)
+
+    optimizer = IconOptimizer.from_config(root / 'site.config.yaml', root / 'static',
+                                          root / '.build-cache' / 'icons')
+    print("🧩 Downscaling icons...")
+    optimizer.build_plan()
+
+    for output, variant in sorted(optimizer.plan.items()):
+        inline = ' (inlined)' if variant['bytes'] <= optimizer.settings['inline_max_bytes'] else ''
+        print(f"   ✓ {output}: {variant['width']}×{variant['height']}, {variant['bytes']:,} bytes{inline}")
+    stats = optimizer.stats
+    print(f"   ✓ {stats['sources']} icons, {stats['bytes_in'] / 1024:.1f} KB → {stats['bytes_out'] / 1024:.1f} KB "
+          f"({stats['encoded']} encoded, {stats['cached']} already cached)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Responsive image pipeline
+Generates resized and re-encoded variants of static images with Pillow in a
+process pool, caching each derivative by source hash so it is encoded once
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+SOURCE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+
+# Formats that are added alongside the source format rather than replacing it
+MODERN_FORMATS = ('webp', 'avif')
+
+MIME_TYPES = {'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'png': 'image/png',
+              'webp': 'image/webp', 'avif': 'image/avif'}
+
+# Hand-made or generated width variants look like name_400w.jpg
+VARIANT_PATTERN = re.compile(r'_\d+w$')
+
+DEFAULTS = {
+    'enabled': True,
+    'quality': 85,
+    'formats': ['webp', 'jpg'],
+    'max_width': 2000,
+    'widths': [400, 800, 1200],
+    'exclude': [],
+    'workers': 0,
+}
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def encode_variant(src, dest, width, fmt, quality):
+    """Resize src to width and save it as fmt (runs in a worker process)"""
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.width > width:
+            height = round(im.height * width / im.width)
+            im = im.resize((width, height), Image.LANCZOS)
+
+        options = {'optimize': True}
+        if fmt in ('jpg', 'jpeg'):
+            if im.mode not in ('RGB', 'L'):
+                im = im.convert('RGB')
+            options.update(quality=quality, progressive=True)
+        elif fmt == 'webp':
+            options.update(quality=quality, method=6)
+        elif fmt == 'avif':
+            options.update(quality=quality)
+
+        tmp = f'{dest}.{os.getpid()}.tmp'
+        im.save(tmp, format='JPEG' if fmt in ('jpg', 'jpeg') else fmt.upper(), **options)
+        os.replace(tmp, dest)
+    return os.path.getsize(dest)
+
+
+class ImageOptimizer:
+    """Plan, encode and publish responsive variants of static images"""
+
+    def __init__(self, static_dir, cache_dir, settings=None, hasher=file_digest):
+        self.static_dir = Path(static_dir)
+        self.cache_dir = Path(cache_dir)
+        self.settings = {**DEFAULTS, **(settings or {})}
+        self.hasher = hasher
+        self.enabled = bool(self.settings['enabled']) and Image is not None
+
+        self.index_path = self.cache_dir / 'index.json'
+        self.index = self.load_index()
+        self.plan = None
+        self.resolve = lambda path: path  # Maps output paths to published (e.g. fingerprinted) URLs
+        self.futures = []
+        self.pool = None
+        self.stats = {'sources': 0, 'variants': 0, 'encoded': 0, 'cached': 0, 'bytes_encoded': 0}
+
+    @classmethod
+    def from_config(cls, config_path, static_dir, cache_dir, hasher=file_digest):
+        """Build an optimizer from tools.image_optimizer in site.config.yaml"""
+        settings = {}
+        config_path = Path(config_path)
+        if config_path.exists():
+            with open(config_path, encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+            settings = config.get('tools', {}).get('image_optimizer', {}) or {}
+        return cls(static_dir, cache_dir, settings, hasher)
+
+    def load_index(self):
+        """Known image dimensions, keyed by source hash"""
+        try:
+            return json.loads(self.index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        """Persist the dimensions index"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path.write_text(json.dumps(self.index, sort_keys=True), encoding='utf-8')
+
+    def dimensions(self, path, digest):
+        """(width, height) of an image, read from the header once per content hash"""
+        if digest not in self.index:
+            with Image.open(path) as im:
+                self.index[digest] = list(ImageOps.exif_transpose(im).size)
+        return tuple(self.index[digest])
+
+    def sources(self):
+        """Static images that get responsive variants"""
+        images_dir = self.static_dir / 'images'
+        if not images_dir.exists():
+            return
+        exclude = self.settings['exclude']
+        for path in sorted(images_dir.rglob('*')):
+            rel = path.relative_to(self.static_dir).as_posix()
+            if (path.suffix.lower() in SOURCE_SUFFIXES
+                    and not VARIANT_PATTERN.search(path.stem)
+                    and not any(Path(rel).match(pattern) for pattern in exclude)):
+                yield path
+
+    def formats_for(self, path):
+        """Output formats for a source: configured modern formats plus its own"""
+        own = path.suffix.lower().lstrip('.')
+        modern = [f for f in self.settings['formats'] if f in MODERN_FORMATS]
+        return modern + [own]
+
+    def build_plan(self):
+        """Work out every variant, mapping output path -> variant details
+
+        Variants that already exist in static/ (hand-made _400w files) are
+        listed but not generated.
+        """
+        self.plan = {}
+        self.stats = dict.fromkeys(self.stats, 0)
+        if not self.enabled:
+            return self.plan
+
+        quality = self.settings['quality']
+        max_width = self.settings['max_width']
+        for path in self.sources():
+            digest = self.hasher(path)
+            width, height = self.dimensions(path, digest)
+            full_width = min(width, max_width)
+            widths = sorted({w for w in self.settings['widths'] if w < full_width} | {full_width})
+            rel_dir = path.parent.relative_to(self.static_dir).as_posix()
+            self.stats['sources'] += 1
+
+            for fmt in self.formats_for(path):
+                for w in widths:
+                    # Only the unscaled variant shares the source's name; one capped at
+                    # max_width gets its own, or the original would be published instead
+                    name = f'{path.stem}.{fmt}' if w == width else f'{path.stem}_{w}w.{fmt}'
+                    output = f'{rel_dir}/{name}'
+                    variant = {
+                        'source': path.relative_to(self.static_dir).as_posix(),
+                        'width': w,
+                        'height': round(height * w / width),
+                        'format': fmt,
+                        'static': (self.static_dir / output).exists(),
+                        'cache': str(self.cache_dir / f'{digest[:20]}_{w}w_q{quality}.{fmt}'),
+                    }
+                    self.plan[output] = variant
+                    self.stats['variants'] += 1
+        return self.plan
+
+    def start(self):
+        """Plan variants and submit missing encodes to a process pool without waiting"""
+        self.build_plan()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        todo = []
+        for variant in self.plan.values():
+            if variant['static']:
+                continue
+            if os.path.exists(variant['cache']):
+                self.stats['cached'] += 1
+                continue
+            todo.append(variant)
+
+        if todo:
+            workers = self.settings['workers'] or os.cpu_count() or 1
+            self.pool = ProcessPoolExecutor(max_workers=min(workers, len(todo)))
+            quality = self.settings['quality']
+            self.futures = [
+                self.pool.submit(encode_variant, str(self.static_dir / v['source']),
+                                 v['cache'], v['width'], v['format'], quality)
+                for v in todo
+            ]
+        self.save_index()
+        return self.plan
+
+    def generated_outputs(self):
+        """Output paths (relative to the output dir) written by this stage"""
+        return [output for output, v in self.plan.items() if not v['static']]
+
+    def wait(self):
+        """Block until every submitted encode has finished"""
+        try:
+            for future in self.futures:
+                self.stats['bytes_encoded'] += future.result()
+                self.stats['encoded'] += 1
+        finally:
+            if self.pool:
+                self.pool.shutdown()
+            self.pool = None
+            self.futures = []
+
+    def finish(self, output_dir, sync):
+        """Wait for pending encodes and publish generated variants with a FileSync"""
+        self.wait()
+
+        written = []
+        for output in self.generated_outputs():
+            if sync.sync(self.plan[output]['cache'], Path(output_dir) / output):
+                written.append(output)
+        return written
+
+    def fingerprint(self):
+        """Hash of the variant plan, so pages using the helpers rebuild when it changes"""
+        if self.plan is None:
+            self.build_plan()
+        listing = sorted((output, v['width'], v['format']) for output, v in self.plan.items())
+        return hashlib.sha256(json.dumps(listing).encode('utf-8')).hexdigest()
+
+    def variants_of(self, src, fmt=None):
+        """(width, output path) of each planned variant of an image, smallest first"""
+        if self.plan is None:
+            self.build_plan()
+        src = src.lstrip('/')
+        return sorted((v['width'], output) for output, v in self.plan.items()
+                      if v['source'] == src and (fmt is None or v['format'] == fmt))
+
+    def srcset(self, src, fmt=None):
+        """srcset attribute value for an image in a given format"""
+        fmt = fmt or src.rsplit('.', 1)[-1].lower()
+        return ', '.join(f'{self.resolve(output)} {w}w' for w, output in self.variants_of(src, fmt))
+
+    def responsive_image(self, src, alt='', sizes='100vw', width=None, height=None,
+                         loading='lazy', class_=None):
+        """<picture> markup with a srcset per format for a static image"""
+        attrs = f' alt="{escape(alt)}"'
+        if class_:
+            attrs += f' class="{escape(class_)}"'
+        if width and height:
+            attrs += f' width="{width}" height="{height}"'
+        if loading:
+            attrs += f' loading="{loading}" decoding="async"'
+
+        if src.startswith(('http://', 'https://')) or not self.variants_of(src):
+            return Markup(f'<img src="{escape(src)}"{attrs}>')
+
+        own = src.rsplit('.', 1)[-1].lower()
+        sources = []
+        for fmt in self.settings['formats']:
+            if fmt in MODERN_FORMATS and self.variants_of(src, fmt):
+                sources.append(f'<source type="{MIME_TYPES[fmt]}" srcset="{self.srcset(src, fmt)}" '
+                               f'sizes="{escape(sizes)}">')
+
+        return Markup(
+            '<picture>' + ''.join(sources)
+            + f'<img src="{escape(self.resolve(src))}" srcset="{self.srcset(src, own)}" sizes="{escape(sizes)}"{attrs}>'
+            + '</picture>'
+        )
+
+
+def main():
+    """Encode every configured variant into the cache and report"""
+    root = Path(__file__).resolve().parent.parent
+
+    if Image is None:
+        print("❌ Pillow is not installed. Install: pip install Pillow")
+        sys.exit(1)
+
+    optimizer = ImageOptimizer.from_config(root / 'site.config.yaml', root / 'static',
+                                           root / '.build-cache' / 'images')
+    print("🖼️  Generating responsive image variants...")
+    optimizer.start()
+    optimizer.wait()
+
+    stats = optimizer.stats
+    print(f"   ✓ {stats['sources']} sources, {stats['variants']} variants")
+    print(f"   ✓ {stats['encoded']} encoded ({stats['bytes_encoded'] / 1024:.1f} KB), "
+          f"{stats['cached']} already cached")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+JavaScript minifier
+Drops comments and redundant whitespace from static scripts while leaving
+strings, template literals and regular expressions untouched. Line breaks
+that automatic semicolon insertion could depend on are kept, so scripts
+behave exactly as written
+"""
+
+import re
+import sys
+from pathlib import Path
+
+WORD = re.compile(r'[\w$]+')
+SPACE = re.compile('[ \t\r\f\v\u00a0\ufeff]+')
+
+# A '/' after one of these starts a regular expression rather than a division
+REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                  'throw', 'case', 'do', 'else', 'yield', 'await'}
+
+# A line break after (or before) one of these can never end a statement
+JOIN_AFTER = set('{;,([=:&|?<>!~^%*')
+JOIN_BEFORE = set('}),;]')
+
+
+def _skip_string(js, i):
+    """Index just past the string or template literal starting at i"""
+    quote = js[i]
+    i += 1
+    while i < len(js):
+        c = js[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if c == '\n' and quote != '`':
+            break  # Unterminated; leave the rest to the browser to reject
+        i += 1
+    return i
+
+
+def _skip_regex(js, i):
+    """Index just past the regular expression literal (and flags) starting at i"""
+    i += 1
+    in_class = False
+    while i < len(js):
+        c = js[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            return i
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            i += 1
+            break
+        i += 1
+    match = WORD.match(js, i)
+    return match.end() if match else i
+
+
+def minify(js, keep_bang_comments=True):
+    """Minified JavaScript
+
+    keep_bang_comments keeps /*! ... */ blocks (licence headers).
+    """
+    out = []
+    last = ''        # Last token written
+    space = newline = False
+    i, n = 0, len(js)
+
+    def emit(token):
+        nonlocal last, space, newline
+        if out:
+            if newline and last[-1] not in JOIN_AFTER and token[0] not in JOIN_BEFORE:
+                out.append('\n')
+            elif (space or newline) and (
+                    (WORD.match(last[-1]) and WORD.match(token[0]))
+                    or (last[-1] in '+-' and token[0] in '+-')
+                    or (last[-1] == '/' and token[0] == '/')
+                    or (last[-1].isdigit() and token[0] == '.')):
+                out.append(' ')
+        out.append(token)
+        last = token
+        space = newline = False
+
+    while i < n:
+        c = js[i]
+        if c == '\n':
+            newline = True
+            i += 1
+        elif SPACE.match(c):
+            space = True
+            i = SPACE.match(js, i).end()
+        elif js.startswith('//', i):
+            end = js.find('\n', i)
+            i = n if end < 0 else end
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            comment = js[i:end]
+            if keep_bang_comments and comment.startswith('/*!'):
+                emit(comment)
+                newline = True
+            elif '\n' in comment:
+                newline = True
+            else:
+                space = True
+            i = end
+        elif c in '\'"`':
+            end = _skip_string(js, i)
+            emit(js[i:end])
+            i = end
+        elif c == '/' and (not last or last[-1] in REGEX_AFTER or last in REGEX_KEYWORDS):
+            end = _skip_regex(js, i)
+            emit(js[i:end])
+            i = end
+        else:
+            match = WORD.match(js, i)
+            end = match.end() if match else i + 1
+            emit(js[i:end])
+            i = end
+    return ''.join(out) + ('\n' if out else '')
+
+
+def main():
+    """Report what minification saves on static/js"""
+    root = Path(__file__).resolve().parent.parent
+    total_in = total_out = 0
+    for script in sorted((root / 'static' / 'js').glob('*.js')):
+        js = script.read_text(encoding='utf-8')
+        size_in, size_out = len(js.encode('utf-8')), len(minify(js).encode('utf-8'))
+        total_in, total_out = total_in + size_in, total_out + size_out
+        print(f"   ✓ {script.name}: {size_in:,} → {size_out:,} bytes")
+    print(f"📜 {total_in:,} → {total_out:,} bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Resource hints
+Post-render pass over a page: preloads its likely LCP image with high fetch
+priority, lazy-loads images below the fold, fills in missing image
+dimensions, preconnects to the third-party origins it loads from and
+preloads fonts its inline CSS needs
+"""
+
+import re
+import sys
+import itertools
+from html import escape
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit
+
+DEFAULTS = {
+    'lcp': True,                       # fetchpriority=high and a preload for the LCP image
+    'lcp_roots': ['.hero'],            # Elements the LCP image is looked for in
+    'fold_roots': ['header', '.hero'], # Images outside these are lazy-loaded
+    'lazy_images': True,
+    'dimensions': True,                # Fill in missing width/height
+    'preconnect': True,
+    'max_preconnect': 4,               # Preconnects added per page
+    'script_origins': {},              # Script -> origins it loads from at runtime
+    'preload_fonts': True,
+}
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+                 'meta', 'param', 'source', 'track', 'wbr'}
+
+FONT_URL = re.compile(r'@font-face\s*{[^}]*?url\(\s*["\']?([^"\')]+\.woff2)["\']?\s*\)', re.I)
+
+
+class PageScanner(HTMLParser):
+    """Record the images, sources, stylesheets, scripts and hints of a page with their offsets
+
+    The page can be fed in chunks; offsets are from the start of the page.
+    With lcp_only, only images that could be the LCP image are kept.
+    """
+
+    def __init__(self, lcp_roots, fold_roots, lcp_only=False):
+        super().__init__(convert_charrefs=True)
+        self.lcp_only = lcp_only
+        self.lines = [0]       # Offsets of the line starts from line_base on
+        self.line_base = 0
+        self.fed = 0
+        self.roots = {'lcp': lcp_roots, 'fold': fold_roots}
+        self.depth = {'lcp': 0, 'fold': 0}
+        self.images = []       # dicts: start, end, tag, attrs, lcp, fold, sources
+        self.origins = []      # Third-party origins in document order
+        self.scripts = []
+        self.hinted = set()    # (rel, href) of existing hint links
+        self.styles = []
+        self.head_insert = None
+        self.picture = None
+        self.in_style = False
+        self.in_body = False
+
+    def feed(self, data):
+        for match in re.finditer('\n', data):
+            self.lines.append(self.fed + match.end())
+        self.fed += len(data)
+        super().feed(data)
+        # Tags are reported in order, so lines before the current one are done with
+        line = self.getpos()[0] - 1
+        del self.lines[:line - self.line_base]
+        self.line_base = line
+
+    @property
+    def parsed(self):
+        """Offset up to which the fed text has been parsed"""
+        return self.fed - len(self.rawdata)
+
+    def position(self):
+        line, col = self.getpos()
+        return self.lines[line - 1 - self.line_base] + col
+
+    @staticmethod
+    def matches(roots, tag, attrs):
+        classes = (attrs.get('class') or '').split()
+        for root in roots:
+            if root.startswith('.') and root[1:] in classes:
+                return True
+            if root.startswith('#') and root[1:] == attrs.get('id'):
+                return True
+            if root == tag:
+                return True
+        return False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        start = self.position()
+        text = self.get_starttag_text()
+        end = start + len(text)
+
+        for kind, roots in self.roots.items():
+            if self.depth[kind]:
+                if tag not in VOID_ELEMENTS:
+                    self.depth[kind] += 1
+            elif tag not in VOID_ELEMENTS and self.matches(roots, tag, attrs):
+                self.depth[kind] = 1
+
+        if tag == 'body':
+            self.in_body = True
+            self.mark_head(start)
+        elif tag == 'picture':
+            self.picture = []
+        elif tag == 'source' and self.picture is not None:
+            self.picture.append(attrs)
+        elif tag == 'img':
+            if self.depth['lcp'] or not self.lcp_only:
+                self.images.append({
+                    'start': start, 'end': end, 'tag': text, 'attrs': attrs,
+                    'lcp': bool(self.depth['lcp']), 'fold': bool(self.depth['fold']),
+                    'sources': list(self.picture or []),
+                })
+            if self.depth['fold']:
+                self.add_origin(attrs.get('src'))  # Lazy images are not worth an early connection
+        elif tag == 'link':
+            rel = (attrs.get('rel') or '').lower()
+            if rel in ('preconnect', 'dns-prefetch', 'preload'):
+                self.hinted.add((rel, attrs.get('href')))
+            elif rel == 'stylesheet':
+                self.add_origin(attrs.get('href'))
+            self.mark_head(start)
+        elif tag == 'script':
+            if attrs.get('src'):
+                self.scripts.append(attrs['src'])
+                self.add_origin(attrs['src'])
+            self.mark_head(start)
+        elif tag == 'style':
+            self.in_style = True
+            self.mark_head(start)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        for kind in self.depth:
+            if self.depth[kind] and tag not in VOID_ELEMENTS:
+                self.depth[kind] -= 1
+
+    def handle_endtag(self, tag):
+        for kind in self.depth:
+            if self.depth[kind] and tag not in VOID_ELEMENTS:
+                self.depth[kind] -= 1
+        if tag == 'picture':
+            self.picture = None
+        elif tag == 'style':
+            self.in_style = False
+        elif tag == 'head':
+            self.mark_head(self.position())
+
+    def handle_data(self, data):
+        if self.in_style:
+            self.styles.append(data)
+
+    def mark_head(self, offset):
+        """Hints go before the first stylesheet, style or script in <head>"""
+        if self.head_insert is None and not self.in_body:
+            self.head_insert = offset
+
+    def add_origin(self, url):
+        if url and url.startswith(('http://', 'https://', '//')):
+            parts = urlsplit(url if not url.startswith('//') else 'https:' + url)
+            origin = f'{parts.scheme}://{parts.netloc}'
+            if origin not in self.origins:
+                self.origins.append(origin)
+
+
+def attribute(name, value):
+    return f' {name}="{escape(str(value))}"'
+
+
+def set_attributes(tag, changes):
+    """A start tag with attributes added, replaced (value) or removed (None)"""
+    for name, value in changes.items():
+        pattern = re.compile(r'\s' + re.escape(name) + r'(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+))?(?=[\s/>])', re.I)
+        if pattern.search(tag):
+            tag = pattern.sub('' if value is None else attribute(name, value), tag, count=1)
+        elif value is not None:
+            tail = '/>' if tag.endswith('/>') else '>'
+            tag = tag[:-len(tail)].rstrip() + attribute(name, value) + tail
+    return tag
+
+
+def find_lcp(scanner, settings, dimensions=None):
+    """The largest image in the LCP roots, or None"""
+    def area(image):
+        attrs = image['attrs']
+        try:
+            return int(attrs.get('width')) * int(attrs.get('height'))
+        except (TypeError, ValueError):
+            size = dimensions(attrs.get('src', '')) if dimensions else None
+            return size[0] * size[1] if size else 0
+
+    candidates = [image for image in scanner.images
+                  if image['lcp'] and not image['attrs'].get('src', '').startswith('data:')]
+    return max(candidates, key=area) if settings['lcp'] and candidates else None
+
+
+def head_hints(scanner, lcp, settings):
+    """The preload and preconnect links for a scanned page"""
+    hints = []
+    if lcp is not None:
+        source = lcp['sources'][0] if lcp['sources'] else lcp['attrs']
+        href = lcp['attrs'].get('src')
+        if ('preload', href) not in scanner.hinted:
+            hint = '<link rel="preload" as="image"' + attribute('href', href)
+            if source.get('srcset'):
+                hint += attribute('imagesrcset', source['srcset'])
+                if source.get('sizes'):
+                    hint += attribute('imagesizes', source['sizes'])
+            if source.get('type'):
+                hint += attribute('type', source['type'])
+            hints.append(hint + ' fetchpriority="high">')
+
+    if settings['preload_fonts']:
+        for font in dict.fromkeys(FONT_URL.findall(''.join(scanner.styles))):
+            if ('preload', font) not in scanner.hinted:
+                hints.append('<link rel="preload" as="font" type="font/woff2"' + attribute('href', font) + ' crossorigin>')
+
+    if settings['preconnect']:
+        origins = list(scanner.origins)
+        for script in scanner.scripts:
+            name = script.rsplit('/', 1)[-1]
+            for pattern, extra in settings['script_origins'].items():
+                stem = pattern.rsplit('.', 1)[0]
+                if name == pattern or (name.startswith(stem + '.') and name.endswith('.js')):
+                    origins.extend(o for o in extra if o not in origins)
+        # One hint per origin: preconnect the first few, dns-prefetch the rest
+        added = 0
+        for origin in origins:
+            if ('preconnect', origin) in scanner.hinted or ('dns-prefetch', origin) in scanner.hinted:
+                continue
+            rel = 'preconnect' if added < settings['max_preconnect'] else 'dns-prefetch'
+            hints.append(f'<link rel="{rel}"' + attribute('href', origin) + '>')
+            added += 1
+    return hints
+
+
+def image_changes(image, is_lcp, settings, dimensions=None):
+    """Attribute changes for one <img>"""
+    attrs = image['attrs']
+    src = attrs.get('src') or ''
+    changes = {}
+    if is_lcp:
+        changes['fetchpriority'] = 'high'
+        changes['loading'] = None
+    elif settings['lazy_images'] and not image['fold']:
+        if 'loading' not in attrs:
+            changes['loading'] = 'lazy'
+        if 'decoding' not in attrs:
+            changes['decoding'] = 'async'
+    if (settings['dimensions'] and dimensions and not src.startswith(('data:', 'http:', 'https:', '//'))
+            and not ('width' in attrs and 'height' in attrs)):
+        size = dimensions(src)
+        if size:
+            width, height = size
+            if 'width' in attrs:
+                try:
+                    width, height = int(attrs['width']), round(int(attrs['width']) * height / width)
+                except ValueError:
+                    pass
+            changes.update(width=width, height=height)
+    return changes
+
+
+def scan(chunks, settings, dimensions=None):
+    """First pass over a page: (LCP image start offset or None, head insertion edits)"""
+    scanner = PageScanner(settings['lcp_roots'], settings['fold_roots'], lcp_only=True)
+    for chunk in chunks:
+        scanner.feed(chunk)
+    scanner.close()
+    lcp = find_lcp(scanner, settings, dimensions)
+    hints = head_hints(scanner, lcp, settings)
+    edits = []
+    if hints and scanner.head_insert is not None:
+        edits.append((scanner.head_insert, scanner.head_insert, '\n    '.join(hints) + '\n    '))
+    return (lcp['start'] if lcp else None), edits
+
+
+def rewrite(chunks, settings, lcp_start, edits, dimensions=None):
+    """Second pass: yield the page with the head edits from scan() and image changes applied
+
+    Image tags are rewritten as they are parsed; only text the parser has not
+    finished with is held back.
+    """
+    scanner = PageScanner(settings['lcp_roots'], settings['fold_roots'])
+    pending = sorted(edits)
+    buffer = ''
+    offset = 0  # Page offset of buffer[0]
+    for chunk in itertools.chain(chunks, [None]):
+        if chunk is None:
+            scanner.close()
+            safe = scanner.fed
+        else:
+            scanner.feed(chunk)
+            buffer += chunk
+            safe = scanner.parsed
+        for image in scanner.images:
+            changes = image_changes(image, image['start'] == lcp_start, settings, dimensions)
+            if changes:
+                pending.append((image['start'], image['end'], set_attributes(image['tag'], changes)))
+        if scanner.images:
+            scanner.images.clear()
+            pending.sort()
+
+        out = []
+        pos = 0  # Index into buffer written so far
+        while pending and pending[0][1] <= safe:
+            start, end, replacement = pending.pop(0)
+            out += [buffer[pos:start - offset], replacement]
+            pos = end - offset
+        # Everything before the next edit is final
+        limit = min(safe, pending[0][0]) if pending else safe
+        limit = max(pos, limit - offset)
+        out.append(buffer[pos:limit])
+        buffer = buffer[limit:]
+        offset += limit
+        yield ''.join(out)
+
+
+def optimize(html, settings=None, dimensions=None):
+    """html with resource hints applied
+
+    dimensions(src) returns the (width, height) of a local image or None.
+    """
+    settings = {**DEFAULTS, **(settings or {})}
+    lcp_start, edits = scan([html], settings, dimensions)
+    return ''.join(rewrite([html], settings, lcp_start, edits, dimensions))
+
+
+def main():
+    """Report the hints each built page would get"""
+    root = Path(__file__).resolve().parent.parent
+    for page in sorted((root / 'docs').glob('**/*.html')):
+        html = page.read_text(encoding='utf-8')
+        optimized = optimize(html)
+        hint = re.compile(r'<link rel=["\']?(?:preload|preconnect)\b')
+        added = len(hint.findall(optimized)) - len(hint.findall(html))
+        print(f"   ✓ {page.relative_to(root / 'docs')}: {added} hints added")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Site validator
+Checks content YAML, and every src/href/srcset reference and #anchor in the
+rendered pages and templates against the files on disk. Files are parsed in a
+thread pool and parse results are cached by content hash.
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, unquote
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+# Bump when the cached parse results change shape
+VALIDATOR_CACHE_VERSION = 2
+
+# Schemes that point off-site and are not checked
+EXTERNAL_SCHEMES = ('http', 'https', 'mailto', 'tel', 'data', 'javascript', 'sms', 'ftp')
+
+IMAGE_ATTRS = {'src', 'srcset', 'poster'}
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class ReferenceCollector(HTMLParser):
+    """Collect (tag, attribute, url, position) references and element ids from HTML
+
+    position includes the column, since a minified page is mostly one line.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.refs = []
+        self.ids = []
+
+    def handle_starttag(self, tag, attrs):
+        line, column = self.getpos()
+        position = f"line {line}, col {column + 1}"
+        for name, value in attrs:
+            if value is None:
+                continue
+            if name in ('id', 'name') and (name == 'id' or tag == 'a'):
+                self.ids.append(value)
+            elif name in ('src', 'href', 'poster'):
+                self.refs.append((tag, name, value.strip(), position))
+            elif name in ('srcset', 'imagesrcset'):
+                for candidate in value.split(','):
+                    url = candidate.strip().split(' ')[0]
+                    if url:
+                        self.refs.append((tag, 'srcset', url, position))
+
+    handle_startendtag = handle_starttag
+
+
+def parse_html(path):
+    """References and ids in an HTML file"""
+    collector = ReferenceCollector()
+    collector.feed(Path(path).read_text(encoding='utf-8'))
+    collector.close()
+    return {'refs': collector.refs, 'ids': collector.ids}
+
+
+def parse_yaml(path):
+    """YAML syntax errors in a file (empty when it parses)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            yaml.safe_load(f)
+    except yaml.YAMLError as e:
+        return {'errors': [f"Invalid YAML: {e}"]}
+    return {'errors': []}
+
+
+def parse_template(path):
+    """References in a template, skipping ones built from Jinja expressions"""
+    parsed = parse_html(path)
+    parsed['refs'] = [ref for ref in parsed['refs'] if '{' not in ref[2]]
+    return parsed
+
+
+PARSERS = {'html': parse_html, 'yaml': parse_yaml, 'template': parse_template}
+
+
+class ValidationResult:
+    """Errors and warnings for one file"""
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self.errors = []
+        self.warnings = []
+
+    def to_dict(self):
+        return {'path': self.path, 'kind': self.kind, 'errors': self.errors, 'warnings': self.warnings}
+
+
+class SiteValidator:
+    """Validate content YAML, rendered pages and templates"""
+
+    def __init__(self, output_dir, root=None, check_yaml=True, check_images=True,
+                 check_links=True, cache_path=None, workers=None):
+        self.output_dir = Path(output_dir)
+        self.root = Path(root) if root else Path(__file__).parent
+        self.check_yaml = check_yaml
+        self.check_images = check_images
+        self.check_links = check_links
+        self.cache_path = Path(cache_path) if cache_path else self.root / '.build-cache' / 'validation.json'
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 2)
+        self.cache = self.load_cache()
+        self.results = []
+        self.stats = {'files': 0, 'cached': 0, 'parsed': 0, 'references': 0}
+
+    def load_cache(self):
+        """Parse results from earlier runs, keyed by path"""
+        try:
+            cache = json.loads(self.cache_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        return cache.get('files', {}) if cache.get('version') == VALIDATOR_CACHE_VERSION else {}
+
+    def save_cache(self):
+        """Persist parse results (atomically, so concurrent runs never see half a file)"""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(f'.{self.cache_path.name}.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps({'version': VALIDATOR_CACHE_VERSION, 'files': self.cache}), encoding='utf-8')
+        os.replace(tmp, self.cache_path)
+
+    def files(self):
+        """(kind, path) for every file to check"""
+        if self.check_yaml:
+            for path in sorted((self.root / 'content').glob('**/*.yaml')):
+                yield 'yaml', path
+        if self.check_images or self.check_links:
+            if self.output_dir.exists():
+                for path in sorted(self.output_dir.glob('**/*.html')):
+                    yield 'html', path
+            for path in sorted((self.root / 'templates').glob('**/*.html')):
+                yield 'template', path
+
+    def parse(self, kind, path):
+        """Parse one file, reusing the cached result while its stat or hash is unchanged"""
+        key = f'{kind}:{path.relative_to(self.root).as_posix()}'
+        st = path.stat()
+        entry = self.cache.get(key)
+        if entry and (entry['size'], entry['mtime']) == (st.st_size, st.st_mtime_ns):
+            return key, entry['result'], True
+
+        digest = file_digest(path)
+        if entry and entry['hash'] == digest:
+            result, cached = entry['result'], True
+        else:
+            result, cached = PARSERS[kind](path), False
+        self.cache[key] = {'hash': digest, 'size': st.st_size, 'mtime': st.st_mtime_ns, 'result': result}
+        return key, result, cached
+
+    def output_index(self):
+        """Paths (relative to the output dir) that a reference may point to
+
+        Static files are included under their published names, so templates
+        validate before the first build.
+        """
+        index = set()
+        if self.output_dir.exists():
+            index.update(p.relative_to(self.output_dir).as_posix()
+                         for p in self.output_dir.rglob('*') if p.is_file())
+        static = self.root / 'static'
+        if static.exists():
+            for p in static.rglob('*'):
+                if not p.is_file():
+                    continue
+                rel = p.relative_to(static).as_posix()
+                index.add(p.name if rel.startswith(('css/', 'js/')) else rel)
+        return index
+
+    def resolve(self, url, page):
+        """(target path relative to the output dir, fragment), or None for off-site URLs"""
+        parts = urlsplit(url)
+        if parts.scheme in EXTERNAL_SCHEMES or parts.netloc or url.startswith('//'):
+            return None
+        path = unquote(parts.path)
+        if not path:
+            return page, unquote(parts.fragment)  # Fragment-only link to the same page
+        if path.endswith('/'):
+            path += 'index.html'
+        base = '' if path.startswith('/') else os.path.dirname(page)
+        target = os.path.normpath(os.path.join(base, path.lstrip('/'))).replace(os.sep, '/')
+        return target, unquote(parts.fragment)
+
+    def check_references(self, result, page, refs, index, anchors, check_anchors):
+        """Add an error for every local reference that does not resolve"""
+        for tag, attr, url, position in refs:
+            is_image = attr in IMAGE_ATTRS and tag in ('img', 'source', 'video', 'picture', 'input')
+            if (is_image and not self.check_images) or (not is_image and not self.check_links):
+                continue
+            resolved = self.resolve(url, page)
+            if resolved is None:
+                continue
+            self.stats['references'] += 1
+            target, fragment = resolved
+
+            if target not in index:
+                label = 'Missing image' if is_image else 'Broken link'
+                result.errors.append(f"{position}: {label} {url}")
+            elif fragment and check_anchors and target in anchors and fragment not in anchors[target]:
+                result.errors.append(f"{position}: Missing anchor #{fragment} in {target}")
+
+    def validate_all(self):
+        """Run every enabled check and return the ValidationResults"""
+        files = list(self.files())
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            parsed = list(pool.map(lambda item: (item[0], item[1], *self.parse(*item)), files))
+
+        index = self.output_index()
+        anchors = {}
+        for kind, path, _, data, _ in parsed:
+            if kind == 'html':
+                anchors[path.relative_to(self.output_dir).as_posix()] = set(data['ids'])
+
+        self.results = []
+        for kind, path, key, data, cached in parsed:
+            self.stats['files'] += 1
+            self.stats['cached' if cached else 'parsed'] += 1
+            result = ValidationResult(key.split(':', 1)[1], kind)
+
+            if kind == 'yaml':
+                result.errors.extend(data['errors'])
+            elif kind == 'html':
+                page = path.relative_to(self.output_dir).as_posix()
+                self.check_references(result, page, data['refs'], index, anchors, True)
+                duplicates = sorted({i for i in data['ids'] if data['ids'].count(i) > 1})
+                result.warnings.extend(f"Duplicate id #{i}" for i in duplicates)
+            else:
+                # Templates render into the output root; their anchors come from other partials
+                self.check_references(result, 'index.html', data['refs'], index, anchors, False)
+            self.results.append(result)
+
+        # Forget files that no longer exist
+        live = {key for _, _, key, _, _ in parsed}
+        self.cache = {key: entry for key, entry in self.cache.items() if key in live}
+        self.save_cache()
+        return self.results
+
+    def generate_report(self):
+        """Human-readable summary of the last run"""
+        errors = sum(len(r.errors) for r in self.results)
+        warnings = sum(len(r.warnings) for r in self.results)
+        lines = [f"📋 {self.stats['files']} files checked ({self.stats['cached']} unchanged), "
+                 f"{self.stats['references']} references"]
+        for result in self.results:
+            for error in result.errors:
+                lines.append(f"   ❌ {result.path}: {error}")
+            for warning in result.warnings:
+                lines.append(f"   ⚠️  {result.path}: {warning}")
+        lines.append(f"   {errors} errors, {warnings} warnings")
+        return '\n'.join(lines)
+
+    def save_report(self, path):
+        """Write the results as JSON"""
+        report = {
+            'generated': datetime.now().isoformat(),
+            'stats': self.stats,
+            'results': [r.to_dict() for r in self.results if r.errors or r.warnings],
+        }
+        Path(path).write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+
+def check_collections(root=None):
+    """Build a scratch copy of the site with every collection enabled and validate it
+
+    Generated pages share the header and footer with the home page, so their
+    links are only checked once a collection is switched on.
+    """
+    from build import SiteBuilder  # The builder's dependencies are only needed here
+
+    root = Path(root) if root else Path(__file__).parent
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch = Path(scratch)
+        for name in ('content', 'templates', 'static'):
+            shutil.copytree(root / name, scratch / name)
+        shutil.copy2(root / 'site.config.yaml', scratch / 'site.config.yaml')
+
+        config_path = scratch / 'content' / 'config.yaml'
+        config = yaml.safe_load(config_path.read_text(encoding='utf-8'))
+        for collection in (config.get('collections') or {}).values():
+            collection['enabled'] = True
+        config_path.write_text(yaml.safe_dump(config, sort_keys=False), encoding='utf-8')
+
+        SiteBuilder(root=scratch, quiet=True).build()
+        validator = SiteValidator(scratch / config['build']['output_dir'], root=scratch)
+        validator.validate_all()
+        return validator
+
+
+def main():
+    """Validate the project standalone (--collections: with every collection enabled)"""
+    if '--collections' in sys.argv[1:]:
+        validator = check_collections()
+    else:
+        validator = SiteValidator(Path(__file__).parent / 'docs')
+        validator.validate_all()
+    print(validator.generate_report())
+    sys.exit(1 if any(r.errors for r in validator.results) else 0)
+
+
+if __name__ == '__main__':
+    main()